@@ -0,0 +1,904 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import math
+import multiprocessing as mp
+import os
+import statistics
+import subprocess
+import sys
+import time
+import cv2
+import numpy as np
+from interfaces import footage_cache, obd_sampler, pipeline, placement
+
+"""
+"benchmark" Module:
+
+Packages Imported:
+ * argparse,
+ * concurrent.futures,
+ * csv,
+ * math,
+ * multiprocessing (as mp),
+ * os,
+ * statistics,
+ * subprocess,
+ * sys,
+ * time,
+ * cv2,
+ * numpy (as np),
+ * interfaces.
+
+Classes:
+ * Emulated_ELM327 -> Stands in for the serial connection to an ELM327 on a CAN vehicle, taking as long as a real one to answer mode-01 requests.
+ * CPU_Envelope -> Confines this process, and every process it starts afterwards, to a number of cores and a share of their time, so that a faster computer runs LaDD about as fast as a Raspberry Pi 3.
+
+Functions:
+ * get_benchmark_pipeline -> Returns an interfaces.pipeline.Pipeline for frames of a given size, with the data variables taken from "data.csv."
+ * read_footage -> Yields the frames of recorded footage, such as the footage in the "test_footage" directory.
+ * get_footage_size -> Returns the [width,height] of recorded footage or of a footage cache.
+ * read_rois -> Yields the "ROI" of every frame of recorded footage, or straight from a footage cache.
+ * build_cache -> Converts recorded footage into a footage cache and reports how much faster its "ROIs" can be read than decoded.
+ * compare_engines -> Runs both detection engines of "Pipeline" on every frame of recorded footage, timing them and reporting how often they agree.
+ * replay_footage -> Runs "Pipeline" on every frame of recorded footage with some of its instance variables changed, returning what it detected and decided on every frame.
+ * compare_bands -> Times "Pipeline" on every frame of recorded footage with "ROI" alone, and with its "lookahead_bands" processed one after another and on a thread pool.
+ * compare_obd_sampling -> Samples an "Emulated_ELM327" with the old one-PID-per-request loop and with several PIDs packed into each request, on a current and on a pre-1.3 adapter, reporting how many samples per second each one gets and failing if any of them gets no speed.
+ * compare_smoothing -> Replays recorded footage with both methods of "smoothing" of "Pipeline," reporting how far each one lags behind the lines actually detected and how much sooner one warns the driver than the other.
+ * compare_gating -> Replays recorded footage with and without "Pipeline's" gating, reporting how many frames it skips, how much time it saves, and how often the skipped frames' lines and "states" differ from those actually detected.
+ * generate_load -> Keeps one core busy until it is told to stop, standing in for the user interface redrawing itself.
+ * compare_placement -> Times "Pipeline" on every frame of recorded footage while other processes load the CPU, with and without the placements of "placement.csv," reporting how much the time per frame varies.
+ * get_calibration_score -> Returns how many seconds a fixed mix of OpenCV and Python work takes on this computer, to compare it with "PI3_REFERENCE_SCORE."
+ * check_envelope -> Runs "Pipeline" with every detection engine, with and without gating, inside a "CPU_Envelope" calibrated to a Raspberry Pi 3, reporting whether each one reaches a target frame rate; or runs any command, such as LaDD's main.py, inside it.
+
+Usage:
+ * python benchmark.py cache test_footage/WTSB_West-video2.avi
+ * python benchmark.py engines test_footage/WTSB_West-video2.avi.roi
+ * python benchmark.py smoothing test_footage/WTSB_West-video2.avi
+ * python benchmark.py gating test_footage/WTSB_West-video2.avi.roi
+ * python benchmark.py bands test_footage/WTSB_West-video2.avi
+ * python benchmark.py obd --baud-rate 9600
+ * sudo python benchmark.py placement test_footage/WTSB_West-video2.avi.roi --load-processes 4
+ * python benchmark.py envelope --calibrate -> Prints the calibration score of this computer; run it on the Raspberry Pi 3 in the car and pass the result as "--reference-score."
+ * sudo python benchmark.py envelope test_footage/WTSB_West-video2.avi.roi --target-fps 30
+ * sudo python benchmark.py envelope --run python main.py --headless --stream-port 8080
+"""
+
+ENGINES = ['hough','histogram']
+#The detection engines of interfaces.pipeline.Pipeline.
+SMOOTHING_METHODS = ['average','kalman']
+#The methods of "smoothing" of interfaces.pipeline.Pipeline.
+WARNING_STATES = ['out_lane','over_divider']
+#The "states" of interfaces.pipeline.Pipeline that warn the driver.
+PI3_REFERENCE_SCORE = 0.8
+#The "get_calibration_score" of a Raspberry Pi 3 Model B, in seconds; an estimate (about 8 times slower than a current desktop core for this mix) until it is measured with "envelope --calibrate" on the Pi itself.
+
+class Emulated_ELM327:
+    """
+    Instance Variables:
+     * baud_rate [int] -> The baud rate of the emulated serial link; every byte sent either way takes 10 bits of it.
+     * ecu_latency [float] -> How many seconds the emulated ECU takes to answer a request once it has been received.
+     * response_timeout [float] -> How many more seconds the emulated ELM327 waits for other ECUs to answer, unless the request ends with the number of responses expected.
+     * version [float] -> The version of the emulated ELM327; before 1.3 it answers "?" to a request ending with the number of responses expected.
+     * start_time [float] -> When the emulation started, which the emulated speed, RPM, and throttle position are a function of.
+     * response [bytes] -> The response to the last command, waiting to be read.
+    
+    Methods:
+     * __init__ -> Instantiates the class.
+     * write -> Receives a command, waiting as long as it takes to send it, and prepares its response.
+     * read_until -> Returns the response to the last command, waiting as long as it takes to receive it.
+     * reset_input_buffer -> Does nothing, as no stale bytes are ever left.
+     * close -> Does nothing.
+     * get_pid_bytes -> Returns the data bytes of a PID of the emulated vehicle.
+    """
+    
+    def __init__(self, baud_rate=9600, ecu_latency=0.03, response_timeout=0.05, version=1.5):
+        """
+        Instantiates the class.
+        
+        Arguments:
+         * baud_rate [int] -> The baud rate of the emulated serial link.
+         * ecu_latency [float] -> How many seconds the emulated ECU takes to answer a request.
+         * response_timeout [float] -> How many more seconds the emulated ELM327 waits for other ECUs to answer.
+         * version [float] -> The version of the emulated ELM327.
+        """
+        
+        self.baud_rate = baud_rate
+        self.ecu_latency = ecu_latency
+        self.response_timeout = response_timeout
+        self.version = version
+        self.start_time = time.monotonic()
+        self.response = b''
+    
+    def write(self, data):
+        """
+        Receives a command, waiting as long as it takes to send it, and prepares its response.
+        
+        Arguments:
+         * data [bytes] -> The command, ending with a carriage return.
+        """
+        
+        time.sleep(len(data)*10.0/self.baud_rate)
+        command = data.decode().strip().upper()
+        if command.startswith('AT'):
+            self.response = b'OK\r\r>'
+            return
+        
+        #A trailing odd digit is the number of responses expected, without which the ELM327 waits out "response_timeout" for other ECUs.
+        response_count = len(command) % 2 == 1
+        if response_count and self.version < 1.3:
+            self.response = b'?\r\r>'
+            return
+        time.sleep(self.ecu_latency + (self.response_timeout if not response_count else 0.0))
+        pids = [int(command[i:i+2],16) for i in range(2,len(command)-1,2)]
+        data_bytes = bytes([0x41])
+        for pid in pids:
+            data_bytes += bytes([pid]) + self.get_pid_bytes(pid)
+        if len(data_bytes) <= 7:
+            self.response = data_bytes.hex().upper().encode() + b'\r\r>'
+        else:
+            #An ISO 15765 multi-frame response: its length, then frames of 6 and then 7 bytes, numbered from 0 and padded at the end.
+            lines = ['%03X' % len(data_bytes),'0:' + data_bytes[:6].hex().upper()]
+            frame_starts = range(6,len(data_bytes),7) if not response_count else []
+            #Told to expect one response, the ELM327 returns after the first frame.
+            for n, i in enumerate(frame_starts,1):
+                lines.append('%X:' % (n % 16) + data_bytes[i:i+7].ljust(7,b'\x00').hex().upper())
+            self.response = ('\r'.join(lines)).encode() + b'\r\r>'
+    
+    def read_until(self, expected=b'>'):
+        """
+        Returns the response to the last command, waiting as long as it takes to receive it.
+        
+        Arguments:
+         * expected [bytes] -> The prompt that ends every response.
+        
+        Return Arguments:
+         * response [bytes] -> The response.
+        """
+        
+        time.sleep(len(self.response)*10.0/self.baud_rate)
+        response, self.response = self.response, b''
+        return response
+    
+    def reset_input_buffer(self):
+        """
+        Does nothing, as no stale bytes are ever left.
+        """
+        
+        pass
+    
+    def close(self):
+        """
+        Does nothing.
+        """
+        
+        pass
+    
+    def get_pid_bytes(self, pid):
+        """
+        Returns the data bytes of a PID of the emulated vehicle.
+        
+        Arguments:
+         * pid [int] -> The PID.
+        
+        Return Arguments:
+         * data_bytes [bytes] -> The data bytes of the PID, as many as "obd_sampler.OBD_Sampler.PIDS" expects.
+        """
+        
+        t = time.monotonic() - self.start_time
+        if pid == 0x0D:
+            return bytes([int(50 + 15*math.sin(t/4.0))])
+        if pid == 0x0C:
+            rpm = int(4*(2000 + 600*math.sin(t/4.0)))
+            return bytes([rpm//256, rpm % 256])
+        for name, (number, length, decode) in obd_sampler.OBD_Sampler.PIDS.items():
+            if number == pid:
+                return bytes([int(127 + 60*math.sin(t))])*length
+        return b''
+
+class CPU_Envelope:
+    """
+    The share of time is enforced with a CPU cgroup (cgroup v2's "cpu.max," or cgroup v1's "cpu.cfs_quota_us"), which needs root; without one, only the cores are limited and "method" says so, so that the times measured can be scaled instead. The quota is handed out every "PERIOD" microseconds, which is kept short so that a frame is slowed down evenly rather than run at full speed and then stopped.
+    
+    Instance Variables:
+     * PERIOD [int (constant)] -> The cgroup period in microseconds.
+     * CGROUP_NAME [str (constant)] -> The name of the cgroup created for the envelope.
+     * cores [int] -> How many cores the envelope has.
+     * share [float] -> The fraction of the time of each of its cores the envelope may use.
+     * method [str] -> "cgroup v2" or "cgroup v1" if the share is enforced, "cores only" if it is not; None before "enter."
+     * cgroup_path [str] -> The directory of the cgroup created; None if there is none.
+     * original_cpus [set] -> The cores this process could run on before "enter."
+     * original_cgroup_procs [str] -> The "cgroup.procs" file of the cgroup this process was in before "enter."
+     * enabled_cpu_controller [bool] -> Whether the cgroup v2 "cpu" controller was off for the children of the root cgroup and was turned on by "create_cgroup," in which case "remove_cgroup" turns it off again.
+    
+    Methods:
+     * __init__ -> Instantiates the class.
+     * enter -> Confines this process to the envelope.
+     * leave -> Puts this process back where it was and removes the cgroup.
+     * create_cgroup -> Creates the cgroup with the quota of the envelope and moves this process into it.
+     * remove_cgroup -> Removes the cgroup of the envelope, and turns the "cpu" controller back off if "create_cgroup" turned it on.
+    """
+    
+    PERIOD = 10000
+    CGROUP_NAME = 'ladd-envelope'
+    
+    def __init__(self, cores, share):
+        """
+        Instantiates the class.
+        
+        Arguments:
+         * cores [int] -> How many cores the envelope has; the first of the cores this process can run on are used.
+         * share [float] -> The fraction of the time of each of its cores the envelope may use.
+        """
+        
+        self.cores = cores
+        self.share = share
+        self.method = None
+        self.cgroup_path = None
+        self.original_cpus = None
+        self.original_cgroup_procs = None
+        self.enabled_cpu_controller = False
+    
+    def enter(self):
+        """
+        Confines this process to the envelope: to its cores, and to its share of their time if a cgroup can be created.
+        
+        Return Arguments:
+         * method [str] -> How the envelope is enforced ("cgroup v2," "cgroup v1," or "cores only").
+        """
+        
+        self.original_cpus = os.sched_getaffinity(0)
+        self.cores = min(self.cores,len(self.original_cpus))
+        os.sched_setaffinity(0,sorted(self.original_cpus)[:self.cores])
+        try:
+            self.method = self.create_cgroup()
+        except OSError as error:
+            print('The CPU share could not be enforced (' + str(error) + '); only the cores are limited.')
+            self.remove_cgroup()
+            self.method = 'cores only'
+        return self.method
+    
+    def leave(self):
+        """
+        Puts this process back in its cgroup and on its cores, and removes the cgroup of the envelope.
+        """
+        
+        if self.cgroup_path is not None:
+            with open(self.original_cgroup_procs,'w') as procs_file:
+                procs_file.write(str(os.getpid()))
+            self.remove_cgroup()
+        if self.original_cpus is not None:
+            os.sched_setaffinity(0,self.original_cpus)
+    
+    def create_cgroup(self):
+        """
+        Creates the cgroup with the quota of the envelope (its share of "PERIOD" for each of its cores) and moves this process into it.
+        
+        Return Arguments:
+         * method [str] -> "cgroup v2" or "cgroup v1."
+        """
+        
+        quota = max(1000,int(self.share*self.cores*self.PERIOD))
+        if os.path.isfile('/sys/fs/cgroup/cgroup.controllers'):
+            self.cgroup_path = os.path.join('/sys/fs/cgroup',self.CGROUP_NAME)
+            self.original_cgroup_procs = '/sys/fs/cgroup' + open('/proc/self/cgroup').read().split('0::',1)[1].split()[0].rstrip('/') + '/cgroup.procs'
+            with open('/sys/fs/cgroup/cgroup.subtree_control') as control_file:
+                self.enabled_cpu_controller = 'cpu' not in control_file.read().split()
+            if self.enabled_cpu_controller:
+                with open('/sys/fs/cgroup/cgroup.subtree_control','w') as control_file:
+                    control_file.write('+cpu')
+            os.makedirs(self.cgroup_path,exist_ok=True)
+            with open(os.path.join(self.cgroup_path,'cpu.max'),'w') as max_file:
+                max_file.write(str(quota) + ' ' + str(self.PERIOD))
+            method = 'cgroup v2'
+        else:
+            self.cgroup_path = os.path.join('/sys/fs/cgroup/cpu',self.CGROUP_NAME)
+            self.original_cgroup_procs = '/sys/fs/cgroup/cpu/cgroup.procs'
+            os.makedirs(self.cgroup_path,exist_ok=True)
+            with open(os.path.join(self.cgroup_path,'cpu.cfs_period_us'),'w') as period_file:
+                period_file.write(str(self.PERIOD))
+            with open(os.path.join(self.cgroup_path,'cpu.cfs_quota_us'),'w') as quota_file:
+                quota_file.write(str(quota))
+            method = 'cgroup v1'
+        with open(os.path.join(self.cgroup_path,'cgroup.procs'),'w') as procs_file:
+            procs_file.write(str(os.getpid()))
+        return method
+    
+    def remove_cgroup(self):
+        """
+        Removes the cgroup of the envelope (if "create_cgroup" got as far as creating it), and turns the cgroup v2 "cpu" controller back off for the children of the root cgroup if "create_cgroup" turned it on, leaving the root cgroup as it was found.
+        """
+        
+        if self.cgroup_path is not None:
+            try:
+                os.rmdir(self.cgroup_path)
+            except OSError:
+                pass
+                #It was never created, or a process started inside the envelope is still running in it.
+            self.cgroup_path = None
+        if self.enabled_cpu_controller:
+            try:
+                with open('/sys/fs/cgroup/cgroup.subtree_control','w') as control_file:
+                    control_file.write('-cpu')
+            except OSError:
+                pass
+                #Another cgroup has started using the controller meanwhile.
+            self.enabled_cpu_controller = False
+
+def get_benchmark_pipeline(size):
+    """
+    Returns an interfaces.pipeline.Pipeline for frames of a given size, with the data variables taken from "data.csv," as LaDD's main.py would give them to "Camera."
+    
+    Arguments:
+     * size [list] -> The [width,height] of the frames.
+    
+    Return Arguments:
+     * pipeline_obj [interfaces.pipeline.Pipeline] -> The pipeline.
+    """
+    
+    data_vars = {'binary_threshold_value_lower_end':130,'first_row_for_warping':47}
+    if os.path.isfile('data.csv'):
+        with open('data.csv','r') as csv_file:
+            for row in csv.reader(csv_file):
+                if len(row) == 2 and row[0] in data_vars and row[1].isdigit():
+                    data_vars[row[0]] = int(row[1])
+    return pipeline.Pipeline(size,data_vars['binary_threshold_value_lower_end'],data_vars['first_row_for_warping'])
+
+def read_footage(path):
+    """
+    Yields the frames of recorded footage, such as the footage in the "test_footage" directory.
+    
+    Arguments:
+     * path [str] -> The path of the footage.
+    """
+    
+    cap = cv2.VideoCapture(path)
+    ret, frame = cap.read()
+    while ret:
+        yield frame
+        ret, frame = cap.read()
+    cap.release()
+
+def get_footage_size(path):
+    """
+    Returns the [width,height] of recorded footage or of a footage cache, which is what "Pipeline's" "camera_res" would be.
+    
+    Arguments:
+     * path [str] -> The path of the footage or of the footage cache.
+    
+    Return Arguments:
+     * size [list] -> The [width,height] of the frames; None if no frame could be read.
+    """
+    
+    if footage_cache.Footage_Cache.is_cache(path):
+        cache = footage_cache.Footage_Cache(path)
+        return cache.source_size if len(cache) > 0 else None
+    for frame in read_footage(path):
+        return [frame.shape[1],frame.shape[0]]
+    return None
+
+def read_rois(path, pipeline_obj):
+    """
+    Yields the "ROI" of every frame of recorded footage, or straight from a footage cache without decoding or copying anything.
+    
+    Arguments:
+     * path [str] -> The path of the footage or of the footage cache.
+     * pipeline_obj [interfaces.pipeline.Pipeline] -> The "Pipeline" whose "row_slice" and "col_slice" cut "ROI" out of the frames of footage.
+    """
+    
+    if footage_cache.Footage_Cache.is_cache(path):
+        yield from footage_cache.Footage_Cache(path)
+    else:
+        for frame in read_footage(path):
+            yield frame[int(pipeline_obj.row_slice[0]):int(pipeline_obj.row_slice[1]),int(pipeline_obj.col_slice[0]):int(pipeline_obj.col_slice[1])]
+
+def build_cache(path, cache_path, speed_trace_path):
+    """
+    Converts recorded footage into a footage cache and reports how much faster its "ROIs" can be read than decoded.
+    
+    Arguments:
+     * path [str] -> The path of the footage.
+     * cache_path [str] -> The path of the footage cache; None for the path of the footage followed by ".roi."
+     * speed_trace_path [str] -> The path of a ".csv" speed trace of "time,speed" rows, or None.
+    """
+    
+    size = get_footage_size(path)
+    if size is None:
+        print('No frames could be read from "' + path + '".')
+        return
+    if cache_path is None:
+        cache_path = path + '.roi'
+    pipeline_obj = get_benchmark_pipeline(size)
+    
+    start_time = time.perf_counter()
+    frames = footage_cache.Footage_Cache.build(path,cache_path,pipeline_obj.row_slice,pipeline_obj.col_slice,speed_trace_path)
+    build_seconds = time.perf_counter() - start_time
+    print('Wrote %d frames (%.1f MB) to "%s" in %.2f s' % (frames, os.path.getsize(cache_path)/1e6, cache_path, build_seconds))
+    
+    for label, source in [('decoded',path),('cached',cache_path)]:
+        start_time = time.perf_counter()
+        for roi in read_rois(source,pipeline_obj):
+            roi.sum()
+            #Touches every byte of "ROI," so that the pages of the cache are actually read.
+        seconds = time.perf_counter() - start_time
+        print('%-8s %8.3f ms/frame' % (label, 1000*seconds/frames if frames > 0 else 0.0))
+
+def compare_engines(path, tolerance):
+    """
+    Runs both detection engines of "Pipeline" on every frame of recorded footage, timing them and reporting how often they agree.
+    
+    Tracking and gating are turned off so that both engines search all of "WarpedROI" on every frame. Two engines agree on a frame if they find the same number of line x-coordinates and each pair of them is at most "tolerance" pixels apart.
+    
+    Arguments:
+     * path [str] -> The path of the footage or of a footage cache.
+     * tolerance [float] -> How many pixels apart two x-coordinates may be and still agree.
+    """
+    
+    size = get_footage_size(path)
+    if size is None:
+        print('No frames could be read from "' + path + '".')
+        return
+    pipeline_obj = get_benchmark_pipeline(size)
+    pipeline_obj.tracking_enabled = False
+    pipeline_obj.gating_enabled = False
+    seconds = {engine:0.0 for engine in ENGINES}
+    frames = agreeing_frames = agreeing_counts = 0
+    differences = []
+    
+    for roi in read_rois(path,pipeline_obj):
+        pipeline_obj.ROI = roi
+        pipeline_obj.warp_ROI()
+        
+        x_coors = {}
+        for engine in ENGINES:
+            pipeline_obj.detection_engine = engine
+            pipeline_obj.avrg_x_coor_of_lines = []
+            start_time = time.perf_counter()
+            pipeline_obj.find_line_x_coors()
+            seconds[engine] += time.perf_counter() - start_time
+            x_coors[engine] = pipeline_obj.avrg_x_coor_of_lines
+        
+        frames += 1
+        if len(x_coors['hough']) == len(x_coors['histogram']):
+            agreeing_counts += 1
+            frame_differences = [abs(a - b) for a, b in zip(x_coors['hough'],x_coors['histogram'])]
+            differences += frame_differences
+            if all(d <= tolerance for d in frame_differences):
+                agreeing_frames += 1
+    
+    print('Frames: ' + str(frames))
+    for engine in ENGINES:
+        print('%-10s %8.3f ms/frame %8.1f FPS' % (engine, 1000*seconds[engine]/frames, frames/seconds[engine] if seconds[engine] > 0 else 0.0))
+    print('Speed-up of "histogram" over "hough": %.2fx' % (seconds['hough']/seconds['histogram'] if seconds['histogram'] > 0 else 0.0))
+    print('Same number of lines: %.1f%% of frames' % (100.0*agreeing_counts/frames))
+    print('Agreement within %.1f px: %.1f%% of frames' % (tolerance, 100.0*agreeing_frames/frames))
+    if len(differences) > 0:
+        print('Mean difference where the numbers match: %.2f px' % (sum(differences)/len(differences)))
+
+def replay_footage(path, fps, settings):
+    """
+    Runs "Pipeline" on every frame of recorded footage, returning what it detected and decided on every frame.
+    
+    The footage is replayed as if it had been recorded at "fps," so that every replay sees the same time between frames however fast this computer is.
+    
+    Arguments:
+     * path [str] -> The path of the footage or of a footage cache.
+     * fps [float] -> The frame rate the footage was recorded at.
+     * settings [dict] -> The instance variables of "Pipeline" to set before the replay, such as "smoothing" or "gating_enabled."
+    
+    Return Arguments:
+     * replay [dict] -> "detected" (the left lane x-coordinate detected in every frame, None if there was no full lane), "smoothed" ("avrg_lane_x1" of every frame, None if there was no full lane), "states" ("state" of every frame), "lines" (the x-coordinates of the lines of every frame), "seconds" (the time spent in "process_ROI"), and "gate_counts" ("Pipeline's" "gate_counts" at the end).
+    """
+    
+    replay = {'detected':[],'smoothed':[],'states':[],'lines':[],'seconds':0.0,'gate_counts':{}}
+    size = get_footage_size(path)
+    if size is None:
+        return replay
+    pipeline_obj = get_benchmark_pipeline(size)
+    for name, value in settings.items():
+        setattr(pipeline_obj,name,value)
+    
+    for i, roi in enumerate(read_rois(path,pipeline_obj)):
+        start_time = time.perf_counter()
+        detection = pipeline_obj.process_ROI(roi,i/fps)
+        replay['seconds'] += time.perf_counter() - start_time
+        
+        replay['detected'].append(detection.lane_lines[0] if len(detection.lane_lines) == 2 else None)
+        replay['smoothed'].append(detection.lane[0] if detection.lane[1] is not None else None)
+        replay['states'].append(detection.state)
+        replay['lines'].append(detection.x_coors_of_lines)
+    
+    replay['gate_counts'] = pipeline_obj.gate_counts
+    return replay
+
+def compare_smoothing(path, fps, max_lag):
+    """
+    Replays recorded footage with both methods of "smoothing" of "Pipeline," reporting how far each one lags behind the lines actually detected and how much sooner one warns the driver than the other.
+    
+    The lag of a method is the shift, in frames, that best lines its "avrg_lane_x1" up with the left lane x-coordinates detected in each frame. A warning starts on a frame whose "state" is in "WARNING_STATES" when the frame before's is not; each warning of one method is paired with the nearest warning of the same "state" of the other, at most "max_lag" frames away.
+    
+    Arguments:
+     * path [str] -> The path of the footage or of a footage cache.
+     * fps [float] -> The frame rate the footage was recorded at.
+     * max_lag [int] -> The greatest lag, in frames, that is looked for.
+    """
+    
+    results = {smoothing:replay_footage(path,fps,{'smoothing':smoothing}) for smoothing in SMOOTHING_METHODS}
+    frames = len(results[SMOOTHING_METHODS[0]]['states'])
+    if frames == 0:
+        print('No frames could be read from "' + path + '".')
+        return
+    
+    print('Frames: ' + str(frames))
+    onsets = {}
+    for smoothing in SMOOTHING_METHODS:
+        detected, smoothed, states = results[smoothing]['detected'], results[smoothing]['smoothed'], results[smoothing]['states']
+        errors = []
+        for lag in range(max_lag+1):
+            pairs = [(detected[i], smoothed[i+lag]) for i in range(frames-lag) if detected[i] is not None and smoothed[i+lag] is not None]
+            errors.append(sum(abs(a - b) for a, b in pairs)/len(pairs) if len(pairs) > 0 else float('inf'))
+        lag = errors.index(min(errors))
+        
+        onsets[smoothing] = [(i, states[i]) for i in range(frames) if states[i] in WARNING_STATES and (i == 0 or states[i-1] != states[i])]
+        print('%-8s lag %2d frames (%6.1f ms), mean error %6.2f px, %d warnings' % (smoothing, lag, 1000.0*lag/fps, errors[0], len(onsets[smoothing])))
+    
+    differences = []
+    for i, state in onsets['kalman']:
+        matches = [j for j, other_state in onsets['average'] if other_state == state and abs(j - i) <= max_lag]
+        if len(matches) > 0:
+            differences.append(min(matches,key=lambda j: abs(j - i)) - i)
+    if len(differences) > 0:
+        print('Warnings of "kalman" matched with "average": %d, starting on average %.1f frames (%.1f ms) sooner' % (len(differences), sum(differences)/len(differences), 1000.0*sum(differences)/len(differences)/fps))
+    else:
+        print('No warnings of "kalman" could be matched with a warning of "average."')
+
+def compare_gating(path, fps, tolerance):
+    """
+    Replays recorded footage with and without "Pipeline's" gating, reporting how many frames it skips, how much time it saves, and how often the skipped frames' lines and "states" differ from those actually detected.
+    
+    The lines of a frame agree if there are as many of them with and without gating and each pair of them is at most "tolerance" pixels apart.
+    
+    Arguments:
+     * path [str] -> The path of the footage or of a footage cache.
+     * fps [float] -> The frame rate the footage was recorded at.
+     * tolerance [float] -> How many pixels apart two x-coordinates may be and still agree.
+    """
+    
+    ungated = replay_footage(path,fps,{'gating_enabled':False})
+    gated = replay_footage(path,fps,{'gating_enabled':True})
+    frames = len(ungated['states'])
+    if frames == 0:
+        print('No frames could be read from "' + path + '".')
+        return
+    
+    agreeing_lines = sum(1 for a, b in zip(ungated['lines'],gated['lines']) if len(a) == len(b) and all(abs(x - y) <= tolerance for x, y in zip(a,b)))
+    agreeing_states = sum(1 for a, b in zip(ungated['states'],gated['states']) if a == b)
+    counts = gated['gate_counts']
+    print('Frames: ' + str(frames))
+    print('Skipped: %.1f%% (%d empty, %d reused)' % (100.0*(counts['empty'] + counts['reused'])/frames, counts['empty'], counts['reused']))
+    for label, replay in [('ungated',ungated),('gated',gated)]:
+        print('%-8s %8.3f ms/frame in process_ROI' % (label, 1000*replay['seconds']/frames))
+    print('Lines agreeing within %.1f px: %.1f%% of frames' % (tolerance, 100.0*agreeing_lines/frames))
+    print('Same "state": %.1f%% of frames' % (100.0*agreeing_states/frames))
+
+def compare_bands(path, vehicle_x_coors):
+    """
+    Times "Pipeline" on every frame of recorded footage with "ROI" alone, and with its "lookahead_bands" processed one after another and on a thread pool, as interfaces.camera.Camera's "begin" does.
+    
+    Every frame is processed once per way, so gating is turned off to keep the later ways from reusing the lines of the first. The bands are cut from the whole frames, so a footage cache (which only holds "ROI") cannot be used.
+    
+    Arguments:
+     * path [str] -> The path of the footage.
+     * vehicle_x_coors [list] -> The x-coordinates of the sides of the vehicle to use in place of a calibrated "avrg_vehicle_width_x_coors."
+    """
+    
+    size = get_footage_size(path)
+    if size is None or footage_cache.Footage_Cache.is_cache(path):
+        print('No frames could be read from "' + path + '".')
+        return
+    pipeline_obj = get_benchmark_pipeline(size)
+    pipeline_obj.avrg_vehicle_width_x_coors = vehicle_x_coors
+    pipeline_obj.gating_enabled = False
+    if len(pipeline_obj.lookahead_bands) == 0:
+        print('None of the lookahead bands fit in frames of ' + str(size[0]) + 'x' + str(size[1]) + '.')
+        return
+    pipeline_obj.band_executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(pipeline_obj.lookahead_bands))
+    
+    seconds = {'ROI alone':0.0,'bands in turn':0.0,'bands on threads':0.0}
+    frames = 0
+    offsets_seen = 0
+    for frame in read_footage(path):
+        for label in seconds:
+            start_time = time.perf_counter()
+            if label == 'bands in turn':
+                offsets = [band.process(frame,pipeline_obj.binary_threshold,sum(vehicle_x_coors)/2.0,1.0/30) for band in pipeline_obj.lookahead_bands]
+            elif label == 'bands on threads':
+                futures = pipeline_obj.process_lookahead_bands(frame,1.0/30)
+            pipeline_obj.ROI = frame[int(pipeline_obj.row_slice[0]):int(pipeline_obj.row_slice[1]),int(pipeline_obj.col_slice[0]):int(pipeline_obj.col_slice[1])]
+            pipeline_obj.warp_ROI()
+            pipeline_obj.find_line_x_coors()
+            pipeline_obj.avrg_x_coor_of_lines = []
+            if label == 'bands on threads':
+                offsets = [future.result() for future in futures]
+            seconds[label] += time.perf_counter() - start_time
+        frames += 1
+        offsets_seen += all(offset is not None for offset in offsets)
+    pipeline_obj.band_executor.shutdown()
+    
+    print('Frames: %d, bands: %s' % (frames, ', '.join(band.name for band in pipeline_obj.lookahead_bands)))
+    for label in seconds:
+        print('%-17s %8.3f ms/frame' % (label, 1000*seconds[label]/frames))
+    print('Lane seen in every band: %.1f%% of frames' % (100.0*offsets_seen/frames))
+
+def compare_obd_sampling(baud_rate, ecu_latency, response_timeout, seconds):
+    """
+    Samples an "Emulated_ELM327" with the old one-PID-per-request loop and with several PIDs packed into each request, on a current and on a pre-1.3 adapter, reporting how many samples per second each one gets and failing if any of them gets no speed.
+    
+    The PIDs and their rates are those of interfaces.OBD.OBD's "SAMPLE_RATES." The old loop is emulated by "OBD_Sampler" with "max_pids_per_request" set to 1 and without the expected number of responses, as python-obd sends its requests. The pre-1.3 adapter answers "?" to the expected number of responses, which "OBD_Sampler" has to stop sending.
+    
+    Arguments:
+     * baud_rate [int] -> The baud rate of the emulated serial link.
+     * ecu_latency [float] -> How many seconds the emulated ECU takes to answer a request.
+     * response_timeout [float] -> How many more seconds the emulated ELM327 waits for other ECUs to answer, unless told how many responses to expect.
+     * seconds [float] -> How many seconds each way of sampling is run for.
+    
+    Return Arguments:
+     * passed [bool] -> Whether every way of sampling got the speed.
+    """
+    
+    rates = {'SPEED':float('inf'),'RPM':4.0,'THROTTLE_POS':4.0}
+    setups = [('one SPEED query per loop',{'SPEED':float('inf')},1,1.5),('one PID per request',rates,1,1.5),('batched',rates,obd_sampler.OBD_Sampler.MAX_PIDS_PER_REQUEST,1.5),
+              ('batched, ELM327 v1.2',rates,obd_sampler.OBD_Sampler.MAX_PIDS_PER_REQUEST,1.2)]
+    passed = True
+    print('Emulated ELM327 at %d baud with %.0f ms of ECU latency, %.0f s each' % (baud_rate, 1000*ecu_latency, seconds))
+    for label, setup_rates, max_pids_per_request, version in setups:
+        sampler = obd_sampler.OBD_Sampler(Emulated_ELM327(baud_rate,ecu_latency,response_timeout,version),dict(setup_rates),max_pids_per_request,max_pids_per_request > 1)
+        counts = {name:0 for name in setup_rates}
+        sampler.requests_sent = sampler.values_received = 0
+        start_time = time.monotonic()
+        while time.monotonic() - start_time < seconds:
+            for name in sampler.sample():
+                if name in counts:
+                    counts[name] += 1
+        elapsed = time.monotonic() - start_time
+        print('%-26s %6.1f requests/s %6.1f values/s  ' % (label, sampler.requests_sent/elapsed, sampler.values_received/elapsed) + '  '.join('%s %.1f/s' % (name, counts[name]/elapsed) for name in counts))
+        if counts['SPEED'] == 0:
+            print('FAIL: "%s" got no speed.' % label)
+            passed = False
+    return passed
+
+def generate_load(stop_event):
+    """
+    Keeps one core busy until it is told to stop, standing in for the user interface redrawing itself.
+    
+    Arguments:
+     * stop_event [mp.Event] -> Set to stop.
+    """
+    
+    while not stop_event.is_set():
+        sum(i*i for i in range(10000))
+
+def compare_placement(path, fps, load_processes):
+    """
+    Times "Pipeline" on every frame of recorded footage while other processes load the CPU, first with every process left where the kernel puts it, then with this process placed as "Camera" and the load placed as "User_Interface" in "placement.csv," reporting how much the time per frame varies.
+    
+    The "ROIs" are read before anything is timed, and gating is turned off so that every frame does the same work. Raising a priority needs root; without it, only the cores are changed. This process's cores and priority are put back afterwards.
+    
+    Arguments:
+     * path [str] -> The path of the footage or of a footage cache.
+     * fps [float] -> The frame rate the footage was recorded at.
+     * load_processes [int] -> How many processes load the CPU.
+    """
+    
+    size = get_footage_size(path)
+    if size is None:
+        print('No frames could be read from "' + path + '".')
+        return
+    pipeline_obj = get_benchmark_pipeline(size)
+    rois = [roi.copy() for roi in read_rois(path,pipeline_obj)]
+    placement_obj = placement.Placement()
+    original_cpus = os.sched_getaffinity(0)
+    original_nice = os.getpriority(os.PRIO_PROCESS,0)
+    
+    stop_event = mp.Event()
+    loads = [mp.Process(target=generate_load,args=(stop_event,),daemon=True) for i in range(load_processes)]
+    for load in loads:
+        load.start()
+    print('Frames: %d, load processes: %d, cores: %d' % (len(rois), load_processes, os.cpu_count() or 1))
+    try:
+        for label in ['unplaced','placed']:
+            if label == 'placed':
+                placement_obj.apply('Camera')
+                for load in loads:
+                    placement_obj.apply('User_Interface',load.pid)
+            pipeline_obj = get_benchmark_pipeline(size)
+            pipeline_obj.gating_enabled = False
+            frame_times = []
+            for i, roi in enumerate(rois):
+                start_time = time.perf_counter()
+                pipeline_obj.process_ROI(roi,i/fps)
+                frame_times.append(1000*(time.perf_counter() - start_time))
+            frame_times.sort()
+            print('%-9s mean %7.3f ms, std %7.3f ms, p99 %7.3f ms, max %7.3f ms' % (label, statistics.mean(frame_times), statistics.pstdev(frame_times), frame_times[min(len(frame_times)-1,int(0.99*len(frame_times)))], frame_times[-1]))
+    finally:
+        stop_event.set()
+        for load in loads:
+            load.join()
+        os.sched_setaffinity(0,original_cpus)
+        try:
+            os.setpriority(os.PRIO_PROCESS,0,original_nice)
+        except PermissionError:
+            pass
+
+def get_calibration_score(rounds=3):
+    """
+    Returns how many seconds a fixed mix of OpenCV and Python work takes on this computer: blurring, edge-detecting, and Hough-transforming a synthetic "ROI" 200 times, with some pure Python in between, like "Pipeline" does. It does not depend on "Pipeline" itself, so changes to "Pipeline" do not move the calibration.
+    
+    Arguments:
+     * rounds [int] -> How many times the work is timed; the fastest is kept.
+    
+    Return Arguments:
+     * score [float] -> The number of seconds; lower is faster.
+    """
+    
+    image = np.zeros((80,320),np.uint8)
+    for x in [60,140,200,280]:
+        cv2.line(image,(x,79),(x+20,0),255,4)
+    scores = []
+    for i in range(rounds):
+        start_time = time.perf_counter()
+        for j in range(200):
+            edges = cv2.Canny(cv2.GaussianBlur(image,(5,5),0),50,150)
+            cv2.HoughLinesP(edges,1,np.pi/180,20,minLineLength=10,maxLineGap=5)
+            sum(k*k for k in range(2000))
+        scores.append(time.perf_counter() - start_time)
+    return min(scores)
+
+def check_envelope(path, fps, target_fps, cores, reference_score, command):
+    """
+    Runs "Pipeline" with every detection engine, with and without gating, inside a "CPU_Envelope" calibrated to a Raspberry Pi 3, reporting whether each one reaches "target_fps"; or runs "command," such as LaDD's main.py, inside it.
+    
+    The share of the envelope is the calibration score of this computer divided by "reference_score," and the score is measured again inside the envelope to show how close it comes. If the share cannot be enforced, the times measured are multiplied by how much slower the Raspberry Pi 3 is instead, which leaves out everything but the speed of the cores. Only "process_ROI" is timed, so the frame rate reached is an upper bound on that of "Camera," which also captures, publishes, and records every frame.
+    
+    Arguments:
+     * path [str] -> The path of the footage or of a footage cache; None when running "command."
+     * fps [float] -> The frame rate the footage was recorded at.
+     * target_fps [float] -> The frame rate each configuration has to reach.
+     * cores [int] -> How many cores the envelope has (4 on a Raspberry Pi 3).
+     * reference_score [float] -> The calibration score of the Raspberry Pi 3.
+     * command [list] -> The command to run inside the envelope instead of the pipeline; None or empty for the pipeline.
+    
+    Return Arguments:
+     * passed [bool] -> Whether every configuration reached "target_fps," or whether "command" exited with 0.
+    """
+    
+    if not command:
+        size = get_footage_size(path) if path is not None else None
+        if size is None:
+            print('No frames could be read from "' + str(path) + '".')
+            return False
+        rois = [roi.copy() for roi in read_rois(path,get_benchmark_pipeline(size))]
+    
+    local_score = get_calibration_score()
+    share = min(1.0,local_score/reference_score)
+    envelope = CPU_Envelope(cores,share)
+    method = envelope.enter()
+    print('Calibration score: %.3f s here, %.3f s on a Raspberry Pi 3; envelope of %d cores at %.0f%% each' % (local_score, reference_score, envelope.cores, 100*share))
+    try:
+        if method == 'cores only':
+            slowdown = reference_score/local_score
+            print('Envelope: cores only, times multiplied by %.2f' % slowdown)
+        else:
+            slowdown = 1.0
+            print('Envelope: %s, calibration score inside it %.3f s' % (method, get_calibration_score()))
+        
+        if command:
+            if method == 'cores only':
+                print('"' + ' '.join(command) + '" runs on the limited cores but at full speed.')
+            return subprocess.call(command) == 0
+        
+        passed = True
+        print('Frames: %d, target: %.1f FPS' % (len(rois), target_fps))
+        for engine in ENGINES:
+            for gating_enabled in [True,False]:
+                pipeline_obj = get_benchmark_pipeline(size)
+                pipeline_obj.detection_engine = engine
+                pipeline_obj.gating_enabled = gating_enabled
+                frame_times = []
+                replay_start_time = time.perf_counter()
+                for i, roi in enumerate(rois):
+                    start_time = time.perf_counter()
+                    pipeline_obj.process_ROI(roi,i/fps)
+                    frame_times.append(slowdown*(time.perf_counter() - start_time))
+                reached_fps = len(frame_times)/(slowdown*(time.perf_counter() - replay_start_time))
+                #The frame rate is taken from the whole replay, so that time the cgroup withholds between two frames is counted too.
+                frame_times.sort()
+                passed = passed and reached_fps >= target_fps
+                print('%-10s gating %-3s %7.1f FPS, p95 %7.3f ms  %s' % (engine, 'on' if gating_enabled else 'off', reached_fps, 1000*frame_times[int(0.95*(len(frame_times)-1))], 'PASS' if reached_fps >= target_fps else 'FAIL'))
+        return passed
+    finally:
+        envelope.leave()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks for LaDD\'s camera pipeline.')
+    subparsers = parser.add_subparsers(dest='benchmark')
+    cache_parser = subparsers.add_parser('cache',help='Convert recorded footage into a memory-mapped cache of its ROI frames for the other benchmarks.')
+    cache_parser.add_argument('footage')
+    cache_parser.add_argument('-o','--output',default=None)
+    cache_parser.add_argument('--speed-trace',default=None)
+    engines_parser = subparsers.add_parser('engines',help='Compare the speed and agreement of the detection engines on recorded footage.')
+    engines_parser.add_argument('footage')
+    engines_parser.add_argument('--tolerance',type=float,default=4.0)
+    smoothing_parser = subparsers.add_parser('smoothing',help='Compare the lag and warning times of the methods of smoothing on recorded footage.')
+    smoothing_parser.add_argument('footage')
+    smoothing_parser.add_argument('--fps',type=float,default=30.0)
+    smoothing_parser.add_argument('--max-lag',type=int,default=10)
+    gating_parser = subparsers.add_parser('gating',help='Compare the speed and accuracy of the camera pipeline with and without pre-Hough gating on recorded footage.')
+    gating_parser.add_argument('footage')
+    gating_parser.add_argument('--fps',type=float,default=30.0)
+    gating_parser.add_argument('--tolerance',type=float,default=4.0)
+    bands_parser = subparsers.add_parser('bands',help='Compare the time per frame of the camera pipeline with and without its lookahead bands on recorded footage.')
+    bands_parser.add_argument('footage')
+    bands_parser.add_argument('--vehicle-x-coors',type=float,nargs=2,default=[130.0,190.0])
+    obd_parser = subparsers.add_parser('obd',help='Compare the samples per second of one-PID and batched OBD requests on an emulated ELM327.')
+    obd_parser.add_argument('--baud-rate',type=int,default=9600)
+    obd_parser.add_argument('--ecu-latency',type=float,default=0.03)
+    obd_parser.add_argument('--response-timeout',type=float,default=0.05)
+    obd_parser.add_argument('--seconds',type=float,default=5.0)
+    placement_parser = subparsers.add_parser('placement',help='Compare how much the time per frame of the camera pipeline varies under load with and without the placements of "placement.csv."')
+    placement_parser.add_argument('footage')
+    placement_parser.add_argument('--fps',type=float,default=30.0)
+    placement_parser.add_argument('--load-processes',type=int,default=4)
+    envelope_parser = subparsers.add_parser('envelope',help='Check whether every detection engine reaches a target frame rate inside a CPU envelope calibrated to a Raspberry Pi 3, or run a command inside it.')
+    envelope_parser.add_argument('footage',nargs='?',default=None)
+    envelope_parser.add_argument('--fps',type=float,default=30.0)
+    envelope_parser.add_argument('--target-fps',type=float,default=30.0)
+    envelope_parser.add_argument('--cores',type=int,default=4)
+    envelope_parser.add_argument('--reference-score',type=float,default=PI3_REFERENCE_SCORE)
+    envelope_parser.add_argument('--calibrate',action='store_true')
+    envelope_parser.add_argument('--run',nargs=argparse.REMAINDER,default=None)
+    args = parser.parse_args()
+    
+    if args.benchmark == 'cache':
+        build_cache(args.footage,args.output,args.speed_trace)
+    elif args.benchmark == 'engines':
+        compare_engines(args.footage,args.tolerance)
+    elif args.benchmark == 'smoothing':
+        compare_smoothing(args.footage,args.fps,args.max_lag)
+    elif args.benchmark == 'gating':
+        compare_gating(args.footage,args.fps,args.tolerance)
+    elif args.benchmark == 'bands':
+        compare_bands(args.footage,args.vehicle_x_coors)
+    elif args.benchmark == 'obd':
+        if not compare_obd_sampling(args.baud_rate,args.ecu_latency,args.response_timeout,args.seconds):
+            sys.exit(1)
+    elif args.benchmark == 'placement':
+        compare_placement(args.footage,args.fps,args.load_processes)
+    elif args.benchmark == 'envelope':
+        if args.calibrate:
+            print('Calibration score: %.3f s' % get_calibration_score())
+        elif not check_envelope(args.footage,args.fps,args.target_fps,args.cores,args.reference_score,args.run):
+            sys.exit(1)
+    else:
+        parser.print_help()
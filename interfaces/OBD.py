@@ -20,12 +20,18 @@ along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 import obd
+import time
+from interfaces import obd_sampler, speed_estimator, metrics
 
 """
 "OBD" Module:
 
 Packages Imported:
- * obd.
+ * obd,
+ * time,
+ * interfaces.obd_sampler,
+ * interfaces.speed_estimator,
+ * interfaces.metrics.
 
 Classes:
  * OBD -> An "interface" for LaDD's OBD connection to a vehicle.
@@ -36,48 +42,95 @@ class OBD:
     Instance Variables:
      * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
      * OBD_connected [bool] -> The result of running this class's "test_OBD_connection" in LaDD's main.py.
-     * OBD_connection [obd.OBD] -> The obd.OBD object that collects OBD data, being the core of this class.
-     * speed [int] -> The current speed of the vehicle.
+     * SPEED_THRESHOLD [int (constant)] -> The speed in kph at and above which LaDD warns the driver.
+     * SAMPLE_RATES [dict (constant)] -> How many times per second each PID is sampled by "OBD_connection"; "SPEED" is in every request, as it decides whether LaDD warns the driver at all.
+     * OBD_connection [interfaces.obd_sampler.OBD_Sampler] -> The object that collects OBD data, packing several PIDs into each request to the ELM327, being the core of this class.
+     * speed [float] -> The current speed of the vehicle in kph.
      * previously_below_48kph [bool] -> The last value of "shared_dict's" "below_48kph," it is used to determine whether to warn the user a change in their vehicle's speed from below 48 kph to equal or above 48 kph, or vice-versa.
+     * below_48kph [bool] -> Whether "speed" is below "SPEED_THRESHOLD," as decided by interfaces.speed_estimator.Speed_Estimator's "is_below" with the same band as "Camera" and "Audio," and published as "shared_dict's" "below_48kph;" None before the first speed is sampled.
+     * estimator [interfaces.speed_estimator.Speed_Estimator] -> Fits the recent speed samples, so that "Camera" and "Audio" can predict the speed between samples from "shared_dict's" "speed_estimate" and react to the 48 kph threshold being crossed before the next sample arrives.
+     * notifier [interfaces.notifier.Notifier] -> Wakes up the user interface when "shared_dict's" "below_48kph" changes; None when nothing is listening.
+     * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten once per sample record, so that "Supervisor" can tell if this process has hung; None when nothing is supervising it.
+     * metrics [interfaces.metrics.Metrics] -> How many sample records have been collected (and how many of them lack the speed), how long collecting each takes, and how often "OBD_connection" could not pack several PIDs into a request.
     
     Methods:
      * __init__ -> Instantiates the class, and prepares an OBD connection if "OBD_connected" holds True.
-     * begin -> Begins the main loop of this class, which constantly collects the current speed of the car and determines based on that value whether "shared_dict's" "below_48kph" key's value is set to True or False. Also ends the multiprocessing.Process in LaDD's main.py using an object of this class when "shared_dict's" "turn_off_LaDD" is True.
+     * begin -> Begins the main loop of this class, which constantly collects sample records of the PIDs in "SAMPLE_RATES," publishes them as "shared_dict's" "obd_sample," and determines from the speed in them whether "shared_dict's" "below_48kph" key's value is set to True or False. Also ends the multiprocessing.Process in LaDD's main.py using an object of this class when "shared_dict's" "turn_off_LaDD" is True, closing "OBD_connection" if there is one.
+     * update_speed_estimate -> Adds a speed sample to "estimator," and publishes the speed and the new estimate to "shared_dict."
      * test_OBD_connection [static] -> Tests whether or not an OBD connection can be established with a given baud rate.
     """    
     
-    def __init__(self, shared_dict, OBD_connected):
+    def __init__(self, shared_dict, OBD_connected, notifier=None, heartbeat=None):
         """
-        Instantiates the class and assign an obd.Async object to the instance variable "OBD_connection."
+        Instantiates the class and assign an interfaces.obd_sampler.OBD_Sampler object to the instance variable "OBD_connection."
         
         Arguments:
          * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
          * OBD_connected [bool] -> The result of running this class's "test_OBD_connection" in LaDD's main.py.
+         * notifier [interfaces.notifier.Notifier] -> Wakes up the user interface when "shared_dict's" "below_48kph" changes (optional).
+         * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten once per sample record (optional).
         """
+        self.SPEED_THRESHOLD = 48
+        self.SAMPLE_RATES = {'SPEED':float('inf'),'RPM':4.0,'THROTTLE_POS':4.0}
+        
         self.shared_dict = shared_dict
         self.OBD_connected = OBD_connected
-        self.speed = 0
+        self.speed = 0.0
         self.previously_below_48kph = self.shared_dict['below_48kph']
+        self.below_48kph = None
+        self.estimator = speed_estimator.Speed_Estimator()
+        self.notifier = notifier
+        self.heartbeat = heartbeat
+        self.metrics = metrics.Metrics(self.shared_dict,'OBD')
         if self.OBD_connected:
-            self.OBD_connection = obd.OBD(portstr='/dev/ttyUSB0',baudrate=self.shared_dict['baud_rate'])
+            self.OBD_connection = obd_sampler.OBD_Sampler(obd_sampler.OBD_Sampler.open_serial('/dev/ttyUSB0',self.shared_dict['baud_rate']),self.SAMPLE_RATES,metrics=self.metrics)
             
         
     def begin(self):
         """
-        Begins the main loop of this class, which constantly collects the current speed of the vehicle and determines based on that value whether "shared_dict's" "below_48kph" key's value is set to True or False. Also ends the multiprocessing.Process in LaDD's main.py using an object of this class when "shared_dict's" "turn_off_LaDD" is True.
+        Begins the main loop of this class, which constantly collects sample records of the PIDs in "SAMPLE_RATES," publishes them as "shared_dict's" "obd_sample," and determines from the speed in them whether "shared_dict's" "below_48kph" key's value is set to True or False. Also ends the multiprocessing.Process in LaDD's main.py using an object of this class when "shared_dict's" "turn_off_LaDD" is True, closing "OBD_connection" if there is one, even if the process is terminated in the middle of a request.
         """
-        while self.OBD_connected and not self.shared_dict['turn_off_LaDD']:
-            self.previously_below_48kph = self.shared_dict['below_48kph']
-            self.speed = self.OBD_connection.query(obd.commands.SPEED)
-            if (self.speed.value.magnitude >= 48):
-                self.shared_dict['below_48kph'] = False
-            else:
-                self.shared_dict['below_48kph'] = True
-            
-            if self.previously_below_48kph != self.shared_dict['below_48kph']:
-                self.shared_dict['crossed_48kph_threshold'] = True
-        else:
-            self.OBD_connection.close()
+        try:
+            while self.OBD_connected and not self.shared_dict['turn_off_LaDD']:
+                if self.heartbeat is not None:
+                    self.heartbeat.beat()
+                self.previously_below_48kph = self.shared_dict['below_48kph']
+                sample_start_time = time.perf_counter()
+                sample_record = self.OBD_connection.sample()
+                self.metrics.observe('sample_seconds',time.perf_counter() - sample_start_time)
+                self.metrics.increment('samples_total')
+                self.metrics.maybe_flush()
+                self.shared_dict['obd_sample'] = sample_record
+                #A sample record without a speed (e.g. when the ELM327 did not answer in time) is skipped rather than ending "begin" with an error.
+                if sample_record.get('SPEED') is None:
+                    self.metrics.increment('samples_without_speed_total')
+                    continue
+                self.speed = sample_record['SPEED']
+                self.update_speed_estimate(self.speed,sample_record['time'])
+                self.below_48kph = speed_estimator.Speed_Estimator.is_below(self.speed,self.SPEED_THRESHOLD,self.below_48kph)
+                self.shared_dict['below_48kph'] = self.below_48kph
+                
+                if self.previously_below_48kph != self.shared_dict['below_48kph']:
+                    self.shared_dict['crossed_48kph_threshold'] = True
+                    if self.notifier is not None:
+                        self.notifier.notify(self.notifier.STATE)
+        finally:
+            #"OBD_connection" only exists if "OBD_connected" held True.
+            if self.OBD_connected:
+                self.OBD_connection.close()
+            self.metrics.flush()
+    
+    def update_speed_estimate(self, speed, sample_time):
+        """
+        Adds a speed sample to "estimator," and publishes the speed and the new estimate to "shared_dict."
+        
+        Arguments:
+         * speed [float] -> The speed of the vehicle in kph that was just sampled.
+         * sample_time [float] -> When the speed was sampled, as given by "time.monotonic."
+        """
+        
+        self.shared_dict['speed_estimate'] = self.estimator.add_sample(sample_time,speed)
+        self.shared_dict['speed'] = speed
     
     @staticmethod
     def test_OBD_connection(baud_rate):
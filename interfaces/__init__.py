@@ -2,8 +2,26 @@
 Modules:
  * audio.py
  * camera.py
+ * clip_recorder.py
+ * debug_stream.py
+ * footage_cache.py
+ * fusion.py
+ * governor.py
+ * lane_tracker.py
+ * memory.py
+ * metrics.py
+ * notifier.py
  * OBD.py
+ * obd_sampler.py
+ * pipeline.py
+ * placement.py
+ * profiler.py
+ * roi_band.py
+ * shutdown.py
+ * speed_estimator.py
+ * supervisor.py
+ * trip_recorder.py
  * user_interface.py
 """
 
-__all__ = ["audio","camera","OBD","user_interface"]
+__all__ = ["audio","camera","clip_recorder","debug_stream","footage_cache","fusion","governor","lane_tracker","memory","metrics","notifier","OBD","obd_sampler","pipeline","placement","profiler","roi_band","shutdown","speed_estimator","supervisor","trip_recorder","user_interface"]
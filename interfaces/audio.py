@@ -21,13 +21,16 @@ along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
 
 import RPi.GPIO as gpio
 import time
+from interfaces import speed_estimator, metrics
 
 """
 "audio" Module:
 
 Packages Imported:
  * RPi.GPIO (as gpio),
- * time.
+ * time,
+ * interfaces.speed_estimator,
+ * interfaces.metrics.
 
 Classes:
  * Audiovisual -> An "interface" for LaDD's Piezo buzzer.
@@ -39,58 +42,132 @@ class Audio:
      * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
      * Piezo_GPIO_pin [int] -> The GPIO pin number of a pulse width modulation GPIO pin on the Raspberry Pi 3 that LaDD uses to control the Piezo buzzer.
      * piezo [gpio.PWM] -> The gpio.PWM object that controls LaDD's Piezo buzzer, being the core of this class.
+     * SPEED_THRESHOLD [int (constant)] -> The speed in kph that the driver is warned about crossing (48 kph, about 30 mph).
+     * IDLE_INTERVAL [float (constant)] -> How many seconds "begin" sleeps after a pass of "Piezo_controller" that sounded no warning, so that it does not flood "manager_obj" with requests or keep a core busy; it bounds how much later than "Camera" a warning starts.
+     * previously_below_threshold [bool] -> Whether the speed predicted from "shared_dict's" "speed_estimate" was below "SPEED_THRESHOLD" the last time "crossed_speed_threshold" was called, as decided by interfaces.speed_estimator.Speed_Estimator's "is_below" (the speed has to reach 48 kph going up, but drop under 46 kph going down); None before the first time.
+     * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten on every pass of "Piezo_controller" and every "pause", so that "Supervisor" can tell if this process has hung; None when nothing is supervising it.
+     * metrics [interfaces.metrics.Metrics] -> How many warnings of each kind have been sounded, and how long each pass of "Piezo_controller" that sounded none takes (which is mostly "shared_dict" round trips).
+     * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Wakes up "pause" as soon as shutdown is requested, so that a warning being sounded is cut short; None to sleep with "time.sleep."
     
     Methods:
      * __init__ -> Instantiates the class, and gives LaDD the control of its Piezo buzzer.
-     * begin -> Begins the main loop of this class, which constantly runs "Piezo_controller". Also ends the multiprocessing.Process object in LaDD's main.py using an object of this class when "shared_dict's" "turn_off_LaDD" is True.
+     * begin -> Begins the main loop of this class, which runs "Piezo_controller" every "IDLE_INTERVAL" while no warning is being sounded. Also ends the multiprocessing.Process object in LaDD's main.py using an object of this class when "shared_dict's" "turn_off_LaDD" is True, always silencing the Piezo buzzer and releasing the GPIO pins.
      * Piezo_controller -> Checks constantly "shared_dict's" "crossed_lane", "crossed_divider", and ">=48kph" keys' values, and warns the driver according to the values.
+     * pause -> Sleeps between the beeps of a warning, waking up early if shutdown is requested.
+     * crossed_speed_threshold -> Predicts the current speed from "shared_dict's" "speed_estimate" and returns whether it has crossed "SPEED_THRESHOLD" since the last call, so that the driver is warned when it happens rather than when the next OBD sample arrives.
     """
     
-    def __init__(self, shared_dict):
+    def __init__(self, shared_dict, shutdown_coordinator=None, heartbeat=None):
         """
         Instantiates the class, and gives LaDD the control of its Piezo buzzer.
         
         Arguments:
          * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+         * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Wakes up "pause" as soon as shutdown is requested (optional).
+         * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten on every pass of "Piezo_controller" and every "pause" (optional).
         """
         
         self.shared_dict = shared_dict
+        self.heartbeat = heartbeat
+        self.metrics = metrics.Metrics(self.shared_dict,'Audio')
+        self.shutdown_coordinator = shutdown_coordinator
         
         self.Piezo_GPIO_pin = 18
         gpio.setmode(gpio.BCM)
         gpio.setup(self.Piezo_GPIO_pin, gpio.OUT)
         self.piezo = gpio.PWM(self.Piezo_GPIO_pin,1700)
+        self.SPEED_THRESHOLD = 48
+        self.IDLE_INTERVAL = 0.02
+        self.previously_below_threshold = None
         
     def begin(self):
         """
-        Begins the main loop of this class, which constantly runs "Piezo_controller". Also ends the multiprocessing.Process object in LaDD's main.py using an object of this class when "shared_dict's" "turn_off_LaDD" is True.
+        Begins the main loop of this class, which runs "Piezo_controller" every "IDLE_INTERVAL" while no warning is being sounded (a warning sleeps between its beeps already). Also ends the multiprocessing.Process object in LaDD's main.py using an object of this class when "shared_dict's" "turn_off_LaDD" is True, always silencing the Piezo buzzer and releasing the GPIO pins, even if the process is terminated.
         """
-        while not self.shared_dict['turn_off_LaDD']:
-            self.Piezo_controller()
-        else:
+        try:
+            while not self.shared_dict['turn_off_LaDD']:
+                if self.heartbeat is not None:
+                    self.heartbeat.beat()
+                pass_start_time = time.perf_counter()
+                if not self.Piezo_controller():
+                    self.metrics.observe('idle_pass_seconds',time.perf_counter() - pass_start_time)
+                    self.pause(self.IDLE_INTERVAL)
+                self.metrics.maybe_flush()
+        finally:
+            self.piezo.stop()
             gpio.cleanup()
+            self.metrics.flush()
     
     def Piezo_controller(self):
         """
         Checks constantly "shared_dict's" "crossed_lane", "crossed_divider", and ">=48kph" keys' values, and warns the driver according to the values.
+        
+        Return Arguments:
+         * warned [bool] -> Whether a warning was sounded (or started to be, before shutdown was requested).
         """
         
-        conditions = [self.shared_dict['crossed_48kph_threshold'],(self.shared_dict['crossed_lane'] or self.shared_dict['crossed_divider'])]
+        conditions = [self.crossed_speed_threshold(),(self.shared_dict['crossed_lane'] or self.shared_dict['crossed_divider'])]
         for c in enumerate(conditions,1):
             if c[0] == 1:
                 if c[1]:
+                    self.metrics.increment('speed_warnings_total')
                     self.shared_dict['crossed_48kph_threshold'] = False
                     self.piezo.start(85)
-                    time.sleep(1)
+                    if self.pause(1):
+                        return True
                     self.piezo.stop()
                     self.piezo.ChangeFrequency(1700)
-                    time.sleep(1)
+                    if self.pause(1):
+                        return True
             else:
                 if c[1]:
+                    self.metrics.increment('lane_warnings_total')
                     for x in range(3):
                         self.piezo.start(85)
-                        time.sleep(0.25)
+                        if self.pause(0.25):
+                            return True
                         self.piezo.stop()
-                        time.sleep(0.75)
+                        if self.pause(0.75):
+                            return True
                         self.piezo.ChangeFrequency(1700)
-                    time.sleep(2)
+                    self.pause(2)
+        return conditions[0] or conditions[1]
+    
+    def pause(self, seconds):
+        """
+        Sleeps between the beeps of a warning, waking up early if shutdown is requested; the Piezo buzzer is left as it is, to be silenced by "begin."
+        
+        Arguments:
+         * seconds [float] -> The number of seconds to sleep.
+        
+        Return Arguments:
+         * requested [bool] -> Whether shutdown was requested, in which case the warning is cut short.
+        """
+        
+        if self.heartbeat is not None:
+            self.heartbeat.beat()
+        if self.shutdown_coordinator is not None:
+            return self.shutdown_coordinator.wait(seconds)
+        time.sleep(seconds)
+        return False
+    
+    def crossed_speed_threshold(self):
+        """
+        Predicts the current speed from "shared_dict's" "speed_estimate" and returns whether it has crossed "SPEED_THRESHOLD" since the last call, so that the driver is warned when it happens rather than when the next OBD sample arrives.
+        
+        Return Arguments:
+         * crossed [bool] -> Whether "SPEED_THRESHOLD" has been crossed, either way; before any speed has been sampled, this is "shared_dict's" "crossed_48kph_threshold."
+        """
+        
+        speed_estimate = self.shared_dict['speed_estimate']
+        if speed_estimate[0] == 0:
+            return self.shared_dict['crossed_48kph_threshold']
+        
+        speed, acceleration = speed_estimator.Speed_Estimator.predict(speed_estimate,time.monotonic())
+        below_threshold = speed_estimator.Speed_Estimator.is_below(speed,self.SPEED_THRESHOLD,self.previously_below_threshold)
+        crossed = self.previously_below_threshold is not None and below_threshold != self.previously_below_threshold
+        self.previously_below_threshold = below_threshold
+        #"OBD's" own flag comes later, when the sample that confirms the crossing arrives, and must not make the buzzer sound a second time.
+        if self.shared_dict['crossed_48kph_threshold']:
+            self.shared_dict['crossed_48kph_threshold'] = False
+        return crossed
@@ -19,15 +19,29 @@ You should have received a copy of the GNU General Public License
 along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-import numpy as np
 import cv2
+import csv
+import os
+import time
+import concurrent.futures
+from interfaces import governor, trip_recorder, clip_recorder, speed_estimator, pipeline, metrics, memory
 
 """
 "camera" Module:
 
 Packages Imported:
- * numpy (as np),
- * cv2.
+ * cv2,
+ * csv,
+ * os,
+ * time,
+ * concurrent.futures,
+ * interfaces.governor,
+ * interfaces.trip_recorder,
+ * interfaces.clip_recorder,
+ * interfaces.speed_estimator,
+ * interfaces.pipeline,
+ * interfaces.metrics,
+ * interfaces.memory.
 
 Classes:
  * Camera -> An "interface" for LaDD's Pi Camera Module V2.
@@ -35,116 +49,113 @@ Classes:
 
 class Camera:
     """
+    "Camera" drives an interfaces.pipeline.Pipeline with the frames of the Pi Camera Module V2, and connects it to the rest of LaDD through "shared_dict." LaDD can have several cameras (e.g. one in each side mirror), listed in "cameras.csv," each with its own "Camera" process, pipeline, and calibration; the first, named "Camera," is the one whose debug views and frame rate are published, and the others are named "Camera-<label>." With more than one camera, their warning flags are combined by interfaces.fusion.Fusion.
+    
     Instance Variables:
-     * AVERAGE_LANE_WIDTH [int (constant)] -> The average width of a lane in the US in meters.
+     * SPEED_THRESHOLD [int (constant)] -> The speed in kph below which LaDD does not warn the driver (48 kph, about 30 mph).
+     * KEEP_WARM_FPS [float (constant)] -> The frame rate "begin" throttles down to while the vehicle is below "SPEED_THRESHOLD," which is just enough to keep the averages and buffers "warm."
+     * RAMP_UP_TIME [float (constant)] -> How many seconds ahead "update_duty_cycle" looks, using the acceleration in "shared_dict's" "speed_estimate," to return to the full frame rate before "SPEED_THRESHOLD" is actually crossed.
+     * CALIBRATION_FILE [str (constant)] -> The .csv file ("calibration.csv" for the first camera, "calibration-<name>.csv" for the others) that the vehicle-width calibration ("vehicle_pixel_width," "meter_per_pixel," "avrg_vehicle_width_x_coors," and "count_for_averaging") is saved to and loaded from.
+     * CALIBRATION_SAVE_INTERVAL [float (constant)] -> Every how many seconds "begin" saves the calibration to "CALIBRATION_FILE."
+     * CALIBRATION_HALF_LIFE [float (constant)] -> How many seconds it takes for a saved calibration to lose half of its weight ("count_for_averaging"); a calibration that has lost all but less than one frame's worth of weight is not loaded.
      * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
      * camera_res [list] -> The set resolution of the Pi Camera Module V2 in [width,height] (needs to be at least 320x80, as that is the size of "ROI").
-     * row_slice {and} col_slice [list] -> The "range" of rows and columns in the captured, unprocesseed frame that make up the Region of Interest frame.
-     * ROI [np.ndarray] -> The frame that is derived from "begin's" "frame" using "row_slice" and "col_slice."
+     * name [str] -> The name of the process, which its metrics, heartbeat, placement, and files are named after.
+     * device [int] -> The index of the camera that "begin" opens.
+     * primary [bool] -> Whether this is the first camera, named "Camera," which alone publishes the debug views, the performance mode, "lane_offsets_ahead," and "gated_frame_fraction"; the user interface can only follow one camera.
+     * first_row_for_warping [int] -> This camera's own "first_row_for_warping," for a camera mounted differently from the first; None to use "shared_dict's," which the user interface sets.
+     * detection_slot [interfaces.fusion.Detection_Slot] -> What every frame's warning flags are published through when there is more than one camera, instead of "shared_dict"; None to publish them in "shared_dict" directly.
+     * pipeline [interfaces.pipeline.Pipeline] -> Does all of the lane detection and makes the decisions; "Camera" only captures the frames, hands it its settings from "shared_dict," and publishes what it detects.
      * AlteredROI [np.ndarray] -> The version of "ROI" that "shared_dict's" "ROI_frame" is set to instead of "ROI" when "shared_dict's" "show_both_rows_for_warping" is True, it shows with red lines what rows of "ROI" are being used to warp "ROI" into "WarpedROI."
-     * WarpedROI [np.ndarray] -> The frame that is derived from a binary-thresholded "ROI" by using the "cv2.warpPerspective" method with "M" as an argument.
-     * CannyROI [np.ndarray] -> The frame that is derived from "WarpedROI" by using the "cv2,Canny" method.
-     * HoughROI [np.ndarray] -> The frame that is dervied from "CannyROI" by drawing the "Hough lines" found using the "cv2.HoughLinesP" method stored in "lines" onto "CannyROI."
-     * pts1 {and} pts2 [np.ndarray] -> Two sets of for coresponding points of "ROI" before (pts1) and after (pts2) sent into "cv2.getPerspectiveTransform," with its outcome saved in "M."
-     * M [np.ndarray] -> The result of running "cv2.getPerspectiveMapping" with "pts1" an "pts2" as arguments.
-     * kernel [np.ndarray] -> The "structuring argument" passed into "cv2.morphologyEx" that is used on "WarpedROI" to "open" the image.
-     * lines [np.ndarray] -> The lines found using "cv2.HoughLinesP" on "CannyROI."
-     * avrg_x_coor_of_lines [list] -> The averages of the x-coordinates of the endpoints of the lines in "lines," which are displayed as vertical lines on "HoughROI" in green.
-     * avrg_x_coor_of_lane_lines [list] -> Those average x-coordinates from "avrg_x_coor_of_lines" that form the "lane" on the road; if length equals 2, then both sides of a lane can be "seen"; if length equals 1, then one side of a lane can be "seen", and the vehicle is most likely crossing a lane; if length equals 0, then nothingis detected.
-     * avrg_x_coor_of_divider_lines [list] -> Those average x-ccordinates from "avrg_x_coor_of_lines" that form the "divider" on the road; if length equals 4, then the entire divider can be "seen," but if otherwise then not the entire divider, if any of it, can be "seen." 
-     * frames_taken [int] -> The number of frames taken since LaDD has been turned on; this is supposed to act as a buffer of sorts to prevent early, messy images from ruining averages and other calculated instance variables vital to LaDD's accuracy. When this variable equals 30, it is not incremented anymore and is "forgotten."
-     * buffer_of_lane_frames [list] -> The "queue-like" list of the "avrg_x_coor_of_lane_lines" of frames, with index 0 being the newest "avrg_x_coor_lane_lines" value and the last one being removed when another value is added to the "front" of the list. This list is used to produce an "average" frame using multiple frames to determine where the vehicle is on the road in terms of its position in relation of "lane lines."
-     * buffer_of_divider_frames [list] -> Like "buffer_of_lane_frames," except it stores the "avrg_x_coors_of_divider_lines" of frames. This list is used to produce an "average" frame using multiple frames to determine where the vehicle is on the road in terms of its position in relation of "divider lines."
-     * state [str] -> The "state" of the vehicle ("in_lane," "out_lane," "no_lane," "over_divider") of the vehicle, determined on a frame-by-frame basis.
-     * previous_state [str] -> The previous "state" of the vehicle determined from the last frame before the current one.
-     * lane_frames_to_avrg [list] -> Assigned to and used in the "calculate_lane_avrg" and "calculate_lane_line_avrg" methods, depending on what is "available" in "buffer_of_lane_frames," they are the values in the "buffer_of_lane_frames" to average that result in the average x-coordinates of "lane lines" that are used in determining the "state" and are displayed on the "HoughROI" in blue.
-     * divider_frames_to_avrg [list] -> Assigned to and used in "calculate_divider_avrg," they are the values in the "buffer_of_divider_frames" to average that result in the average x-coordinates of "divider lines" that are used in determining the "state" and are displayed on the "HoughROI" in orange.
-     * avrg_lane_x1 {and} avrg_lane_x2 [int] -> Represent the x-coordinates averaged from "lane_frames_to_avrg"; if both do not equal None, then LaDD has "seen" a complete lane, and "avrg_lane_x1" and "avrg_lane_x2" are the left and right lines of that lane, respectively; if only "avrg_lane_x2" equals None, then LaDD thinks it has seen one line of a lane and "avrg_lane_x1" is that value; if both equal None, then LaDD has detected nothing..
-     * avrg_divider_x1 {through} avrg_divider_x4 [int] -> Represent the x-coordinatesa avereage from "divider_frames_to_avrg"; if all do not equal None, then LaDD has seen a complete divider, and "avrg_lane_x1-4" are the first, second, third, and fourth lines of the divider from left to right; if all equal None, then LaDD has detected nothing.
-     * meter_per_pixel [float] -> The meters-per-pixel calculated with "AVERAGE_LANE_WIDTH" and "avrg_lane_x1/2" (when the latter do not equal None) that used to find "vehicle_pixel_width."
-     * vehicle_pixel_width [float] -> The width in pixels of the vehicle in "HoughROI."
-     * vehicle_width_x_coors [list] -> The x-coordinates of the sides of the vehicle on a frame-by-frame basis.
-     * count_for_averaging [int] -> The count to conduct a running average on "avrg_vehicle_width_x_coors" using each average frames' "vehicle_width_x_coors." When it equals to 1000, it is set to 1 for two reasons: one, if LaDD is run for a long time, without setting it to a small number, it would eventually grow in size and take up a vast amount of precious memory; two, by "reseting" to a degree the running average, it can allow for a recalculation of the "avrg_vehicle_width_x_coors" that could make its values more accurate.
-     * avrg_vehicle_width_x_coors [list] -> The average x-coordinates of the sides of the vehicle.
+     * frame_number [int] -> The number of frames captured since "begin" was called, published as "shared_dict's" "frame_number" after every frame whose debug views are published so that the user interface can tell whether there is a new frame to display.
+     * last_calibration_save_time [float] -> When the calibration was last saved to "CALIBRATION_FILE," as given by "time.monotonic."
+     * speed [float] -> The speed of the vehicle in kph, as predicted for the current frame from "shared_dict's" "speed_estimate" by "update_duty_cycle."
+     * acceleration [float] -> The acceleration of the vehicle in kph per second, from "shared_dict's" "speed_estimate."
+     * below_speed_threshold [bool] -> Whether "speed" is below "SPEED_THRESHOLD," with the same band under it as "Audio" and "OBD" so that they agree, in which case no decisions are made; unlike "shared_dict's" "below_48kph," which only changes when a new OBD sample arrives, it changes on the first frame after the threshold is predicted to have been crossed; None before the first frame.
+     * trip_recorder [interfaces.trip_recorder.Trip_Recorder] -> Records the results of every frame to a trip file in the background; created by "begin," as its writer thread cannot be handed to another process.
+     * clip_recorder [interfaces.clip_recorder.Clip_Recorder] -> Keeps the last seconds of "ROI" in memory and saves them, together with the seconds after, as a clip whenever the "state" becomes "out_lane" or "over_divider"; created by "begin," like "trip_recorder."
+     * duty_cycle [str] -> Either "full," when every frame is captured and processed, or "keep_warm," when "begin" throttles down to "KEEP_WARM_FPS."
+     * notifier [interfaces.notifier.Notifier] -> Wakes up the user interface when the warning flags change or a new frame is published; None when nothing is listening (such as when "Camera" is tested on its own).
+     * warning_flags [tuple] -> The values of "shared_dict's" "crossed_divider," "crossed_lane," and "nothing_detected" last published by "publish_warning_flags."
+     * debug_views_enabled [bool] -> Whether the debug views are published at all, read once from "shared_dict's" "debug_views_enabled" by "begin"; it is False when LaDD is run headless without a debug stream, so that no frames are sent to "shared_dict" for nobody to see.
+     * lane_offsets_ahead [dict] -> The "offset" of every band in "pipeline's" "lookahead_bands," by name, as last published in "shared_dict's" "lane_offsets_ahead."
+     * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Wakes up "begin" from throttling down to "KEEP_WARM_FPS" as soon as shutdown is requested; None to sleep with "time.sleep."
+     * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten once per frame, so that "Supervisor" can tell if this process has hung; None when nothing is supervising it.
+     * metrics [interfaces.metrics.Metrics] -> The frame rate, the frames dropped by the camera and skipped by "pipeline's" gate, and how long capturing, processing, and publishing each frame take.
+     * memory_settings [dict] -> The "MODE_SETTINGS" of the memory mode in "shared_dict's" "memory_mode," set by interfaces.memory.Memory_Budget in LaDD's main.py, which decide how many times smaller "full_frame" is published and how many seconds "clip_recorder" keeps; read every 30 frames by "update_memory_mode."
+     * allocation_tracker [interfaces.memory.Allocation_Tracker] -> Writes the lines of code holding the most memory every 30 seconds, when LaDD is run with "--tracemalloc."
+     * frame_rate_governor [interfaces.governor.Governor] -> Measures how long each frame takes to process and decides how often the debug views ("full_frame," "ROI_frame," "warped_ROI_frame," and "processed_ROI_frame") are published to "shared_dict" and whether "pipeline" "opens" "WarpedROI."
     
     Methods:
      * __init__ -> Initiates the class, and prepares LaDD for the footage it will take.
-     * calculate_avrg_vehicle_width_x_coors -> Calculates the vehicle's sides' average x-coordinates via a running average.
-     * calculate_lane_line_avrg -> Called by "calculate_lane_avrg" if the two sides of a lane had not be detected, it atempts to average all lists with a length of 1 in "buffer_of_lane_frames," which are considered to be one side of a lane, else both "avrg_lane_x1/2" are set to None.
-     * calculate_lane_avrg -> Attempts to average all of the lists with a length of 2 in "buffer_of_lane_frames," which are considered to be the two sides of a lane, else calls "calculate_lane_line_avrg."
-     * calculate_divider_avrg -> Attempts to average all of the lists with a length of 4 in "buffer_of_divider_frames," which are considered to be the four lines of an entire divider, else "avrg_divider_x1-4" are set to None.
-     * begin -> Runs the main camera loop that captures footage, processes it, and makes the decisions off of it of whether to warn the user and if so what for ("in_lane","out_lane","over_divider","no_lane").
+     * save_calibration -> Saves the vehicle-width calibration to "CALIBRATION_FILE," together with what it depends on ("vehicle_width" and "first_row_for_warping") and when it was saved.
+     * load_calibration -> Loads the vehicle-width calibration saved in "CALIBRATION_FILE," lowering its weight by how old it is, so that decisions can be made from the first frame with lines in it instead of after 30 frames.
+     * update_duty_cycle -> Predicts "speed" for the current frame, then sets "duty_cycle" to "keep_warm" while the vehicle is below "SPEED_THRESHOLD" and is not expected to reach it within "RAMP_UP_TIME," and to "full" otherwise.
+     * get_first_row_for_warping -> Returns "first_row_for_warping," or "shared_dict's" if there is none.
+     * update_pipeline_settings -> Hands "pipeline" the settings it is to process the current frame with, from "shared_dict," "frame_rate_governor," and "below_speed_threshold."
+     * update_memory_mode -> Reads "shared_dict's" "memory_mode" into "memory_settings" and resizes "clip_recorder" accordingly.
+     * publish_warning_flags -> Sets "shared_dict's" "crossed_divider," "crossed_lane," and "nothing_detected," but only when they have changed, in which case the user interface is notified through "notifier."
+     * begin -> Runs the main camera loop that captures footage, processes it, and makes the decisions off of it of whether to warn the user and if so what for ("in_lane","out_lane","over_divider","no_lane"), always releasing the camera and flushing the recorders once it ends.
      * test_camera_connection [static] -> Tests whether or not a connection to a Pi Camera Module V2 can be established.
+     * load_cameras [static] -> Reads the cameras in "cameras.csv," creating it with the one camera LaDD has by default if it does not exist.
     """
     
-    def __init__(self, shared_dict, camera_res):
+    def __init__(self, shared_dict, camera_res, notifier=None, lookahead_bands=None, shutdown_coordinator=None, heartbeat=None, name='Camera', device=0, first_row_for_warping=None, detection_slot=None):
         """
         Initiates the class, and prepares LaDD for the footage it will take.
         
         Arguments:
          * shared_dict [multiprocessing.Manager.dict()] ->
          * camera_res [list] ->
+         * notifier [interfaces.notifier.Notifier] -> Wakes up the user interface when what it displays has changed (optional).
+         * lookahead_bands [list] -> The (name, row offset, first row for warping) of every band to look through besides "ROI"; None for "pipeline's" "LOOKAHEAD_BANDS," or an empty list for none.
+         * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Wakes up "begin" as soon as shutdown is requested (optional).
+         * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten once per frame (optional).
+         * name [str] -> The name of the process; "Camera" for the first camera, "Camera-<label>" for the others.
+         * device [int] -> The index of the camera to open.
+         * first_row_for_warping [int] -> This camera's own "first_row_for_warping" (optional).
+         * detection_slot [interfaces.fusion.Detection_Slot] -> What the warning flags are published through instead of "shared_dict" (optional).
         """
         
-        self.AVERAGE_LANE_WIDTH = 3
-        #3.048 is exactly 10 feet.
+        self.name = name
+        self.device = device
+        self.primary = self.name == 'Camera'
+        self.first_row_for_warping = first_row_for_warping
+        self.detection_slot = detection_slot
+        self.SPEED_THRESHOLD = 48
+        self.KEEP_WARM_FPS = 5.0
+        self.RAMP_UP_TIME = 3.0
+        self.CALIBRATION_FILE = 'calibration.csv' if self.primary else 'calibration-' + self.name + '.csv'
+        self.CALIBRATION_SAVE_INTERVAL = 30.0
+        self.CALIBRATION_HALF_LIFE = 604800.0
+        #604800 seconds is one week.
         
         self.shared_dict = shared_dict
         self.camera_res = camera_res
+        self.pipeline = pipeline.Pipeline(self.camera_res,lookahead_bands=lookahead_bands)
         
-        self.row_slice = [(self.camera_res[1]/2)-30,(self.camera_res[1]/2)+30]
-        self.col_slice = [(self.camera_res[0]/2)-160,(self.camera_res[0]/2)+160]
-        
-        self.ROI = []
-        #ROI = Region Of Interest.
         self.AlteredROI = []
-        #AlteredROI = A copy of "ROI" used to display with red lines what rows of "ROI" are being used to warp "ROI" into "WarpedROI," but "AlteredROI" itself is not used to create "WarpedROI."
-        self.WarpedROI = []
-        #WarpedROI = Perspective Transformation applied on binary-thresholded "ROI."
-        self.CannyROI = []
-        #CannyROI = Canny Edge Detection applied on "WarpedROI."
-        self.HoughROI = []
-        #HoughROI = Probabilistic Hough Lines Transformation applied to "CannyROI," and lines returned as a result are drawn on "HoughROI."
-        
-        self.pts1 = []
-        #pts1 = (column,row) coordinates of the unwarped "ROI"
-        self.pts2 = np.float32([[0,0],[320,0],[0,60],[320,60]])
-        #pts2 = (column,row) coordinates of where pts1 are to be in the newly warped "WarpedROI."
-        self.M = 0
-        #M = result of cv2.getPerspectiveTransform for warping "ROI."
-        self.kernel = np.ones((5,5),np.uint8)
-        #kernel used in "opening" "WarpedROI."
-        
-        self.lines = 0
-        #Lines return from Probabilistic Hough Transformation.
-        
-        self.avrg_x_coor_of_lines = []
-        self.avrg_x_coors_of_lane_lines = []
-        self.avrg_x_coors_of_divider_lines = []
-        
-        self.frames_taken = 0
-        self.buffer_of_lane_frames = [[],[],[],[]]
-        self.buffer_of_divider_frames = [[],[],[],[]]
-        
-        self.state = None
-        #state = the "state" ('in_lane','out_lane," "no_lane," over_divider," "undetermined") of the vehicle. "undetermined" is a temporary state which is shortly replaced by either "in_lane," "out_lane," or "no_lane."
-        self.previous_state = None
-        self.lane_frames_to_avrg = []
-        self.divider_frames_to_avrg = []
-        
-        self.avrg_lane_x1 = 0
-        self.avrg_lane_x2 = 0
-        self.avrg_divider_x1 = 0
-        self.avrg_divider_x2 = 0
-        self.avrg_divider_x3 = 0
-        self.avrg_divider_x4 = 0
-        
-        self.meter_per_pixel = 0
-        self.vehicle_pixel_width = 0
-        
-        self.vehicle_width_x_coors = [0,0]
-        self.count_for_averaging = 0
-        self.avrg_vehicle_width_x_coors = []
+        #AlteredROI = A copy of "pipeline's" "ROI" used to display with red lines what rows of "ROI" are being used to warp "ROI" into "WarpedROI," but "AlteredROI" itself is not used to create "WarpedROI."
+        
+        self.frame_number = 0
+        self.last_calibration_save_time = 0.0
+        
+        self.speed = 0.0
+        self.acceleration = 0.0
+        self.below_speed_threshold = None
+        self.trip_recorder = None
+        self.clip_recorder = None
+        self.duty_cycle = 'full'
+        self.notifier = notifier
+        self.warning_flags = None
+        self.debug_views_enabled = True
+        self.lane_offsets_ahead = {}
+        self.shutdown_coordinator = shutdown_coordinator
+        self.frame_rate_governor = governor.Governor(self.shared_dict,publish=self.primary)
+        self.heartbeat = heartbeat
+        self.metrics = metrics.Metrics(self.shared_dict,self.name)
+        self.memory_settings = memory.Memory_Budget.MODE_SETTINGS['full']
+        self.allocation_tracker = memory.Allocation_Tracker(self.name)
     
     
     #The below two methods are for testing purposes only, not for actual use in LaDD.
@@ -193,294 +204,326 @@ class Camera:
         cv2.destroyAllWindows()
     '''
     
-    def calculate_avrg_vehicle_width_x_coors(self):
+    def save_calibration(self):
         """
-        Calculates the vehicle's sides' average x-coordinates via a running average.
+        Saves the vehicle-width calibration to "CALIBRATION_FILE," together with what it depends on ("vehicle_width" and "first_row_for_warping") and when it was saved.
         
-        Internal Functions:
-         * calculate_running_avrg -> Calculates the running average.
+        The calibration is written to a temporary file that then replaces "CALIBRATION_FILE," so that a power loss while saving cannot leave a half-written calibration behind.
         """
         
-        def calculate_running_avrg(newValue, oldValue):
-            """
-            Calculates the running average.
-            
-            Arguments:
-             * newValue [float] -> The new value to be added to the running average.
-             * oldValue [int] -> The previous value of the running average needed to continue the running average.
-            """
-            
-            return int(oldValue + ((newValue - oldValue)/self.count_for_averaging))
+        if len(self.pipeline.avrg_vehicle_width_x_coors) == 2 and self.pipeline.count_for_averaging > 0:
+            with open(self.CALIBRATION_FILE + '.tmp', 'w', newline='') as calibration:
+                writer = csv.writer(calibration)
+                writer.writerow(['vehicle_pixel_width',self.pipeline.vehicle_pixel_width])
+                writer.writerow(['meter_per_pixel',self.pipeline.meter_per_pixel])
+                writer.writerow(['avrg_vehicle_width_x1',self.pipeline.avrg_vehicle_width_x_coors[0]])
+                writer.writerow(['avrg_vehicle_width_x2',self.pipeline.avrg_vehicle_width_x_coors[1]])
+                writer.writerow(['count_for_averaging',self.pipeline.count_for_averaging])
+                writer.writerow(['vehicle_width',self.shared_dict['vehicle_width']])
+                writer.writerow(['first_row_for_warping',self.get_first_row_for_warping()])
+                writer.writerow(['saved_at',time.time()])
+            os.replace(self.CALIBRATION_FILE + '.tmp',self.CALIBRATION_FILE)
+        self.last_calibration_save_time = time.monotonic()
+    
+    def load_calibration(self):
+        """
+        Loads the vehicle-width calibration saved in "CALIBRATION_FILE," lowering its weight by how old it is, so that decisions can be made from the first frame with lines in it instead of after 30 frames.
         
-        self.vehicle_width_x_coors = [(((self.HoughROI.shape[1]/2)-1)-(self.vehicle_pixel_width/2)),(((self.HoughROI.shape[1]/2)-1)+(self.vehicle_pixel_width/2))]
-        if self.count_for_averaging == 0:
-            self.avrg_vehicle_width_x_coors = [int(self.vehicle_width_x_coors[0]),int(self.vehicle_width_x_coors[1])]
-        else:
-            self.avrg_vehicle_width_x_coors = [calculate_running_avrg(self.vehicle_width_x_coors[0] ,self.avrg_vehicle_width_x_coors[0]), calculate_running_avrg(self.vehicle_width_x_coors[1] ,self.avrg_vehicle_width_x_coors[1])]
+        The calibration is not loaded if it is missing or unreadable, if "vehicle_width" or "first_row_for_warping" have changed since it was saved (either one changes how wide the vehicle is in "WarpedROI"), or if it is so old that it has lost all but less than one frame's worth of weight.
         
-        self.count_for_averaging+=1
+        Return Arguments:
+         * loaded [bool] -> Whether the calibration was loaded.
+        """
+        
+        try:
+            with open(self.CALIBRATION_FILE, 'r') as calibration:
+                calibration_vars = {row[0]:float(row[1]) for row in csv.reader(calibration) if len(row) == 2}
+            x_coors = [int(calibration_vars['avrg_vehicle_width_x1']),int(calibration_vars['avrg_vehicle_width_x2'])]
+            vehicle_pixel_width = calibration_vars['vehicle_pixel_width']
+            meter_per_pixel = calibration_vars['meter_per_pixel']
+            count = calibration_vars['count_for_averaging']
+            vehicle_width = calibration_vars['vehicle_width']
+            first_row_for_warping = calibration_vars['first_row_for_warping']
+            age = max(0.0,time.time() - calibration_vars['saved_at'])
+        except (OSError, ValueError, KeyError):
+            return False
+        
+        if abs(vehicle_width - float(self.shared_dict['vehicle_width'])) > 1e-6 or int(first_row_for_warping) != int(self.get_first_row_for_warping()):
+            return False
+        count *= 0.5**(age/self.CALIBRATION_HALF_LIFE)
+        #An older calibration has a lower "count_for_averaging," so the running average moves away from it faster.
+        if count < 1 or x_coors[1] <= x_coors[0]:
+            return False
         
-        if self.count_for_averaging >= 1000:
-            self.count_for_averaging = 1
+        self.pipeline.avrg_vehicle_width_x_coors = x_coors
+        self.pipeline.vehicle_width_x_coors = list(x_coors)
+        self.pipeline.vehicle_pixel_width = vehicle_pixel_width
+        self.pipeline.meter_per_pixel = meter_per_pixel
+        self.pipeline.count_for_averaging = int(round(count))
+        self.pipeline.frames_taken = 30
+        return True
     
-    def calculate_lane_line_avrg(self):
+    def update_duty_cycle(self):
         """
-        Called by "calculate_lane_avrg" if the two sides of a lane had not be detected, it atempts to average all lists with a length of 1 in "buffer_of_lane_frames," which are considered to be one side of a lane, else both "avrg_lane_x1/2" are set to None.
+        Predicts "speed" for the current frame, then sets "duty_cycle" to "keep_warm" while the vehicle is below "SPEED_THRESHOLD" and is not expected to reach it within "RAMP_UP_TIME," and to "full" otherwise.
         """
         
-        self.lane_frames_to_avrg = [x[0] for x in self.buffer_of_lane_frames if len(x) == 1]
-        if len(self.lane_frames_to_avrg) >0:
-            for x in self.lane_frames_to_avrg:
-                self.avrg_lane_x1 += x
-            self.avrg_lane_x1 = int(self.avrg_lane_x1/len(self.lane_frames_to_avrg))
+        speed_estimate = self.shared_dict['speed_estimate']
+        now = time.monotonic()
+        self.speed, self.acceleration = speed_estimator.Speed_Estimator.predict(speed_estimate,now)
+        if speed_estimate[0] > 0:
+            self.below_speed_threshold = speed_estimator.Speed_Estimator.is_below(self.speed,self.SPEED_THRESHOLD,self.below_speed_threshold)
+            time_to_threshold = speed_estimator.Speed_Estimator.time_to_reach(speed_estimate,now,self.SPEED_THRESHOLD)
         else:
-            self.avrg_lane_x1 = None
-        self.avrg_lane_x2 = None
+            #No speed has been sampled yet (e.g. when "Camera" is being tested without "OBD"), so "shared_dict's" "below_48kph" is all there is to go by.
+            self.below_speed_threshold = self.shared_dict['below_48kph']
+            time_to_threshold = None
+        if self.below_speed_threshold and (time_to_threshold is None or time_to_threshold > self.RAMP_UP_TIME):
+            self.duty_cycle = 'keep_warm'
+        else:
+            self.duty_cycle = 'full'
     
-    def calculate_lane_avrg(self):
+    def get_first_row_for_warping(self):
         """
-        Attempts to average all of the lists with a length of 2 in "buffer_of_lane_frames," which are considered to be the two sides of a lane, else calls "calculate_lane_line_avrg."
+        Returns "first_row_for_warping," or "shared_dict's" if there is none.
+        
+        Return Arguments:
+         * first_row_for_warping [int] -> The "lower" row of "ROI" used to warp it into "WarpedROI."
         """
         
-        self.avrg_lane_x1 = self.avrg_lane_x2 = 0
-        self.lane_frames_to_avrg = [x for x in self.buffer_of_lane_frames if len(x) == 2]
-        if len(self.lane_frames_to_avrg) > 0:
-            for x in self.lane_frames_to_avrg:
-                self.avrg_lane_x1 += x[0]
-                self.avrg_lane_x2 += x[1]
-            self.avrg_lane_x1 = int(self.avrg_lane_x1/len(self.lane_frames_to_avrg))
-            self.avrg_lane_x2 = int(self.avrg_lane_x2/len(self.lane_frames_to_avrg))
-            
-            self.meter_per_pixel = self.AVERAGE_LANE_WIDTH/(self.avrg_lane_x2 - self.avrg_lane_x1)
-            self.vehicle_pixel_width = (1.0/self.meter_per_pixel) * self.shared_dict['vehicle_width']
-            self.calculate_avrg_vehicle_width_x_coors()
-        else:
-            self.calculate_lane_line_avrg()
+        return self.first_row_for_warping if self.first_row_for_warping is not None else self.shared_dict['first_row_for_warping']
     
-    def calculate_divider_avrg(self):
+    def update_pipeline_settings(self):
         """
-        Attempts to average all of the lists with a length of 4 in "buffer_of_divider_frames," which are considered to be the four lines of an entire divider, else "avrg_divider_x1-4" are set to None.
+        Hands "pipeline" the settings it is to process the current frame with, from "shared_dict," "frame_rate_governor," and "below_speed_threshold"; each is read from "shared_dict" once per frame, however often "pipeline" uses it.
         """
         
-        self.avrg_divider_x1 = self.avrg_divider_x2 = self.avrg_divider_x3 = self.avrg_divider_x4 = 0
-        self.divider_frames_to_avrg = [x for x in self.buffer_of_divider_frames if len(x) == 4]
-        if len(self.divider_frames_to_avrg) > 0:
-            for x in self.divider_frames_to_avrg:
-                self.avrg_divider_x1 += x[0]
-                self.avrg_divider_x2 += x[1]
-                self.avrg_divider_x3 += x[2]
-                self.avrg_divider_x4 += x[3]
-            self.avrg_divider_x1 = int(self.avrg_divider_x1/len(self.divider_frames_to_avrg))
-            self.avrg_divider_x2 = int(self.avrg_divider_x2/len(self.divider_frames_to_avrg))
-            self.avrg_divider_x3 = int(self.avrg_divider_x3/len(self.divider_frames_to_avrg))
-            self.avrg_divider_x4 = int(self.avrg_divider_x4/len(self.divider_frames_to_avrg))
-        else:
-            self.avrg_divider_x1 = self.avrg_divider_x2 = self.avrg_divider_x3 = self.avrg_divider_x4 = None
+        self.pipeline.binary_threshold = self.shared_dict['binary_threshold_value_lower_end']
+        self.pipeline.first_row_for_warping = self.get_first_row_for_warping()
+        self.pipeline.vehicle_width = self.shared_dict['vehicle_width']
+        self.pipeline.detection_engine = self.shared_dict['detection_engine']
+        self.pipeline.morphology = self.frame_rate_governor.settings['morphology']
+        self.pipeline.decisions_enabled = not self.below_speed_threshold
+    
+    def update_memory_mode(self):
+        """
+        Reads "shared_dict's" "memory_mode" into "memory_settings" and resizes "clip_recorder" accordingly; without a "memory_mode" (such as when "Camera" is tested on its own), the "full" settings are kept.
+        """
+        
+        memory_settings = memory.Memory_Budget.MODE_SETTINGS[self.shared_dict.get('memory_mode','full')]
+        if memory_settings != self.memory_settings:
+            self.memory_settings = memory_settings
+            self.clip_recorder.resize(self.memory_settings['clip_seconds'])
+    
+    def publish_warning_flags(self, crossed_divider, crossed_lane, nothing_detected):
+        """
+        Sets "shared_dict's" "crossed_divider," "crossed_lane," and "nothing_detected," but only when they have changed, in which case the user interface is notified through "notifier"; with a "detection_slot," they are only kept in "warning_flags" for "begin" to publish through it.
+        
+        Arguments:
+         * crossed_divider [bool] -> The new value of "shared_dict's" "crossed_divider."
+         * crossed_lane [bool] -> The new value of "shared_dict's" "crossed_lane."
+         * nothing_detected [bool] -> The new value of "shared_dict's" "nothing_detected."
+        """
+        
+        if (crossed_divider,crossed_lane,nothing_detected) != self.warning_flags:
+            self.warning_flags = (crossed_divider,crossed_lane,nothing_detected)
+            if self.detection_slot is not None:
+                return
+            self.shared_dict['crossed_divider'] = crossed_divider
+            self.shared_dict['crossed_lane'] = crossed_lane
+            self.shared_dict['nothing_detected'] = nothing_detected
+            if self.notifier is not None:
+                self.notifier.notify(self.notifier.STATE)
     
     def begin(self):
         """
-        Runs the main camera loop that captures footage, processes it, and makes the decisions off of it of whether to warn the user and if so what for ("in_lane","out_lane","over_divider","no_lane").
+        Runs the main camera loop that captures footage, processes it, and makes the decisions off of it of whether to warn the user and if so what for ("in_lane","out_lane","over_divider","no_lane"), always releasing the camera and flushing the recorders once it ends, even if the process is terminated.
         """
         
-        cap = cv2.VideoCapture(0)
+        cap = cv2.VideoCapture(self.device)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE,1)
+        self.trip_recorder = trip_recorder.Trip_Recorder('trips' if self.primary else os.path.join('trips',self.name))
+        self.clip_recorder = clip_recorder.Clip_Recorder('clips' if self.primary else os.path.join('clips',self.name),pre_event_seconds=self.memory_settings['clip_seconds'])
+        #The other cameras keep their trips and clips apart, as they would otherwise be given the same file names.
+        self.update_memory_mode()
+        self.load_calibration()
+        self.debug_views_enabled = self.shared_dict['debug_views_enabled'] and self.primary
+        if len(self.pipeline.lookahead_bands) > 0:
+            self.pipeline.band_executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(self.pipeline.lookahead_bands))
+        self.last_calibration_save_time = time.monotonic()
+        #Keeping only one frame buffered means that the frame read after throttling down to "KEEP_WARM_FPS" is a fresh one.
         #If you want to pull frames from an actual camera feed, pass 0 as an argument in the above "cv2.VideoCapture" object constructor. Ex: cv2.VideoCapture(0)
         #If you want to use the provided test footage in the "test_footage" directory, pass the string "test_footage/" plus the file name of the test footage. Ex: cv2.VideoCapture("test_footage/WTSB_West-video2.avi")
         #Note: "WTSB_East-video3.avi" is very glitchy, as well as "WTSB_West-video1.avi."
         
-        while not self.shared_dict['turn_off_LaDD'] and cap.isOpened():
-            ret, frame = cap.read()
-            if ret:
-                #Find the region of interest (ROI).
-                self.shared_dict['full_frame'] = cv2.cvtColor(frame,cv2.COLOR_BGR2RGB)
-                #cv2.imshow("Full Frame", frame)
-                self.ROI = frame[int(self.row_slice[0]):int(self.row_slice[1]),int(self.col_slice[0]):int(self.col_slice[1])]
-                if self.shared_dict['show_both_rows_for_warping']:
-                    self.AlteredROI = self.ROI.copy()
-                    cv2.line(self.AlteredROI,(0,self.shared_dict['first_row_for_warping']),(320,self.shared_dict['first_row_for_warping']),(0,0,255),2)
-                    cv2.line(self.AlteredROI,(0,self.shared_dict['first_row_for_warping']+1),(320,self.shared_dict['first_row_for_warping']+1),(0,0,255),2)
-                    self.shared_dict['ROI_frame'] = cv2.cvtColor(self.AlteredROI,cv2.COLOR_BGR2RGB)
-                else:
-                    self.shared_dict['ROI_frame'] = cv2.cvtColor(self.ROI,cv2.COLOR_BGR2RGB)
-                #cv2.imshow('Color ROI',self.ROI)
-                
-                self.ROI = cv2.cvtColor(self.ROI,cv2.COLOR_BGR2GRAY)
-                #cv2.imshow('Grey ROI',self.ROI)
-        
-                #Apply a binary threshold on the ROI.
-                ret,self.ROI = cv2.threshold(self.ROI,self.shared_dict['binary_threshold_value_lower_end'],255,cv2.THRESH_BINARY)
-                #cv2.imshow('Thresholded ROI',self.ROI)
-                
-                #Then, warp the ROI to a top-down view.
-                self.pts1 = np.float32([[0,self.shared_dict['first_row_for_warping']],[320,self.shared_dict['first_row_for_warping']],[0,self.shared_dict['first_row_for_warping']+1],[320,self.shared_dict['first_row_for_warping']+1]])
-                self.M = cv2.getPerspectiveTransform(self.pts1,self.pts2)
-                self.WarpedROI = cv2.warpPerspective(self.ROI,self.M,(320,60))
-                self.WarpedROI = cv2.morphologyEx(self.WarpedROI,cv2.MORPH_OPEN,self.kernel)
-                self.shared_dict['warped_ROI_frame'] = cv2.cvtColor(self.WarpedROI, cv2.COLOR_GRAY2RGB)
-                #cv2.imshow('WarpedROI',self.WarpedROI)
-                
-                #Then, apply Canny Edge Detection then Probabilistic Hough Transformation to find the endpoints of "lines" in the ROI, which are supposed to be the edges of the lines on a road.
-                self.CannyROI = cv2.Canny(self.WarpedROI,200,225)
-                #cv2.imshow('Canny ROI',self.CannyROI)
-                self.lines = cv2.HoughLinesP(self.CannyROI,1.0,np.pi/180,30,minLineLength=30,maxLineGap=20)
-                self.HoughROI = cv2.cvtColor(self.CannyROI,cv2.COLOR_GRAY2BGR)
-                
-                if self.lines is not None:
-                    if len(self.lines) <= 8:
-                        for coor in self.lines:
-                            for x1,y1,x2,y2 in coor:
-                                self.avrg_x_coor_of_lines.append(((x2+x1)/2.0))
-                                cv2.line(self.HoughROI,(x1,y1),(x2,y2),(0,255,0),2)
-                        self.avrg_x_coor_of_lines.sort()
-                        
-                        if len(self.avrg_x_coor_of_lines) >= 2 and len(self.avrg_x_coor_of_lines) <= 10:
-                            if len(self.avrg_x_coor_of_lines) >=4:
-                                for x in range(len(self.avrg_x_coor_of_lines)-3):
-                                    difference_A = self.avrg_x_coor_of_lines[x+1] - self.avrg_x_coor_of_lines[x]
-                                    difference_B = self.avrg_x_coor_of_lines[x+2] - self.avrg_x_coor_of_lines[x+1]
-                                    difference_C = self.avrg_x_coor_of_lines[x+3] - self.avrg_x_coor_of_lines[x+2]
-                                    if (difference_A <= 12) and (difference_C <= 12) and (difference_B <= 16):
-                                        #Divider detected
-                                        self.avrg_x_coors_of_divider_lines = [self.avrg_x_coor_of_lines[x],self.avrg_x_coor_of_lines[x+1],self.avrg_x_coor_of_lines[x+2],self.avrg_x_coor_of_lines[x+3]]
-                                        break
-                                else:
-                                    self.avrg_x_coors_of_divider_lines = []
-                            else:
-                                self.avrg_x_coors_of_divider_lines = []
-                            for x in range(len(self.avrg_x_coor_of_lines)-1):
-                                difference = self.avrg_x_coor_of_lines[x+1] - self.avrg_x_coor_of_lines[x]
-                                if (difference >= 210) and (difference <= 240):
-                                    #Full-lane detected
-                                    self.avrg_x_coors_of_lane_lines = [self.avrg_x_coor_of_lines[x], self.avrg_x_coor_of_lines[x+1]]
-                                    break
-                            else:
-                                #Right-side of divider detected
-                                self.avrg_x_coors_of_lane_lines = [self.avrg_x_coor_of_lines[-1]]
+        try:
+            last_read_time = None
+            while not self.shared_dict['turn_off_LaDD'] and cap.isOpened():
+                if self.heartbeat is not None:
+                    self.heartbeat.beat()
+                read_start_time = time.perf_counter()
+                ret, frame = cap.read()
+                if ret:
+                    frame_start_time = time.perf_counter()
+                    self.metrics.observe('capture_seconds',frame_start_time - read_start_time)
+                    if last_read_time is not None and self.duty_cycle == 'full':
+                        #With only one frame buffered, every frame interval missed while the last frame was processed is a frame dropped by the camera.
+                        self.metrics.increment('dropped_frames_total',max(0,round((frame_start_time - last_read_time)*self.frame_rate_governor.target_fps) - 1))
+                    last_read_time = frame_start_time
+                    self.update_duty_cycle()
+                    #The debug views are only published every "debug_view_interval" frames, as set by "frame_rate_governor."
+                    publish_debug_views = self.debug_views_enabled and self.frame_number % self.frame_rate_governor.settings['debug_view_interval'] == 0
+                    
+                    if publish_debug_views:
+                        if self.memory_settings['full_frame_scale'] > 1:
+                            self.shared_dict['full_frame'] = cv2.cvtColor(cv2.resize(frame,None,fx=1.0/self.memory_settings['full_frame_scale'],fy=1.0/self.memory_settings['full_frame_scale'],interpolation=cv2.INTER_AREA),cv2.COLOR_BGR2RGB)
                         else:
-                            #Shoulder-line detected
-                            self.avrg_x_coors_of_lane_lines = [self.avrg_x_coor_of_lines[0]]
-                            self.avrg_x_coors_of_divider_lines = []
-                    else:
-                        #Nothing detected
-                        self.avrg_x_coors_of_lane_lines = []
-                        self.avrg_x_coors_of_divider_lines = []
+                            self.shared_dict['full_frame'] = cv2.cvtColor(frame,cv2.COLOR_BGR2RGB)
+                    #cv2.imshow("Full Frame", frame)
+                    
+                    #Then, find the x-coordinates of the "lines" in the ROI, which are supposed to be the edges of the lines on a road, and decide from them where the vehicle is.
+                    self.update_pipeline_settings()
+                    detection = self.pipeline.process(frame,frame_start_time)
+                    pipeline_end_time = time.perf_counter()
+                    self.metrics.observe('pipeline_seconds',pipeline_end_time - frame_start_time)
+                    self.metrics.increment('frames_' + detection.gate + '_total')
+                    
+                    self.clip_recorder.add_frame(self.pipeline.ROI)
+                    if publish_debug_views:
+                        if self.shared_dict['show_both_rows_for_warping']:
+                            self.AlteredROI = self.pipeline.ROI.copy()
+                            cv2.line(self.AlteredROI,(0,self.pipeline.first_row_for_warping),(320,self.pipeline.first_row_for_warping),(0,0,255),2)
+                            cv2.line(self.AlteredROI,(0,self.pipeline.first_row_for_warping+1),(320,self.pipeline.first_row_for_warping+1),(0,0,255),2)
+                            self.shared_dict['ROI_frame'] = cv2.cvtColor(self.AlteredROI,cv2.COLOR_BGR2RGB)
+                        else:
+                            self.shared_dict['ROI_frame'] = cv2.cvtColor(self.pipeline.ROI,cv2.COLOR_BGR2RGB)
+                        self.shared_dict['warped_ROI_frame'] = cv2.cvtColor(self.pipeline.WarpedROI, cv2.COLOR_GRAY2RGB)
+                        if detection.decided:
+                            self.shared_dict['processed_ROI_frame'] = cv2.cvtColor(self.pipeline.HoughROI,cv2.COLOR_BGR2RGB)
+                        elif detection.lines_found:
+                            self.shared_dict['processed_ROI_frame'] = []
+                    
+                    lane_offsets_ahead = {name:(round(offset,2) if offset is not None else None) for name, offset in detection.lane_offsets_ahead.items()}
+                    if lane_offsets_ahead != self.lane_offsets_ahead and self.primary:
+                        self.lane_offsets_ahead = lane_offsets_ahead
+                        self.shared_dict['lane_offsets_ahead'] = lane_offsets_ahead
                     
-                    self.buffer_of_lane_frames.insert(0,[])
-                    self.buffer_of_divider_frames.insert(0,[])
-                    self.buffer_of_lane_frames[0] = self.avrg_x_coors_of_lane_lines
-                    self.buffer_of_divider_frames[0] = self.avrg_x_coors_of_divider_lines
-                    self.buffer_of_lane_frames.pop(-1)
-                    self.buffer_of_divider_frames.pop(-1)
+                    if detection.warning_flags is not None:
+                        self.publish_warning_flags(*detection.warning_flags)
+                    if self.detection_slot is not None:
+                        self.detection_slot.publish(self.frame_number,detection.state,self.warning_flags)
+                    if detection.new_state and (detection.state == 'out_lane' or detection.state == 'over_divider'):
+                        self.clip_recorder.trigger(detection.state)
                     
-                    #if len([x for x in self.buffer_of_lane_frames if len(x) == 2]) > 2:
-                    self.calculate_lane_avrg()
-                    #if len([x for x in self.buffer_of_divider_frames if len(x) == 4]) > 2:
-                    self.calculate_divider_avrg()
+                    self.trip_recorder.record(self.frame_number,self.speed,detection.x_coors_of_lines,detection.lane,detection.divider,detection.vehicle,detection.state)
                     
-                    if self.frames_taken < 30:
-                        self.frames_taken+=1
+                    self.frame_number+=1
+                    if self.frame_number % 30 == 0:
+                        if self.primary:
+                            self.shared_dict['gated_frame_fraction'] = round(1.0 - self.pipeline.gate_counts['detected']/sum(self.pipeline.gate_counts.values()),3)
+                        self.update_memory_mode()
+                    if publish_debug_views:
+                        self.shared_dict['frame_number'] = self.frame_number
+                        if self.notifier is not None:
+                            self.notifier.notify(self.notifier.FRAME)
                     
-                    if self.frames_taken >= 30 and len(self.avrg_vehicle_width_x_coors)==2 and not self.shared_dict['below_48kph']:
-                        if self.state != 'over_divider':
-                            if self.avrg_divider_x4 is not None:
-                                if self.avrg_vehicle_width_x_coors[0] >= self.avrg_divider_x4:
-                                    self.state = 'undetermined'
-                                else:
-                                    self.state = 'over_divider'
-                            else:
-                                self.state = 'undetermined'
+                    if time.monotonic() - self.last_calibration_save_time >= self.CALIBRATION_SAVE_INTERVAL:
+                        self.save_calibration()
+                    frame_end_time = time.perf_counter()
+                    self.frame_rate_governor.record_frame(frame_end_time - frame_start_time)
+                    self.metrics.observe('publish_seconds',frame_end_time - pipeline_end_time)
+                    self.metrics.observe('frame_seconds',frame_end_time - frame_start_time)
+                    self.metrics.set_gauge('fps',self.frame_rate_governor.fps)
+                    self.metrics.maybe_flush()
+                    self.allocation_tracker.maybe_snapshot()
+                    
+                    if self.duty_cycle == 'keep_warm':
+                        #The decisions are skipped below "SPEED_THRESHOLD" anyway, so there is no reason to process frames any faster.
+                        keep_warm_delay = max(0.0,(1.0/self.KEEP_WARM_FPS) - (time.perf_counter() - frame_start_time))
+                        if self.shutdown_coordinator is not None:
+                            self.shutdown_coordinator.wait(keep_warm_delay)
                         else:
-                            if self.avrg_divider_x4 is not None:
-                                if self.avrg_vehicle_width_x_coors[0] < self.avrg_divider_x4:
-                                    self.state = 'over_divider'
-                                else:
-                                    self.state = 'undetermined'
-                            else:
-                                self.state = 'over_divider'
-                        
-                        if self.state == 'undetermined':
-                            if self.avrg_lane_x1 is not None and self.avrg_lane_x2 is not None:
-                                if ((self.avrg_vehicle_width_x_coors[0] > self.avrg_lane_x1) and (self.avrg_vehicle_width_x_coors[1] > self.avrg_lane_x2)) or ((self.avrg_vehicle_width_x_coors[0] < self.avrg_lane_x1) and (self.avrg_vehicle_width_x_coors[1] < self.avrg_lane_x2)):
-                                    self.state = 'out_lane'
-                                else:
-                                    self.state = 'in_lane'
-                            elif self.avrg_lane_x1 is not None and self.avrg_lane_x2 is None:
-                                if ((self.avrg_vehicle_width_x_coors[0] < self.avrg_lane_x1) and (self.avrg_vehicle_width_x_coors[1] > self.avrg_lane_x1)):
-                                    self.state = 'out_lane'
-                            elif self.avrg_lane_x1 is None and self.avrg_lane_x2 is None:
-                                self.state = 'no_lane'
-                        
-                        if self.state == self.previous_state:
-                            if self.state == 'in_lane':
-                                self.shared_dict['crossed_divider'] = False
-                                self.shared_dict['crossed_lane'] = False
-                                self.shared_dict['nothing_detected'] = False
-                            elif self.state == 'out_lane':
-                                self.shared_dict['crossed_divider'] = False
-                                self.shared_dict['crossed_lane'] = True
-                                self.shared_dict['nothing_detected'] = False
-                            elif self.state == 'over_divider':
-                                self.shared_dict['crossed_divider'] = True
-                                self.shared_dict['crossed_lane'] = False
-                                self.shared_dict['nothing_detected'] = False
-                            elif self.state == 'no_lane':
-                                self.shared_dict['crossed_divider'] = False
-                                self.shared_dict['crossed_lane'] = False
-                                self.shared_dict['nothing_detected'] = True
-                        
-                        if self.avrg_divider_x1 is not None:
-                            for l in [self.avrg_divider_x1, self.avrg_divider_x2, self.avrg_divider_x3, self.avrg_divider_x4]:
-                                cv2.line(self.HoughROI,(int(l),0),(int(l),60),(0,165,255),2)
-                                
-                        if self.avrg_lane_x1 is not None:
-                            cv2.line(self.HoughROI,(int(self.avrg_lane_x1),0),(int(self.avrg_lane_x1),60),(255,0,0),2)
-                        if self.avrg_lane_x2 is not None:
-                            cv2.line(self.HoughROI,(int(self.avrg_lane_x2),0),(int(self.avrg_lane_x2),60),(255,0,0),2)
-    
-                        if len(self.avrg_vehicle_width_x_coors) == 2:
-                            cv2.line(self.HoughROI,(int(self.avrg_vehicle_width_x_coors[0]),0),(int(self.avrg_vehicle_width_x_coors[0]),60),(0,0,255),2)
-                            cv2.line(self.HoughROI,(int(self.avrg_vehicle_width_x_coors[1]),0),(int(self.avrg_vehicle_width_x_coors[1]),60),(0,0,255),2)
-                        
-                        self.shared_dict['processed_ROI_frame'] = cv2.cvtColor(self.HoughROI,cv2.COLOR_BGR2RGB)
-                    else:
-                        self.state = 'no_lane'
-                        self.shared_dict['crossed_divider'] = False
-                        self.shared_dict['crossed_lane'] = False
-                        self.shared_dict['nothing_detected'] = False
-                        
-                        self.shared_dict['processed_ROI_frame'] = []
-                else:
-                    self.state = 'no_lane'
-                    self.shared_dict['crossed_divider'] = False
-                    self.shared_dict['crossed_lane'] = False
-                    self.shared_dict['nothing_detected'] = True
-                                
-                if self.previous_state is None or self.state != self.previous_state:
-                    self.previous_state = self.state
+                            time.sleep(keep_warm_delay)
                     
-                self.avrg_x_coor_of_lines=[]
-                
-                cv2.waitKey(1)
-                """
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    self.shared_dict['interfaces_on']['camera'] = False
+                    cv2.waitKey(1)
+                    """
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        self.shared_dict['interfaces_on']['camera'] = False
+                        break
+                    """
+                else:
                     break
-                """
-            else:
-                break
-        
-        cap.release()
-        cv2.destroyAllWindows()
+        finally:
+            cap.release()
+            cv2.destroyAllWindows()
+            self.save_calibration()
+            self.trip_recorder.close()
+            self.clip_recorder.close()
+            if self.pipeline.band_executor is not None:
+                self.pipeline.band_executor.shutdown()
+            self.metrics.flush()
     
     @staticmethod
-    def test_camera_connection():
+    def test_camera_connection(device=0):
         """
         Tests whether or not a connection to a Pi Camera Module V2 can be established.
         
+        Arguments:
+         * device [int] -> The index of the camera to test.
+        
         Return Arguments:
          * result [bool] -> Represents whether a camera connection has been successfully established.
         """
-        test_con = cv2.VideoCapture(0)
+        test_con = cv2.VideoCapture(device)
         result = test_con.isOpened()
         test_con.release()
         del test_con
         return result
+    
+    @staticmethod
+    def load_cameras(path='cameras.csv'):
+        """
+        Reads the cameras in a .csv file, creating it with the one camera LaDD has by default if it does not exist; rows that cannot be read are skipped and printed, and a camera named "Camera" is always included.
+        
+        The "lookahead_bands" column lists the bands a camera looks through besides "ROI," separated by spaces, each as "name:row offset:first row for warping" (e.g. "far:-60:30"); it is left empty for "pipeline's" "LOOKAHEAD_BANDS," or set to "none" for no bands.
+        
+        Arguments:
+         * path [str] -> The path of the .csv file.
+        
+        Return Arguments:
+         * cameras [list] -> The (name,device,camera_res,first_row_for_warping,lookahead_bands) of every camera, the one named "Camera" first; "first_row_for_warping" and "lookahead_bands" are None when they are left empty.
+        """
+        
+        if not os.path.isfile(path):
+            with open(path,'w',newline='') as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(['name','device','width','height','first_row_for_warping','lookahead_bands'])
+                writer.writerow(['Camera',0,640,480,'',''])
+        
+        cameras = []
+        with open(path,'r',newline='') as csv_file:
+            for row in csv.DictReader(csv_file):
+                try:
+                    name = row['name'].strip()
+                    if name != 'Camera' and not name.startswith('Camera-'):
+                        raise ValueError('"' + name + '" is not "Camera" or "Camera-<label>"')
+                    if name in [camera[0] for camera in cameras]:
+                        raise ValueError('"' + name + '" is listed twice')
+                    first_row_for_warping = int(row['first_row_for_warping']) if (row['first_row_for_warping'] or '').strip() else None
+                    lookahead_bands = (row.get('lookahead_bands') or '').strip()
+                    #A file written before the column existed has no "lookahead_bands" at all.
+                    if lookahead_bands == '':
+                        lookahead_bands = None
+                    elif lookahead_bands == 'none':
+                        lookahead_bands = []
+                    else:
+                        lookahead_bands = [(band_name,int(row_offset),int(first_row)) for band_name, row_offset, first_row in (band.split(':') for band in lookahead_bands.split())]
+                    cameras.append((name,int(row['device']),[int(row['width']),int(row['height'])],first_row_for_warping,lookahead_bands))
+                except (ValueError, TypeError, AttributeError) as error:
+                    print('Skipped a row of "' + path + '": ' + str(error) + '.')
+        
+        if 'Camera' not in [camera[0] for camera in cameras]:
+            print('"' + path + '" has no camera named "Camera," so device 0 is used for it.')
+            cameras.append(('Camera',0,[640,480],None,None))
+        cameras.sort(key=lambda camera: camera[0] != 'Camera')
+        return cameras
@@ -0,0 +1,204 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import cv2
+import collections
+import os
+import queue
+import threading
+import time
+
+"""
+"clip_recorder" Module:
+
+Packages Imported:
+ * cv2,
+ * collections,
+ * os,
+ * queue,
+ * threading,
+ * time.
+
+Classes:
+ * Clip_Recorder -> Keeps the last few seconds of frames in a ring buffer and, when "Camera" warns the driver, saves them together with the following few seconds as a compressed video clip, encoded by a background thread.
+"""
+
+class Clip_Recorder:
+    """
+    Instance Variables:
+     * directory [str] -> The directory the clips are saved in.
+     * nominal_fps [float] -> The highest frame rate expected, which only bounds how many frames "ring_buffer" and a clip may hold; the frames are kept by their times, so that at "Camera's" keep-warm rate "pre_event_seconds" is still that many seconds, and the clips are written at the frame rate actually measured.
+     * scale [float] -> How many times smaller than they were given the frames are stored (1.0 for "ROI," which is already small).
+     * pre_event_seconds [float] -> How many seconds of frames before a warning are kept in "ring_buffer."
+     * post_event_seconds [float] -> How many seconds of frames after a warning are added to a clip.
+     * ring_buffer [collections.deque] -> The (time,frame) pairs of the last "pre_event_seconds"; the pairs older than that are dropped when a new one is added.
+     * clip [list] -> The (time,frame) pairs of the clip being gathered; None when no clip is being gathered.
+     * clip_name [str] -> The file name of the clip being gathered.
+     * clip_end_time [float] -> The time, as given by "time.time," after which no more frames are added to "clip."
+     * frames_left [int] -> How many frames may still be added to "clip" at most, should the frame rate be higher than "nominal_fps."
+     * pending_clips [queue.Queue] -> The bounded queue of gathered clips waiting to be encoded by "encoder_thread"; a clip is dropped if it is full.
+     * dropped_clips [int] -> How many clips have been dropped because "pending_clips" was full.
+     * encoder_thread [threading.Thread] -> The daemon thread running "encode_clips."
+    
+    Methods:
+     * __init__ -> Instantiates the class and starts "encoder_thread."
+     * add_frame -> Adds a copy of a frame to "ring_buffer," as well as to "clip" if one is being gathered, and hands "clip" to "encoder_thread" once it is complete.
+     * trigger -> Starts gathering a clip from the frames in "ring_buffer," unless one is already being gathered.
+     * drop_old_frames -> Drops the pairs of "ring_buffer" that are older than "pre_event_seconds."
+     * resize -> Changes how many seconds of frames "ring_buffer" keeps, dropping the oldest ones if it shrinks.
+     * encode_clips -> The body of "encoder_thread," which encodes the clips in "pending_clips" into Motion-JPEG ".avi" files until it is given None.
+     * close -> Hands over what has been gathered of "clip," then waits for "encoder_thread" to encode everything and end, for no longer than a given number of seconds.
+    """
+    
+    def __init__(self, directory='clips', pre_event_seconds=5.0, post_event_seconds=5.0, nominal_fps=30.0, scale=1.0, max_pending_clips=1):
+        """
+        Instantiates the class and starts "encoder_thread."
+        
+        Arguments:
+         * directory [str] -> The directory the clips are saved in.
+         * pre_event_seconds [float] -> How many seconds of frames before a warning are kept in "ring_buffer."
+         * post_event_seconds [float] -> How many seconds of frames after a warning are added to a clip.
+         * nominal_fps [float] -> The highest frame rate expected, which bounds how many frames "ring_buffer" and a clip may hold.
+         * scale [float] -> How many times smaller than they were given the frames are stored; use it when giving full frames rather than "ROI."
+         * max_pending_clips [int] -> How many gathered clips may wait to be encoded before new ones are dropped.
+        """
+        
+        self.directory = directory
+        os.makedirs(self.directory,exist_ok=True)
+        self.nominal_fps = nominal_fps
+        self.scale = scale
+        self.pre_event_seconds = pre_event_seconds
+        self.post_event_seconds = post_event_seconds
+        self.ring_buffer = collections.deque(maxlen=int(pre_event_seconds*nominal_fps))
+        
+        self.clip = None
+        self.clip_name = ''
+        self.clip_end_time = 0.0
+        self.frames_left = 0
+        self.pending_clips = queue.Queue(max_pending_clips)
+        self.dropped_clips = 0
+        
+        self.encoder_thread = threading.Thread(target=self.encode_clips,daemon=True)
+        self.encoder_thread.start()
+    
+    def add_frame(self, frame):
+        """
+        Adds a copy of a frame to "ring_buffer," as well as to "clip" if one is being gathered, and hands "clip" to "encoder_thread" once it is complete.
+        
+        Arguments:
+         * frame [np.ndarray] -> A BGR frame; it is copied (or shrunk by "scale"), so it may be a view of a larger frame.
+        """
+        
+        if self.scale != 1.0:
+            frame = cv2.resize(frame,(int(frame.shape[1]/self.scale),int(frame.shape[0]/self.scale)),interpolation=cv2.INTER_AREA)
+        else:
+            frame = frame.copy()
+        pair = (time.time(),frame)
+        self.ring_buffer.append(pair)
+        self.drop_old_frames()
+        
+        if self.clip is not None:
+            self.clip.append(pair)
+            self.frames_left -= 1
+            if self.frames_left <= 0 or pair[0] >= self.clip_end_time:
+                try:
+                    self.pending_clips.put_nowait((self.clip_name,self.clip))
+                except queue.Full:
+                    self.dropped_clips += 1
+                self.clip = None
+    
+    def trigger(self, reason):
+        """
+        Starts gathering a clip from the frames in "ring_buffer," unless one is already being gathered.
+        
+        Arguments:
+         * reason [str] -> Why the clip is being saved (e.g. "out_lane" or "over_divider"), which becomes part of its file name.
+        """
+        
+        if self.clip is None:
+            self.clip = list(self.ring_buffer)
+            self.clip_name = time.strftime('clip-%Y%m%d-%H%M%S-') + reason + '.avi'
+            self.clip_end_time = time.time() + self.post_event_seconds
+            self.frames_left = int(self.post_event_seconds*self.nominal_fps)
+    
+    def drop_old_frames(self):
+        """
+        Drops the pairs of "ring_buffer" that are older than "pre_event_seconds."
+        """
+        
+        oldest_time = time.time() - self.pre_event_seconds
+        while len(self.ring_buffer) > 0 and self.ring_buffer[0][0] < oldest_time:
+            self.ring_buffer.popleft()
+    
+    def resize(self, pre_event_seconds):
+        """
+        Changes how many seconds of frames "ring_buffer" keeps, dropping the oldest ones if it shrinks; a clip being gathered keeps the frames it has.
+        
+        Arguments:
+         * pre_event_seconds [float] -> How many seconds of frames before a warning are kept in "ring_buffer."
+        """
+        
+        self.pre_event_seconds = pre_event_seconds
+        maxlen = int(pre_event_seconds*self.nominal_fps)
+        if maxlen != self.ring_buffer.maxlen:
+            self.ring_buffer = collections.deque(self.ring_buffer,maxlen=maxlen)
+        self.drop_old_frames()
+    
+    def encode_clips(self):
+        """
+        The body of "encoder_thread," which encodes the clips in "pending_clips" into Motion-JPEG ".avi" files until it is given None.
+        """
+        
+        pending_clip = self.pending_clips.get()
+        while pending_clip is not None:
+            name, clip = pending_clip
+            if len(clip) > 0:
+                if len(clip) > 1 and clip[-1][0] > clip[0][0]:
+                    fps = (len(clip)-1)/(clip[-1][0] - clip[0][0])
+                else:
+                    fps = self.nominal_fps
+                height, width = clip[0][1].shape[:2]
+                writer = cv2.VideoWriter(os.path.join(self.directory,name),cv2.VideoWriter_fourcc(*'MJPG'),fps,(width,height))
+                for frame_time, frame in clip:
+                    writer.write(frame)
+                writer.release()
+            pending_clip = self.pending_clips.get()
+    
+    def close(self, timeout=1.0):
+        """
+        Hands over what has been gathered of "clip," then waits for "encoder_thread" to encode everything and end, for no longer than "timeout" so that "Camera" keeps to its shutdown deadline; a clip that cannot be handed over in time is dropped, and one still being encoded is left to "encoder_thread," which ends with the process.
+        
+        Arguments:
+         * timeout [float] -> The most seconds to wait.
+        """
+        
+        end_time = time.monotonic() + timeout
+        if self.clip is not None:
+            try:
+                self.pending_clips.put((self.clip_name,self.clip),timeout=timeout)
+            except queue.Full:
+                self.dropped_clips += 1
+            self.clip = None
+        try:
+            self.pending_clips.put(None,timeout=max(0.0,end_time - time.monotonic()))
+        except queue.Full:
+            return
+        self.encoder_thread.join(max(0.0,end_time - time.monotonic()))
@@ -0,0 +1,315 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import cv2
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+from interfaces import metrics
+
+"""
+"debug_stream" Module:
+
+Packages Imported:
+ * cv2,
+ * http.server,
+ * json,
+ * threading,
+ * time,
+ * urllib.parse,
+ * interfaces.metrics.
+
+Classes:
+ * Debug_Stream -> An "interface" that serves "Camera's" debug views as Motion-JPEG streams, LaDD's state as JSON, and the metrics of every process as Prometheus text over HTTP, for units run without a user interface.
+ * Debug_Stream_Handler -> Handles one HTTP request made to "Debug_Stream's" server.
+"""
+
+class Debug_Stream:
+    """
+    The debug views are JPEG-encoded in this class's own process, never in "Camera's," and each one is encoded at most once per frame however many clients are watching it.
+    
+    Instance Variables:
+     * VIEWS [dict (constant)] -> Maps the names of the debug views in the URLs ("full," "roi," "warped," and "processed") to the keys of "shared_dict" holding them.
+     * STATE_KEYS [list (constant)] -> The keys of "shared_dict" that make up LaDD's state as served at "/state."
+     * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+     * host [str] -> The address the server listens on; "127.0.0.1" keeps it to the unit itself, "0.0.0.0" opens it to every network the unit is on.
+     * port [int] -> The port the server listens on.
+     * max_fps [float] -> The highest rate a client may ask for; requests for more are lowered to it.
+     * jpeg_quality [int] -> The quality (0 to 100) the debug views are encoded with.
+     * encoded_views [dict] -> The last JPEG of every debug view, keyed by its name in "VIEWS," together with the "shared_dict's" "frame_number" it was encoded at.
+     * encoding_lock [threading.Lock] -> Makes sure that two clients of the same debug view do not encode the same frame twice.
+     * server [http.server.ThreadingHTTPServer] -> The server, which handles every client in a thread of its own.
+     * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten every half a second by "begin", so that "Supervisor" can tell if this process has hung; None when nothing is supervising it.
+     * metrics [interfaces.metrics.Metrics] -> How many requests have been served, by path.
+     * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Wakes up "begin" as soon as shutdown is requested; None to check "shared_dict's" "turn_off_LaDD" every half a second.
+    
+    Methods:
+     * __init__ -> Instantiates the class; the server is only created by "begin," in this class's own process.
+     * begin -> Serves until shutdown is requested or "shared_dict's" "turn_off_LaDD" is True.
+     * beat -> Beats "heartbeat" and publishes "metrics" when it is time to, every time "begin" wakes up.
+     * get_view_jpeg -> Returns the JPEG of a debug view for the current frame, encoding it only if no client has done so yet.
+     * get_state -> Returns LaDD's state as a dictionary that can be turned into JSON.
+     * get_metrics -> Returns the metrics of every process of LaDD as Prometheus text.
+     * parse_fps [static] -> Returns the rate asked for in the "fps" query parameter of a URL, kept between 0.1 and "max_fps."
+    """
+    
+    VIEWS = {'full':'full_frame','roi':'ROI_frame','warped':'warped_ROI_frame','processed':'processed_ROI_frame'}
+    STATE_KEYS = ['frame_number','speed','below_48kph','crossed_lane','crossed_divider','nothing_detected','performance_mode','detection_fps','gated_frame_fraction','detection_engine','lane_offsets_ahead','supervisor','memory','cameras']
+    
+    def __init__(self, shared_dict, host='127.0.0.1', port=8080, max_fps=15.0, jpeg_quality=70, shutdown_coordinator=None, heartbeat=None):
+        """
+        Instantiates the class; the server is only created by "begin," in this class's own process.
+        
+        Arguments:
+         * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+         * host [str] -> The address the server listens on.
+         * port [int] -> The port the server listens on.
+         * max_fps [float] -> The highest rate a client may ask for.
+         * jpeg_quality [int] -> The quality (0 to 100) the debug views are encoded with.
+         * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Wakes up "begin" as soon as shutdown is requested (optional).
+         * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten every half a second by "begin" (optional).
+        """
+        
+        self.shared_dict = shared_dict
+        self.host = host
+        self.port = port
+        self.max_fps = max_fps
+        self.jpeg_quality = jpeg_quality
+        self.encoded_views = {}
+        self.encoding_lock = None
+        self.server = None
+        self.heartbeat = heartbeat
+        self.metrics = metrics.Metrics(self.shared_dict,'Debug_Stream')
+        self.shutdown_coordinator = shutdown_coordinator
+    
+    def begin(self):
+        """
+        Serves until shutdown is requested or "shared_dict's" "turn_off_LaDD" is True.
+        """
+        
+        self.encoding_lock = threading.Lock()
+        self.server = http.server.ThreadingHTTPServer((self.host,self.port),Debug_Stream_Handler)
+        self.server.daemon_threads = True
+        self.server.debug_stream = self
+        server_thread = threading.Thread(target=self.server.serve_forever,daemon=True)
+        server_thread.start()
+        
+        try:
+            if self.shutdown_coordinator is not None:
+                while not self.shutdown_coordinator.wait(0.5) and not self.shared_dict['turn_off_LaDD']:
+                    self.beat()
+            else:
+                while not self.shared_dict['turn_off_LaDD']:
+                    time.sleep(0.5)
+                    self.beat()
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+    
+    def beat(self):
+        """
+        Beats "heartbeat" and publishes "metrics" when it is time to, every time "begin" wakes up.
+        """
+        
+        if self.heartbeat is not None:
+            self.heartbeat.beat()
+        self.metrics.maybe_flush()
+    
+    def get_view_jpeg(self, view):
+        """
+        Returns the JPEG of a debug view for the current frame, encoding it only if no client has done so yet.
+        
+        Arguments:
+         * view [str] -> The name of the debug view in "VIEWS."
+        
+        Return Arguments:
+         * frame_number [int] -> The "shared_dict's" "frame_number" the JPEG belongs to.
+         * jpeg [bytes] -> The JPEG; None if "Camera" has not published the debug view.
+        """
+        
+        frame_number = self.shared_dict['frame_number']
+        with self.encoding_lock:
+            if view in self.encoded_views and self.encoded_views[view][0] == frame_number:
+                return self.encoded_views[view]
+            
+            frame = self.shared_dict[self.VIEWS[view]]
+            jpeg = None
+            if len(frame) > 0:
+                ret, buffer = cv2.imencode('.jpg',cv2.cvtColor(frame,cv2.COLOR_RGB2BGR),[cv2.IMWRITE_JPEG_QUALITY,self.jpeg_quality])
+                if ret:
+                    jpeg = buffer.tobytes()
+            self.encoded_views[view] = (frame_number,jpeg)
+            return self.encoded_views[view]
+    
+    def get_state(self):
+        """
+        Returns LaDD's state as a dictionary that can be turned into JSON.
+        
+        Return Arguments:
+         * state [dict] -> The values of "STATE_KEYS" in "shared_dict," plus the time they were read at.
+        """
+        
+        state = {key:self.shared_dict[key] for key in self.STATE_KEYS}
+        state['time'] = time.time()
+        return state
+    
+    def get_metrics(self):
+        """
+        Returns the metrics of every process of LaDD as Prometheus text, including the CPU time and memory of LaDD's main.py and "manager_obj," whose process IDs are in "shared_dict's" "process_ids."
+        
+        Return Arguments:
+         * text [str] -> The metrics in the Prometheus text exposition format.
+        """
+        
+        return metrics.Metrics.format_prometheus(metrics.Metrics.collect(self.shared_dict),self.shared_dict['process_ids'])
+    
+    @staticmethod
+    def parse_fps(query, max_fps):
+        """
+        Returns the rate asked for in the "fps" query parameter of a URL, kept between 0.1 and "max_fps."
+        
+        Arguments:
+         * query [str] -> The query part of the URL.
+         * max_fps [float] -> The highest rate a client may ask for, which is also the rate used when none is asked for.
+        
+        Return Arguments:
+         * fps [float] -> The rate to serve at.
+        """
+        
+        try:
+            fps = float(urllib.parse.parse_qs(query).get('fps',[max_fps])[0])
+        except ValueError:
+            fps = max_fps
+        return min(max(fps,0.1),max_fps)
+
+class Debug_Stream_Handler(http.server.BaseHTTPRequestHandler):
+    """
+    Instance Variables:
+     * INDEX [str (constant)] -> The page served at "/," which shows every debug view and the state.
+     * debug_stream [Debug_Stream] -> The "Debug_Stream" whose server received the request.
+    
+    Methods:
+     * do_GET -> Serves "/," "/state" (the state once, as JSON), "/state/stream" (the state as server-sent events), "/stream/<view>" (a debug view as Motion-JPEG), the last two at the rate asked for with "?fps=N," and "/metrics" (the metrics of every process, for Prometheus to scrape).
+     * send_view_stream -> Sends a debug view as a "multipart/x-mixed-replace" stream of JPEGs, skipping frames that have not changed, until the client leaves or LaDD is turned off.
+     * send_state_stream -> Sends the state as server-sent events until the client leaves or LaDD is turned off.
+     * log_message -> Keeps the server from writing a line to the terminal for every request.
+    """
+    
+    INDEX = ('<html><head><title>LaDD</title></head><body>' + ''.join('<img src="/stream/%s?fps=5">' % view for view in Debug_Stream.VIEWS) +
+             '<pre id="state"></pre><script>new EventSource("/state/stream?fps=2").onmessage=function(e){document.getElementById("state").textContent=e.data;};</script></body></html>')
+    
+    def do_GET(self):
+        """
+        Serves "/," "/state" (the state once, as JSON), "/state/stream" (the state as server-sent events), "/stream/<view>" (a debug view as Motion-JPEG), the last two at the rate asked for with "?fps=N," and "/metrics" (the metrics of every process, for Prometheus to scrape).
+        """
+        
+        self.debug_stream = self.server.debug_stream
+        url = urllib.parse.urlsplit(self.path)
+        self.debug_stream.metrics.increment('http_requests_total')
+        if url.path == '/':
+            body = self.INDEX.encode()
+            self.send_response(200)
+            self.send_header('Content-Type','text/html')
+            self.send_header('Content-Length',str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif url.path == '/state':
+            body = json.dumps(self.debug_stream.get_state()).encode()
+            self.send_response(200)
+            self.send_header('Content-Type','application/json')
+            self.send_header('Content-Length',str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif url.path == '/metrics':
+            body = self.debug_stream.get_metrics().encode()
+            self.send_response(200)
+            self.send_header('Content-Type','text/plain; version=0.0.4')
+            self.send_header('Content-Length',str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif url.path == '/state/stream':
+            self.send_state_stream(Debug_Stream.parse_fps(url.query,self.debug_stream.max_fps))
+        elif url.path.startswith('/stream/') and url.path[len('/stream/'):] in Debug_Stream.VIEWS:
+            self.send_view_stream(url.path[len('/stream/'):],Debug_Stream.parse_fps(url.query,self.debug_stream.max_fps))
+        else:
+            self.send_error(404)
+    
+    def send_view_stream(self, view, fps):
+        """
+        Sends a debug view as a "multipart/x-mixed-replace" stream of JPEGs, skipping frames that have not changed, until the client leaves or LaDD is turned off.
+        
+        Arguments:
+         * view [str] -> The name of the debug view in "Debug_Stream.VIEWS."
+         * fps [float] -> The highest rate the JPEGs are sent at.
+        """
+        
+        self.send_response(200)
+        self.send_header('Content-Type','multipart/x-mixed-replace; boundary=frame')
+        self.send_header('Cache-Control','no-cache')
+        self.end_headers()
+        
+        last_frame_number = None
+        try:
+            while not self.debug_stream.shared_dict['turn_off_LaDD']:
+                start_time = time.monotonic()
+                frame_number, jpeg = self.debug_stream.get_view_jpeg(view)
+                if jpeg is not None and frame_number != last_frame_number:
+                    last_frame_number = frame_number
+                    self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' + jpeg + b'\r\n')
+                    self.wfile.flush()
+                time.sleep(max(0.0,(1.0/fps) - (time.monotonic() - start_time)))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def send_state_stream(self, fps):
+        """
+        Sends the state as server-sent events until the client leaves or LaDD is turned off.
+        
+        Arguments:
+         * fps [float] -> The rate the state is sent at.
+        """
+        
+        self.send_response(200)
+        self.send_header('Content-Type','text/event-stream')
+        self.send_header('Cache-Control','no-cache')
+        self.end_headers()
+        
+        try:
+            while not self.debug_stream.shared_dict['turn_off_LaDD']:
+                start_time = time.monotonic()
+                self.wfile.write(b'data: ' + json.dumps(self.debug_stream.get_state()).encode() + b'\n\n')
+                self.wfile.flush()
+                time.sleep(max(0.0,(1.0/fps) - (time.monotonic() - start_time)))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, format, *args):
+        """
+        Keeps the server from writing a line to the terminal for every request.
+        
+        Arguments:
+         * format [str] -> The format string of the line.
+         * args [tuple] -> The values of the line.
+        """
+        
+        pass
@@ -0,0 +1,221 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import cv2
+import csv
+import os
+
+"""
+"footage_cache" Module:
+
+Packages Imported:
+ * numpy (as np),
+ * cv2,
+ * csv,
+ * os.
+
+Classes:
+ * Footage_Cache -> A recording converted once into a memory-mapped file of "ROI" frames, with their timestamps and an optional speed trace, that can be replayed without decoding any video.
+"""
+
+class Footage_Cache:
+    """
+    A cache file is laid out like a trip file of interfaces.trip_recorder: a header, then one fixed-width record per frame. The records are memory-mapped, so replaying a cache only reads the frames actually used, and every frame handed out is a view into the map rather than a copy.
+    
+    Instance Variables:
+     * MAGIC [bytes (constant)] -> The first bytes of every cache file.
+     * HEADER_SIZE [int (constant)] -> The size of the header of a cache file in bytes: "MAGIC," then the size of one record, the width and height of the recording, and the height and width of "ROI," each a little-endian 32-bit integer, padded to 32 bytes.
+     * path [str] -> The path of the cache file.
+     * source_size [list] -> The [width,height] of the recording the cache was made from, which is what "Camera's" "camera_res" would be.
+     * records [np.memmap] -> The read-only records of the cache.
+     * times [np.ndarray] -> The time of every frame in seconds from the start of the recording.
+     * speeds [np.ndarray] -> The speed in kph at every frame; NaN if the cache was made without a speed trace.
+     * frames [np.ndarray] -> The "ROI" of every frame.
+    
+    Methods:
+     * __init__ -> Opens a cache file and memory-maps its records.
+     * __len__ -> Returns the number of frames in the cache.
+     * __iter__ -> Yields the "ROI" of every frame, as views into the memory map.
+     * get_record_dtype [static] -> Returns the layout of one record for a given size of "ROI."
+     * is_cache [static] -> Returns whether a file is a cache file of this version of LaDD.
+     * read_speed_trace [static] -> Reads a speed trace from a ".csv" file of "time,speed" rows.
+     * build [static] -> Converts a recording into a cache file.
+    """
+    
+    MAGIC = b'LaDDROI1'
+    HEADER_SIZE = 32
+    
+    def __init__(self, path):
+        """
+        Opens a cache file and memory-maps its records.
+        
+        Arguments:
+         * path [str] -> The path of the cache file.
+        """
+        
+        if not self.is_cache(path):
+            raise ValueError('"' + path + '" is not a footage cache of this version of LaDD.')
+        with open(path,'rb') as cache_file:
+            header = cache_file.read(self.HEADER_SIZE)
+        itemsize, source_width, source_height, roi_height, roi_width = [int(x) for x in np.frombuffer(header[8:28],'<u4')]
+        record_dtype = self.get_record_dtype((roi_height,roi_width))
+        if itemsize != record_dtype.itemsize:
+            raise ValueError('"' + path + '" is not a footage cache of this version of LaDD.')
+        
+        self.path = path
+        self.source_size = [source_width,source_height]
+        #A record cut short while the cache was being built is left out.
+        record_count = (os.path.getsize(path) - self.HEADER_SIZE)//itemsize
+        if record_count > 0:
+            self.records = np.memmap(path,record_dtype,'r',self.HEADER_SIZE,(record_count,))
+        else:
+            self.records = np.empty(0,record_dtype)
+        self.times = self.records['time']
+        self.speeds = self.records['speed']
+        self.frames = self.records['frame']
+    
+    def __len__(self):
+        """
+        Returns the number of frames in the cache.
+        
+        Return Arguments:
+         * length [int] -> The number of frames.
+        """
+        
+        return len(self.records)
+    
+    def __iter__(self):
+        """
+        Yields the "ROI" of every frame, as read-only views into the memory map; nothing is decoded or copied.
+        """
+        
+        for i in range(len(self.records)):
+            yield self.frames[i]
+    
+    @staticmethod
+    def get_record_dtype(roi_shape):
+        """
+        Returns the layout of one record for a given size of "ROI."
+        
+        Arguments:
+         * roi_shape [tuple] -> The (height,width) of "ROI."
+        
+        Return Arguments:
+         * record_dtype [np.dtype] -> The layout of one record: the time of the frame, the speed at it, and its BGR "ROI."
+        """
+        
+        return np.dtype([('time','<f8'),('speed','<f4'),('frame','u1',(roi_shape[0],roi_shape[1],3))])
+    
+    @staticmethod
+    def is_cache(path):
+        """
+        Returns whether a file is a cache file of this version of LaDD.
+        
+        Arguments:
+         * path [str] -> The path of the file.
+        
+        Return Arguments:
+         * is_cache [bool] -> Whether the file starts with "MAGIC."
+        """
+        
+        if not os.path.isfile(path):
+            return False
+        with open(path,'rb') as cache_file:
+            return cache_file.read(len(Footage_Cache.MAGIC)) == Footage_Cache.MAGIC
+    
+    @staticmethod
+    def read_speed_trace(path):
+        """
+        Reads a speed trace from a ".csv" file of "time,speed" rows, the time in seconds from the start of the recording and the speed in kph; rows that are not two numbers, such as a heading, are skipped.
+        
+        Arguments:
+         * path [str] -> The path of the ".csv" file.
+        
+        Return Arguments:
+         * times [np.ndarray] -> The times of the samples, sorted.
+         * speeds [np.ndarray] -> The speeds of the samples.
+        """
+        
+        samples = []
+        with open(path,'r') as csv_file:
+            for row in csv.reader(csv_file):
+                try:
+                    samples.append((float(row[0]),float(row[1])))
+                except (ValueError, IndexError):
+                    pass
+        samples.sort()
+        return np.array([s[0] for s in samples]), np.array([s[1] for s in samples])
+    
+    @staticmethod
+    def build(video_path, cache_path, row_slice, col_slice, speed_trace_path=None, chunk_size=64):
+        """
+        Converts a recording into a cache file, decoding it once and keeping only the "ROI" of every frame.
+        
+        The time of a frame is the position the recording gives for it, or its index over the recording's frame rate if it gives none. The speed at a frame is interpolated from the speed trace, and held at its first and last samples outside of it.
+        
+        Arguments:
+         * video_path [str] -> The path of the recording, such as the footage in the "test_footage" directory.
+         * cache_path [str] -> The path of the cache file to write; it is replaced once it has been written completely.
+         * row_slice {and} col_slice [list] -> "Camera's" "row_slice" and "col_slice" for the size of the recording.
+         * speed_trace_path [str] -> The path of a ".csv" speed trace to read with "read_speed_trace," or None.
+         * chunk_size [int] -> How many records are gathered before they are written.
+        
+        Return Arguments:
+         * frame_count [int] -> The number of frames written.
+        """
+        
+        cap = cv2.VideoCapture(video_path)
+        source_size = [int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))]
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        rows = slice(int(row_slice[0]),int(row_slice[1]))
+        cols = slice(int(col_slice[0]),int(col_slice[1]))
+        roi_shape = (rows.stop - rows.start,cols.stop - cols.start)
+        record_dtype = Footage_Cache.get_record_dtype(roi_shape)
+        if speed_trace_path is not None:
+            trace_times, trace_speeds = Footage_Cache.read_speed_trace(speed_trace_path)
+        else:
+            trace_times = trace_speeds = np.empty(0)
+        
+        chunk = np.empty(chunk_size,record_dtype)
+        chunk_fill = frame_count = 0
+        temp_path = cache_path + '.tmp'
+        with open(temp_path,'wb') as cache_file:
+            cache_file.write(Footage_Cache.MAGIC + np.array([record_dtype.itemsize,source_size[0],source_size[1],roi_shape[0],roi_shape[1],0],'<u4').tobytes())
+            ret, frame = cap.read()
+            while ret:
+                frame_time = cap.get(cv2.CAP_PROP_POS_MSEC)/1000.0
+                if frame_time <= 0.0 and frame_count > 0:
+                    frame_time = frame_count/fps
+                row = chunk[chunk_fill]
+                row['time'] = frame_time
+                row['speed'] = np.interp(frame_time,trace_times,trace_speeds) if len(trace_times) > 0 else np.nan
+                row['frame'] = frame[rows,cols]
+                chunk_fill += 1
+                frame_count += 1
+                if chunk_fill == chunk_size:
+                    chunk.tofile(cache_file)
+                    chunk_fill = 0
+                ret, frame = cap.read()
+            chunk[:chunk_fill].tofile(cache_file)
+        cap.release()
+        os.replace(temp_path,cache_path)
+        return frame_count
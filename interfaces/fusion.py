@@ -0,0 +1,237 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing as mp
+import numpy as np
+import time
+from interfaces import metrics, trip_recorder
+
+"""
+"fusion" Module:
+
+Packages Imported:
+ * multiprocessing (as mp),
+ * numpy (as np),
+ * time,
+ * interfaces.metrics,
+ * interfaces.trip_recorder.
+
+Classes:
+ * Detection_Slot -> Lets one "Camera" process publish what it detected in its latest frame to "Fusion," by writing it into shared memory.
+ * Fusion -> Combines the detections of every camera, when LaDD has more than one, into the single set of warning flags in "shared_dict" that "Audio" and the user interface act on.
+"""
+
+class Detection_Slot:
+    """
+    Instance Variables:
+     * records [np.ndarray] -> Every camera's record, a view of "Fusion's" shared memory.
+     * index [int] -> The record belonging to this camera.
+     * lock [mp.Lock] -> Keeps "Fusion" from reading the record while it is half-written.
+    
+    Methods:
+     * __init__ -> Instantiates the class.
+     * publish -> Writes the detection of one frame into the record; a few microseconds, with no inter-process communication besides the lock.
+    """
+    
+    def __init__(self, records, index, lock):
+        """
+        Instantiates the class.
+        
+        Arguments:
+         * records [np.ndarray] -> Every camera's record.
+         * index [int] -> The record belonging to this camera.
+         * lock [mp.Lock] -> The lock of the record.
+        """
+        
+        self.records = records
+        self.index = index
+        self.lock = lock
+    
+    def publish(self, frame_number, state, warning_flags):
+        """
+        Writes the detection of one frame into the record.
+        
+        Arguments:
+         * frame_number [int] -> The number of the frame.
+         * state [str] -> "Camera's" "state" (may be None).
+         * warning_flags [tuple] -> The ("crossed_divider," "crossed_lane," "nothing_detected") flags "Camera" last decided on; None if it has not decided on any yet.
+        """
+        
+        with self.lock:
+            record = self.records[self.index]
+            record['time'] = time.monotonic()
+            record['frame_number'] = frame_number
+            record['state'] = trip_recorder.Trip_Recorder.STATES.index(state) if state in trip_recorder.Trip_Recorder.STATES else 0
+            record['has_flags'] = warning_flags is not None
+            if warning_flags is not None:
+                record['flags'] = warning_flags
+
+class Fusion:
+    """
+    "Fusion" is created in LaDD's main.py before the processes are started, so that every "Camera" inherits its shared memory, and runs in a process of its own; with only one camera it is not used, and "Camera" publishes its warning flags itself. The records are in an mp.RawArray, like "Supervisor's" heartbeats, so that reading them costs no round trip to "manager_obj." The cameras are fused as: "crossed_divider" and "crossed_lane" if any camera says so, and "nothing_detected" only if every camera does, since a lane seen by one camera is enough to tell where the vehicle is. A camera that has not published within "STALE_TIME" (such as one being restarted) is left out, and so is one that has not decided on any flags yet (such as below 48 kph); the flags stay as they were while no camera has any, unless every camera that has published has gone stale, in which case "nothing_detected" is set.
+    
+    Instance Variables:
+     * RECORD_DTYPE [np.dtype (constant)] -> The layout of one camera's record: when it was written (as given by "time.monotonic"), the number and "state" of its frame (the "state" as an index of interfaces.trip_recorder.Trip_Recorder's "STATES"), and its warning flags, if it has any yet.
+     * POLL_INTERVAL [float (constant)] -> Every how many seconds the records are fused, which bounds how much later than "Camera" a warning is given.
+     * STALE_TIME [float (constant)] -> How many seconds a camera may go without publishing before it is left out.
+     * STATUS_INTERVAL [float (constant)] -> Every how many seconds the "state" of every camera is published as "shared_dict's" "cameras."
+     * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+     * camera_names [list] -> The names of the "Camera" processes, in the order of their records.
+     * buffer [mp.RawArray] -> The shared memory holding the records.
+     * records [np.ndarray] -> The records, as a view of "buffer."
+     * locks [list] -> The mp.Lock of every record.
+     * warning_flags [tuple] -> The fused flags last published.
+     * last_status_time [float] -> When "shared_dict's" "cameras" was last published.
+     * notifier [interfaces.notifier.Notifier] -> Wakes up the user interface when the fused warning flags change; None when nothing is listening.
+     * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Whose event "begin" sleeps on between fusions; None to sleep with "time.sleep."
+     * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten at every fusion, so that "Supervisor" can tell if this process has hung; None when nothing is supervising it.
+     * metrics [interfaces.metrics.Metrics] -> How many times the fused flags have changed, and how many cameras were left out as stale.
+    
+    Methods:
+     * __init__ -> Instantiates the class and creates the shared memory.
+     * create_slot -> Returns the "Detection_Slot" a camera publishes through, to be handed to its "Camera" object.
+     * read_records -> Returns a consistent copy of every record.
+     * begin -> Fuses the records every "POLL_INTERVAL" until LaDD is turned off, sleeping on "shutdown_coordinator's" event rather than reading "shared_dict's" "turn_off_LaDD" every time.
+     * fuse -> Fuses the records once, publishing the warning flags if they have changed.
+     * fuse_flags [static] -> Combines the warning flags of several cameras into one set.
+    """
+    
+    RECORD_DTYPE = np.dtype([('time','<f8'),('frame_number','<u4'),('state','u1'),('has_flags','?'),('flags','?',(3,))])
+    POLL_INTERVAL = 0.01
+    STALE_TIME = 0.5
+    STATUS_INTERVAL = 1.0
+    
+    def __init__(self, shared_dict, camera_names, notifier=None, shutdown_coordinator=None, heartbeat=None):
+        """
+        Instantiates the class and creates the shared memory.
+        
+        Arguments:
+         * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+         * camera_names [list] -> The names of the "Camera" processes.
+         * notifier [interfaces.notifier.Notifier] -> Wakes up the user interface when the fused warning flags change (optional).
+         * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Wakes up "begin" as soon as shutdown is requested (optional).
+         * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten at every fusion (optional).
+        """
+        
+        self.shared_dict = shared_dict
+        self.camera_names = list(camera_names)
+        self.buffer = mp.RawArray('b',len(self.camera_names)*self.RECORD_DTYPE.itemsize)
+        self.records = np.frombuffer(self.buffer,self.RECORD_DTYPE)
+        self.locks = [mp.Lock() for name in self.camera_names]
+        self.warning_flags = None
+        self.last_status_time = 0.0
+        self.notifier = notifier
+        self.shutdown_coordinator = shutdown_coordinator
+        self.heartbeat = heartbeat
+        self.metrics = metrics.Metrics(self.shared_dict,'Fusion')
+    
+    def create_slot(self, camera_name):
+        """
+        Returns the "Detection_Slot" a camera publishes through, to be handed to its "Camera" object.
+        
+        Arguments:
+         * camera_name [str] -> The name of the "Camera" process, one of "camera_names."
+        
+        Return Arguments:
+         * detection_slot [Detection_Slot] -> What the camera calls "publish" on.
+        """
+        
+        index = self.camera_names.index(camera_name)
+        return Detection_Slot(self.records,index,self.locks[index])
+    
+    def read_records(self):
+        """
+        Returns a consistent copy of every record, taking each record's lock only for as long as it takes to copy it.
+        
+        Return Arguments:
+         * records [np.ndarray] -> The copied records.
+        """
+        
+        records = np.empty(len(self.camera_names),self.RECORD_DTYPE)
+        for i, lock in enumerate(self.locks):
+            with lock:
+                records[i] = self.records[i]
+        return records
+    
+    def begin(self):
+        """
+        Fuses the records every "POLL_INTERVAL" until LaDD is turned off. "shared_dict's" "turn_off_LaDD" is only read once, for LaDD being turned off before it started (e.g. without a camera); after that, shutdown is always requested through "shutdown_coordinator," whose event is read without a round trip to "manager_obj."
+        """
+        
+        try:
+            turned_off = self.shared_dict['turn_off_LaDD']
+            while not turned_off:
+                if self.heartbeat is not None:
+                    self.heartbeat.beat()
+                self.fuse(time.monotonic())
+                self.metrics.maybe_flush()
+                if self.shutdown_coordinator is not None:
+                    turned_off = self.shutdown_coordinator.wait(self.POLL_INTERVAL)
+                else:
+                    time.sleep(self.POLL_INTERVAL)
+                    turned_off = self.shared_dict['turn_off_LaDD']
+        finally:
+            self.metrics.flush()
+    
+    def fuse(self, now):
+        """
+        Fuses the records once, publishing the warning flags as "shared_dict's" "crossed_divider," "crossed_lane," and "nothing_detected" if they have changed (and notifying the user interface through "notifier"), and the "state" of every camera as "shared_dict's" "cameras" every "STATUS_INTERVAL."
+        
+        Arguments:
+         * now [float] -> The current time as given by "time.monotonic."
+        """
+        
+        records = self.read_records()
+        fresh = (now - records['time'] <= self.STALE_TIME) & (records['time'] > 0)
+        self.metrics.set_gauge('stale_cameras',int(np.count_nonzero(~fresh)))
+        flagged = records[fresh & records['has_flags']]
+        if len(flagged) > 0 or (not fresh.any() and (records['time'] > 0).any()):
+            warning_flags = self.fuse_flags([tuple(bool(flag) for flag in record['flags']) for record in flagged])
+        else:
+            warning_flags = self.warning_flags
+        
+        if warning_flags != self.warning_flags:
+            self.warning_flags = warning_flags
+            self.shared_dict['crossed_divider'], self.shared_dict['crossed_lane'], self.shared_dict['nothing_detected'] = warning_flags
+            self.metrics.increment('flag_changes_total')
+            if self.notifier is not None:
+                self.notifier.notify(self.notifier.STATE)
+        
+        if now - self.last_status_time >= self.STATUS_INTERVAL:
+            self.last_status_time = now
+            self.shared_dict['cameras'] = {name:(trip_recorder.Trip_Recorder.STATES[record['state']] or None) if is_fresh else 'stale'
+                                           for name, record, is_fresh in zip(self.camera_names,records,fresh)}
+    
+    @staticmethod
+    def fuse_flags(flags):
+        """
+        Combines the warning flags of several cameras into one set: "crossed_divider" and "crossed_lane" if any camera says so, and "nothing_detected" only if every camera does, or if there are none.
+        
+        Arguments:
+         * flags [list] -> The ("crossed_divider," "crossed_lane," "nothing_detected") flags of every camera.
+        
+        Return Arguments:
+         * warning_flags [tuple] -> The fused ("crossed_divider," "crossed_lane," "nothing_detected") flags.
+        """
+        
+        if len(flags) == 0:
+            return (False,False,True)
+        return (any(flag[0] for flag in flags),any(flag[1] for flag in flags),all(flag[2] for flag in flags))
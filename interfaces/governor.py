@@ -0,0 +1,163 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import time
+
+"""
+"governor" Module:
+
+Packages Imported:
+ * os,
+ * time.
+
+Classes:
+ * Governor -> A frame-rate governor that measures how loaded the Raspberry Pi is and lowers the user interface's refresh rate, the rate of the debug views, and optional stages of "Camera's" pipeline to keep the detection loop at a target frame rate.
+"""
+
+class Governor:
+    """
+    Instance Variables:
+     * MODES [list (constant)] -> The names of the performance modes, from the one that does the most work to the one that does the least.
+     * MODE_SETTINGS [dict (constant)] -> What each performance mode sets: "ui_refresh_interval" (milliseconds between refreshes of the user interface), "debug_view_interval" (every how many frames "Camera" publishes its debug views), and "morphology" (whether "Camera" "opens" "WarpedROI").
+     * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+     * target_fps [float] -> The frame rate that the detection loop is supposed to keep.
+     * publish [bool] -> Whether the performance mode and frame rate are published in "shared_dict"; only the governor of the first camera publishes them, as the user interface can only follow one.
+     * frame_budget [float] -> The number of seconds "Camera" can spend processing a frame and still reach "target_fps."
+     * evaluation_period [float] -> How many seconds of frames are measured before the performance mode is reconsidered.
+     * hold_time [float] -> The least number of seconds between two changes of the performance mode, so that it does not flip back and forth.
+     * mode_index [int] -> The index of the current performance mode in "MODES."
+     * settings [dict] -> The "MODE_SETTINGS" of the current performance mode, kept locally so that "Camera" does not have to read them from "shared_dict" every frame.
+     * busy_time [float] -> The number of seconds spent processing frames since the last evaluation.
+     * frame_count [int] -> The number of frames processed since the last evaluation.
+     * fps [float] -> The frame rate of the detection loop over the last evaluation period.
+     * period_start [float] -> When the current evaluation period began.
+     * last_change_time [float] -> When the performance mode was last changed.
+    
+    Methods:
+     * __init__ -> Instantiates the class and publishes the first performance mode.
+     * record_frame -> Adds the processing time of one frame to the current evaluation period, and evaluates the period once it is over.
+     * evaluate -> Lowers the performance mode if the detection loop cannot keep "target_fps" or the Raspberry Pi is overloaded, and raises it once there is enough headroom again.
+     * set_mode -> Changes the performance mode and publishes its settings in "shared_dict."
+     * get_cpu_load [static] -> Returns the one-minute load average of the Raspberry Pi divided by its number of cores.
+    """
+    
+    MODES = ['full','reduced','minimal']
+    MODE_SETTINGS = {'full':{'ui_refresh_interval':16,'debug_view_interval':1,'morphology':True},
+                     'reduced':{'ui_refresh_interval':50,'debug_view_interval':3,'morphology':True},
+                     'minimal':{'ui_refresh_interval':200,'debug_view_interval':10,'morphology':False}}
+    
+    def __init__(self, shared_dict, target_fps=30.0, evaluation_period=1.0, hold_time=3.0, publish=True):
+        """
+        Instantiates the class and publishes the first performance mode.
+        
+        Arguments:
+         * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+         * target_fps [float] -> The frame rate that the detection loop is supposed to keep.
+         * evaluation_period [float] -> How many seconds of frames are measured before the performance mode is reconsidered.
+         * hold_time [float] -> The least number of seconds between two changes of the performance mode.
+         * publish [bool] -> Whether the performance mode and frame rate are published in "shared_dict."
+        """
+        
+        self.shared_dict = shared_dict
+        self.target_fps = target_fps
+        self.publish = publish
+        self.frame_budget = 1.0/target_fps
+        self.evaluation_period = evaluation_period
+        self.hold_time = hold_time
+        
+        self.mode_index = 0
+        self.settings = self.MODE_SETTINGS[self.MODES[0]]
+        self.busy_time = 0.0
+        self.frame_count = 0
+        self.fps = 0.0
+        self.period_start = time.monotonic()
+        self.last_change_time = self.period_start
+        
+        self.set_mode(0)
+    
+    def record_frame(self, frame_time):
+        """
+        Adds the processing time of one frame to the current evaluation period, and evaluates the period once it is over.
+        
+        Arguments:
+         * frame_time [float] -> The number of seconds "Camera" spent processing the frame, not counting the time spent waiting for the camera.
+        """
+        
+        self.busy_time += frame_time
+        self.frame_count += 1
+        now = time.monotonic()
+        if now - self.period_start >= self.evaluation_period:
+            self.evaluate(now)
+    
+    def evaluate(self, now):
+        """
+        Lowers the performance mode if the detection loop cannot keep "target_fps" or the Raspberry Pi is overloaded, and raises it once there is enough headroom again.
+        
+        Arguments:
+         * now [float] -> The current time as given by "time.monotonic."
+        """
+        
+        self.fps = self.frame_count/(now - self.period_start)
+        utilization = (self.busy_time/self.frame_count)/self.frame_budget
+        cpu_load = self.get_cpu_load()
+        if self.publish:
+            self.shared_dict['detection_fps'] = round(self.fps,1)
+        
+        if now - self.last_change_time >= self.hold_time:
+            if (utilization > 0.9 or cpu_load > 1.0) and self.mode_index < len(self.MODES)-1:
+                self.set_mode(self.mode_index+1)
+                self.last_change_time = now
+            elif utilization < 0.5 and cpu_load < 0.75 and self.mode_index > 0:
+                self.set_mode(self.mode_index-1)
+                self.last_change_time = now
+        
+        self.busy_time = 0.0
+        self.frame_count = 0
+        self.period_start = now
+    
+    def set_mode(self, mode_index):
+        """
+        Changes the performance mode and publishes its settings in "shared_dict," unless "publish" is False.
+        
+        Arguments:
+         * mode_index [int] -> The index of the new performance mode in "MODES."
+        """
+        
+        self.mode_index = mode_index
+        self.settings = self.MODE_SETTINGS[self.MODES[mode_index]]
+        if self.publish:
+            self.shared_dict['ui_refresh_interval'] = self.settings['ui_refresh_interval']
+            self.shared_dict['performance_mode'] = self.MODES[mode_index]
+    
+    @staticmethod
+    def get_cpu_load():
+        """
+        Returns the one-minute load average of the Raspberry Pi divided by its number of cores.
+        
+        Return Arguments:
+         * load [float] -> The load per core; 1.0 means every core is busy.
+        """
+        
+        try:
+            return os.getloadavg()[0]/(os.cpu_count() or 1)
+        except OSError:
+            return 0.0
@@ -0,0 +1,190 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+
+"""
+"lane_tracker" Module:
+
+Packages Imported:
+ * numpy (as np).
+
+Classes:
+ * Lane_Tracker -> A constant-velocity Kalman filter that tracks the x-coordinates of a fixed number of lines (2 for a lane, 4 for a divider) in "Camera's" "WarpedROI," predicting through frames in which they are not detected.
+"""
+
+class Lane_Tracker:
+    """
+    Every line has a state of [x-coordinate, velocity] and a 2x2 covariance matrix, which is symmetric and so is kept as its three distinct elements "p00," "p01," and "p11." All of the lines are predicted and updated at once with NumPy, without any matrix products.
+    
+    Instance Variables:
+     * line_count [int] -> The number of lines tracked.
+     * width [int] -> The width of "WarpedROI"; a line predicted to be outside of it is no longer tracked.
+     * measurement_variance [float] -> The variance, in pixels squared, of a detected x-coordinate.
+     * acceleration_variance [float] -> The variance, in (pixels per second squared) squared, of the sideways acceleration of a line, which is how much the velocity of a line is allowed to change between frames.
+     * initial_velocity_variance [float] -> The variance of the velocity of a line that has just started being tracked.
+     * gate [float] -> How many pixels a detected x-coordinate may be from where its line was predicted to be; if it is further, the line starts being tracked anew from that x-coordinate.
+     * max_missed_frames [int] -> How many frames in a row a line may go undetected before it is no longer tracked.
+     * x {and} v [np.ndarray] -> The x-coordinates (pixels) and velocities (pixels per second) of the lines.
+     * p00 {and} p01 {and} p11 [np.ndarray] -> The elements of the covariance matrices of the lines.
+     * active [np.ndarray] -> Whether each line is being tracked.
+     * missed_frames [np.ndarray] -> How many frames in a row each line has gone undetected.
+     * updated [np.ndarray] -> Whether each line was detected in the last frame.
+    
+    Methods:
+     * __init__ -> Instantiates the class with no lines being tracked.
+     * predict -> Moves every line ahead by its velocity over "dt" seconds and grows its uncertainty accordingly.
+     * associate -> Decides which line each detected x-coordinate belongs to.
+     * update -> Corrects the lines with the x-coordinates detected in the current frame.
+     * get_positions -> Returns the sorted x-coordinates of the lines being tracked.
+     * reset -> Stops tracking every line.
+    """
+    
+    def __init__(self, line_count, width, measurement_noise=3.0, acceleration_noise=300.0, initial_velocity_noise=100.0, gate=30.0, max_missed_frames=4):
+        """
+        Instantiates the class with no lines being tracked.
+        
+        Arguments:
+         * line_count [int] -> The number of lines tracked.
+         * width [int] -> The width of "WarpedROI."
+         * measurement_noise [float] -> The standard deviation, in pixels, of a detected x-coordinate.
+         * acceleration_noise [float] -> The standard deviation, in pixels per second squared, of the sideways acceleration of a line.
+         * initial_velocity_noise [float] -> The standard deviation, in pixels per second, of the velocity of a line that has just started being tracked.
+         * gate [float] -> How many pixels a detected x-coordinate may be from where its line was predicted to be.
+         * max_missed_frames [int] -> How many frames in a row a line may go undetected before it is no longer tracked.
+        """
+        
+        self.line_count = line_count
+        self.width = width
+        self.measurement_variance = measurement_noise**2
+        self.acceleration_variance = acceleration_noise**2
+        self.initial_velocity_variance = initial_velocity_noise**2
+        self.gate = gate
+        self.max_missed_frames = max_missed_frames
+        
+        self.x = np.zeros(line_count)
+        self.v = np.zeros(line_count)
+        self.p00 = np.zeros(line_count)
+        self.p01 = np.zeros(line_count)
+        self.p11 = np.zeros(line_count)
+        self.active = np.zeros(line_count,bool)
+        self.missed_frames = np.zeros(line_count,int)
+        self.updated = np.zeros(line_count,bool)
+    
+    def predict(self, dt):
+        """
+        Moves every line ahead by its velocity over "dt" seconds and grows its uncertainty accordingly.
+        
+        Arguments:
+         * dt [float] -> The number of seconds since the previous frame.
+        """
+        
+        self.x += self.v * dt
+        #P = F*P*F^T + Q, written out for F = [[1,dt],[0,1]] and a white-noise acceleration Q.
+        self.p00 += (2*dt*self.p01) + (dt*dt*self.p11) + (self.acceleration_variance * dt**4/4)
+        self.p01 += (dt*self.p11) + (self.acceleration_variance * dt**3/2)
+        self.p11 += self.acceleration_variance * dt**2
+        
+        self.missed_frames += 1
+        self.updated[:] = False
+        self.active &= (self.x >= 0) & (self.x < self.width)
+    
+    def associate(self, x_coors):
+        """
+        Decides which line each detected x-coordinate belongs to. With every line being tracked and as many x-coordinates as lines, they are paired in order of their x-coordinates, as a single line seen on its own may have been given any of the lines; otherwise each belongs to the nearest tracked line within "gate," else a line that is not being tracked, else the nearest line left.
+        
+        Arguments:
+         * x_coors [np.ndarray] -> The sorted x-coordinates detected in the current frame.
+        
+        Return Arguments:
+         * indices [list] -> The index of the line each x-coordinate belongs to.
+        """
+        
+        if len(x_coors) == self.line_count and self.active.all():
+            return np.argsort(self.x,kind='stable').tolist()
+        indices = []
+        for x in x_coors:
+            free = [i for i in range(self.line_count) if i not in indices]
+            near = [i for i in free if self.active[i] and abs(self.x[i] - x) <= self.gate]
+            inactive = [i for i in free if not self.active[i]]
+            if len(near) > 0:
+                indices.append(min(near,key=lambda i: abs(self.x[i] - x)))
+            elif len(inactive) > 0:
+                indices.append(inactive[0])
+            else:
+                indices.append(min(free,key=lambda i: abs(self.x[i] - x)))
+        return indices
+    
+    def update(self, x_coors):
+        """
+        Corrects the lines with the x-coordinates detected in the current frame, starting to track anew any line that was not being tracked or whose x-coordinate is further than "gate" from where it was predicted to be.
+        
+        Arguments:
+         * x_coors [list] -> The sorted x-coordinates detected in the current frame; there may be fewer than "line_count" of them, or none.
+        """
+        
+        if len(x_coors) > 0:
+            z = np.asarray(x_coors[:self.line_count],float)
+            idx = np.array(self.associate(z))
+            
+            #The Kalman update for H = [1,0].
+            innovation = z - self.x[idx]
+            s = self.p00[idx] + self.measurement_variance
+            k0 = self.p00[idx]/s
+            k1 = self.p01[idx]/s
+            self.x[idx] += k0 * innovation
+            self.v[idx] += k1 * innovation
+            self.p11[idx] -= k1 * self.p01[idx]
+            self.p01[idx] *= 1 - k0
+            self.p00[idx] *= 1 - k0
+            
+            restart = (~self.active[idx]) | (np.abs(innovation) > self.gate)
+            restart_idx = idx[restart]
+            self.x[restart_idx] = z[restart]
+            self.v[restart_idx] = 0.0
+            self.p00[restart_idx] = self.measurement_variance
+            self.p01[restart_idx] = 0.0
+            self.p11[restart_idx] = self.initial_velocity_variance
+            
+            self.active[idx] = True
+            self.missed_frames[idx] = 0
+            self.updated[idx] = True
+        
+        self.active &= self.missed_frames <= self.max_missed_frames
+    
+    def get_positions(self):
+        """
+        Returns the sorted x-coordinates of the lines being tracked.
+        
+        Return Arguments:
+         * positions [list] -> The x-coordinates of the lines being tracked, from left to right.
+        """
+        
+        return sorted(self.x[self.active].tolist())
+    
+    def reset(self):
+        """
+        Stops tracking every line.
+        """
+        
+        self.active[:] = False
+        self.updated[:] = False
+        self.missed_frames[:] = 0
@@ -0,0 +1,242 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import time
+import tracemalloc
+
+"""
+"memory" Module:
+
+Packages Imported:
+ * os,
+ * time,
+ * tracemalloc.
+
+Classes:
+ * Memory_Budget -> Samples how much memory every process of LaDD uses from LaDD's main.py, keeps the peak of each for a report at shutdown, and lowers a memory mode that makes "Camera" publish smaller frames and keep a shorter clip buffer while LaDD is over its memory budget.
+ * Allocation_Tracker -> Periodically writes the lines of code that hold the most memory, and those whose memory has grown the most, in a process that runs with "tracemalloc" tracing.
+"""
+
+class Memory_Budget:
+    """
+    The memory of a process is its proportional set size (PSS) where the kernel gives it, which splits the pages that forked processes still share (such as those of NumPy and OpenCV) between them, so that the memory of the processes adds up to what LaDD actually uses; elsewhere it is the resident set size (RSS). The peak RSS of a process is the one the kernel keeps, which also counts spikes between two samples.
+    
+    Instance Variables:
+     * MODES [list (constant)] -> The names of the memory modes, from the one that uses the most memory to the one that uses the least.
+     * MODE_SETTINGS [dict (constant)] -> What each memory mode sets: "full_frame_scale" (how many times smaller than captured "Camera" publishes "shared_dict's" "full_frame," which "manager_obj," the user interface, and the debug stream each hold a copy of) and "clip_seconds" (how many seconds of "ROI" "Camera's" clip recorder keeps before a warning).
+     * SAMPLE_INTERVAL [float (constant)] -> Every how many seconds the processes are sampled.
+     * RECOVERY_FRACTION [float (constant)] -> The fraction of "budget" that LaDD has to be back under before the memory mode is raised again.
+     * HOLD_TIME [float (constant)] -> The least number of seconds between two changes of the memory mode, so that the memory freed by one change is sampled before the next.
+     * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+     * budget [int] -> How many bytes the processes of LaDD may use together; None to only sample them.
+     * fixed_process_ids [dict] -> The IDs of LaDD's main.py and "manager_obj," by name, which are not started by "Supervisor" and so never change.
+     * mode_index [int] -> The index of the current memory mode in "MODES."
+     * last_sample_time {and} last_change_time [float] -> When the processes were last sampled, and when the memory mode was last changed, as given by "time.monotonic."
+     * usage [dict] -> The "memory" and "peak" (in bytes) of every process when it was last sampled, by name.
+     * peaks [dict] -> The largest "memory" and "peak" of every process since LaDD started, by name, over every restart of the process.
+     * peak_total [int] -> The largest memory of all of the processes together in any one sample.
+    
+    Methods:
+     * __init__ -> Instantiates the class and publishes the first memory mode.
+     * check -> Samples the processes once "SAMPLE_INTERVAL" has passed, and lowers or raises the memory mode.
+     * set_mode -> Changes the memory mode and publishes it in "shared_dict."
+     * report -> Prints the peak memory of every process, and of all of them together compared to "budget."
+     * read_memory [static] -> Returns the memory and peak RSS of a process, in bytes.
+    """
+    
+    MODES = ['full','reduced','minimal']
+    MODE_SETTINGS = {'full':{'full_frame_scale':1,'clip_seconds':5.0},
+                     'reduced':{'full_frame_scale':2,'clip_seconds':3.0},
+                     'minimal':{'full_frame_scale':4,'clip_seconds':1.0}}
+    SAMPLE_INTERVAL = 2.0
+    RECOVERY_FRACTION = 0.8
+    HOLD_TIME = 10.0
+    
+    def __init__(self, shared_dict, budget=None):
+        """
+        Instantiates the class and publishes the first memory mode; "shared_dict's" "process_ids" has to have been set by then.
+        
+        Arguments:
+         * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+         * budget [int] -> How many bytes the processes of LaDD may use together (optional).
+        """
+        
+        self.shared_dict = shared_dict
+        self.budget = budget
+        self.fixed_process_ids = dict(self.shared_dict['process_ids'])
+        self.mode_index = 0
+        self.last_sample_time = 0.0
+        self.last_change_time = time.monotonic()
+        self.usage = {}
+        self.peaks = {}
+        self.peak_total = 0
+        
+        self.set_mode(0)
+    
+    def check(self, process_ids):
+        """
+        Samples the processes once "SAMPLE_INTERVAL" has passed and publishes their memory as "shared_dict's" "memory," then lowers the memory mode if LaDD is over "budget," or raises it once LaDD is back under "RECOVERY_FRACTION" of it.
+        
+        Arguments:
+         * process_ids [dict] -> The IDs of the processes started by "Supervisor" that are running, by name.
+        """
+        
+        now = time.monotonic()
+        if now - self.last_sample_time < self.SAMPLE_INTERVAL:
+            return
+        self.last_sample_time = now
+        
+        self.usage = {}
+        for name, pid in list(self.fixed_process_ids.items()) + list(process_ids.items()):
+            memory, peak = self.read_memory(pid)
+            if memory is None:
+                continue
+            self.usage[name] = {'memory':memory,'peak':peak}
+            if name in self.peaks:
+                self.peaks[name] = {'memory':max(memory,self.peaks[name]['memory']),'peak':max(peak,self.peaks[name]['peak'])}
+            else:
+                self.peaks[name] = dict(self.usage[name])
+        total = sum(usage['memory'] for usage in self.usage.values())
+        self.peak_total = max(self.peak_total,total)
+        
+        if self.budget is not None and now - self.last_change_time >= self.HOLD_TIME:
+            if total > self.budget and self.mode_index < len(self.MODES)-1:
+                self.set_mode(self.mode_index+1)
+                self.last_change_time = now
+            elif total < self.RECOVERY_FRACTION*self.budget and self.mode_index > 0:
+                self.set_mode(self.mode_index-1)
+                self.last_change_time = now
+        self.shared_dict['memory'] = {'total':total,'budget':self.budget,'mode':self.MODES[self.mode_index],'processes':self.usage}
+    
+    def set_mode(self, mode_index):
+        """
+        Changes the memory mode and publishes it as "shared_dict's" "memory_mode," which "Camera" reads every few frames.
+        
+        Arguments:
+         * mode_index [int] -> The index of the new memory mode in "MODES."
+        """
+        
+        if mode_index != self.mode_index:
+            print('Memory mode: ' + self.MODES[mode_index] + '.')
+        self.mode_index = mode_index
+        self.shared_dict['memory_mode'] = self.MODES[mode_index]
+    
+    def report(self):
+        """
+        Prints the peak memory of every process, and of all of them together compared to "budget."
+        """
+        
+        budget = ' (budget: %.1f MB)' % (self.budget/1e6) if self.budget is not None else ''
+        print('Peak memory of LaDD: %.1f MB%s, last mode "%s".' % (self.peak_total/1e6, budget, self.MODES[self.mode_index]))
+        for name, peak in sorted(self.peaks.items()):
+            print(' * %s: %.1f MB (peak RSS %.1f MB)' % (name, peak['memory']/1e6, peak['peak']/1e6))
+    
+    @staticmethod
+    def read_memory(pid):
+        """
+        Returns the memory of a process (its PSS, or its RSS if the kernel does not give the PSS) and its peak RSS, from "/proc."
+        
+        Arguments:
+         * pid [int] -> The process ID.
+        
+        Return Arguments:
+         * memory [int] -> The memory of the process in bytes; None if the process has ended.
+         * peak [int] -> The peak RSS of the process in bytes; None if the process has ended.
+        """
+        
+        fields = {}
+        try:
+            with open('/proc/' + str(pid) + '/status') as status_file:
+                for line in status_file:
+                    if line.startswith('VmRSS:') or line.startswith('VmHWM:'):
+                        fields[line[:5]] = int(line.split()[1])*1024
+            with open('/proc/' + str(pid) + '/smaps_rollup') as smaps_file:
+                for line in smaps_file:
+                    if line.startswith('Pss:'):
+                        fields['Pss'] = int(line.split()[1])*1024
+        except (OSError, ValueError, IndexError):
+            pass
+        if 'VmRSS' not in fields:
+            return None, None
+        return fields.get('Pss',fields['VmRSS']), fields.get('VmHWM',fields['VmRSS'])
+
+class Allocation_Tracker:
+    """
+    Tracing is started for every process at once by LaDD's main.py's "--tracemalloc" option (or by the PYTHONTRACEMALLOC environment variable) before the processes are started; without it, "maybe_snapshot" costs one function call. A snapshot takes a fraction of a second per hundred thousand traced blocks, so it is only taken every "interval" seconds, and the time it took is written with it.
+    
+    Instance Variables:
+     * process_name [str] -> The name of the process, which the report file is named after.
+     * interval [float] -> Every how many seconds a snapshot is taken.
+     * top [int] -> How many lines of code are written per snapshot.
+     * path [str] -> The path of the report file, in "directory"; None until the first snapshot.
+     * directory [str] -> The directory the report file is written to.
+     * last_snapshot [tracemalloc.Snapshot] -> The previous snapshot, which the growth of every line of code is measured from; None before the first one.
+     * last_snapshot_time [float] -> When the last snapshot was taken, as given by "time.monotonic."
+    
+    Methods:
+     * __init__ -> Instantiates the class.
+     * maybe_snapshot -> Takes a snapshot and appends its top lines of code to the report file, if tracing and "interval" has passed since the last one.
+    """
+    
+    def __init__(self, process_name, interval=30.0, top=10, directory='profiles'):
+        """
+        Instantiates the class.
+        
+        Arguments:
+         * process_name [str] -> The name of the process.
+         * interval [float] -> Every how many seconds a snapshot is taken.
+         * top [int] -> How many lines of code are written per snapshot.
+         * directory [str] -> The directory the report file is written to.
+        """
+        
+        self.process_name = process_name
+        self.interval = interval
+        self.top = top
+        self.directory = directory
+        self.path = None
+        self.last_snapshot = None
+        self.last_snapshot_time = time.monotonic()
+    
+    def maybe_snapshot(self):
+        """
+        Takes a snapshot and appends to the report file the lines of code holding the most memory and those whose memory has grown the most since the previous snapshot, if tracing and "interval" has passed since the last one; called from the loop of the process.
+        """
+        
+        if not tracemalloc.is_tracing() or time.monotonic() - self.last_snapshot_time < self.interval:
+            return
+        start_time = time.perf_counter()
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False,tracemalloc.__file__)])
+        largest = snapshot.statistics('lineno')[:self.top]
+        growth = snapshot.compare_to(self.last_snapshot,'lineno')[:self.top] if self.last_snapshot is not None else []
+        self.last_snapshot = snapshot
+        self.last_snapshot_time = time.monotonic()
+        
+        if self.path is None:
+            os.makedirs(self.directory,exist_ok=True)
+            self.path = os.path.join(self.directory,time.strftime('allocations-' + self.process_name + '-%Y%m%d-%H%M%S.txt'))
+        current, peak = tracemalloc.get_traced_memory()
+        with open(self.path,'a') as report_file:
+            report_file.write('%s: %.1f MB traced (peak %.1f MB), snapshot took %.0f ms\n' % (time.strftime('%H:%M:%S'), current/1e6, peak/1e6, 1000*(time.perf_counter() - start_time)))
+            report_file.write('Largest:\n' + ''.join('  ' + str(statistic) + '\n' for statistic in largest))
+            if len(growth) > 0:
+                report_file.write('Grown most:\n' + ''.join('  ' + str(statistic) + '\n' for statistic in growth))
+            report_file.write('\n')
@@ -0,0 +1,230 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import bisect
+import os
+import time
+
+"""
+"metrics" Module:
+
+Packages Imported:
+ * bisect,
+ * os,
+ * time.
+
+Classes:
+ * Metrics -> Keeps the counters, gauges, and histograms of one of LaDD's processes in plain local variables, and publishes them to "shared_dict" about once per second, where "Debug_Stream" gathers the ones of every process and serves them as Prometheus text at "/metrics."
+"""
+
+class Metrics:
+    """
+    Updating a metric costs a dictionary lookup (and, for a histogram, a bisection of its buckets), with no locks and no inter-process communication; only "flush" goes through "shared_dict," once per "flush_interval," and the time that takes is itself recorded as "ipc_round_trip_seconds." The CPU time and memory of every process are not measured by the processes themselves, but read from /proc by "format_prometheus" when the metrics are served.
+    
+    Instance Variables:
+     * KEY_PREFIX [str (constant)] -> What the "shared_dict" key of the metrics of each process starts with, followed by "process_name."
+     * NAME_PREFIX [str (constant)] -> What the name of every metric starts with in the Prometheus text.
+     * DEFAULT_BUCKETS [tuple (constant)] -> The upper bounds, in seconds, of the buckets of a histogram not given any, which suit latencies from a millisecond to a few seconds.
+     * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+     * process_name [str] -> The name of the process the metrics belong to (e.g. "Camera"), which becomes the "process" label of every metric.
+     * flush_interval [float] -> The least number of seconds between two calls of "flush" made by "maybe_flush."
+     * counters [dict] -> The value of every counter, by name; by Prometheus' convention, their names end in "_total."
+     * gauges [dict] -> The value of every gauge, by name.
+     * histograms [dict] -> The [buckets, bucket counts, sum, count] of every histogram, by name; the count of a bucket is not cumulative, and the last one counts the values above every bound.
+     * last_flush_time [float] -> When "flush" was last called, as given by "time.monotonic."
+    
+    Methods:
+     * __init__ -> Instantiates the class with no metrics.
+     * increment -> Adds to a counter, creating it if needed.
+     * set_gauge -> Sets a gauge, creating it if needed.
+     * observe -> Adds a value to a histogram, creating it if needed.
+     * maybe_flush -> Calls "flush" if "flush_interval" has passed since the last time; cheap enough to be called on every iteration of a loop.
+     * flush -> Publishes a snapshot of the metrics to "shared_dict," and records how long that took.
+     * read_process_stats [static] -> Reads the CPU time and resident memory of a process from /proc.
+     * collect [static] -> Gathers the snapshots published by every process from "shared_dict."
+     * format_prometheus [static] -> Turns snapshots into the Prometheus text exposition format, adding the CPU time and resident memory of every process.
+    """
+    
+    KEY_PREFIX = 'metrics:'
+    NAME_PREFIX = 'ladd_'
+    DEFAULT_BUCKETS = (0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1.0,2.5)
+    
+    def __init__(self, shared_dict, process_name, flush_interval=1.0):
+        """
+        Instantiates the class with no metrics.
+        
+        Arguments:
+         * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+         * process_name [str] -> The name of the process the metrics belong to.
+         * flush_interval [float] -> The least number of seconds between two calls of "flush" made by "maybe_flush."
+        """
+        
+        self.shared_dict = shared_dict
+        self.process_name = process_name
+        self.flush_interval = flush_interval
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.last_flush_time = time.monotonic()
+    
+    def increment(self, name, amount=1):
+        """
+        Adds to a counter, creating it if needed.
+        
+        Arguments:
+         * name [str] -> The name of the counter.
+         * amount [float] -> What is added to it.
+        """
+        
+        self.counters[name] = self.counters.get(name,0) + amount
+    
+    def set_gauge(self, name, value):
+        """
+        Sets a gauge, creating it if needed.
+        
+        Arguments:
+         * name [str] -> The name of the gauge.
+         * value [float] -> Its new value.
+        """
+        
+        self.gauges[name] = value
+    
+    def observe(self, name, value, buckets=None):
+        """
+        Adds a value to a histogram, creating it if needed.
+        
+        Arguments:
+         * name [str] -> The name of the histogram.
+         * value [float] -> The value observed.
+         * buckets [tuple] -> The sorted upper bounds of the buckets of the histogram, only used when it is created; None for "DEFAULT_BUCKETS."
+        """
+        
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            bounds = buckets if buckets is not None else self.DEFAULT_BUCKETS
+            histogram = self.histograms[name] = [bounds,[0]*(len(bounds)+1),0.0,0]
+        histogram[1][bisect.bisect_left(histogram[0],value)] += 1
+        histogram[2] += value
+        histogram[3] += 1
+    
+    def maybe_flush(self):
+        """
+        Calls "flush" if "flush_interval" has passed since the last time; cheap enough to be called on every iteration of a loop.
+        """
+        
+        if time.monotonic() - self.last_flush_time >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        """
+        Publishes a snapshot of the metrics to "shared_dict," and records how long that took as "ipc_round_trip_seconds," which is then published by the next "flush."
+        """
+        
+        self.last_flush_time = time.monotonic()
+        snapshot = {'pid':os.getpid(),'time':time.time(),'counters':dict(self.counters),'gauges':dict(self.gauges),
+                    'histograms':{name:(histogram[0],list(histogram[1]),histogram[2],histogram[3]) for name, histogram in self.histograms.items()}}
+        self.shared_dict[self.KEY_PREFIX + self.process_name] = snapshot
+        self.observe('ipc_round_trip_seconds',time.monotonic() - self.last_flush_time)
+    
+    @staticmethod
+    def read_process_stats(pid):
+        """
+        Reads the CPU time and resident memory of a process from /proc.
+        
+        Arguments:
+         * pid [int] -> The process ID.
+        
+        Return Arguments:
+         * cpu_seconds [float] -> The CPU time the process has used, in user and kernel mode; None if the process is gone or /proc is missing.
+         * rss_bytes [int] -> The resident memory of the process in bytes; None along with "cpu_seconds."
+        """
+        
+        try:
+            with open('/proc/' + str(pid) + '/stat') as stat_file:
+                stat = stat_file.read()
+        except OSError:
+            return None, None
+        #The name of the process, in parentheses, may hold spaces, so the fields are counted from after it.
+        fields = stat[stat.rindex(')')+2:].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12]))/os.sysconf('SC_CLK_TCK')
+        rss_bytes = int(fields[21])*os.sysconf('SC_PAGE_SIZE')
+        return cpu_seconds, rss_bytes
+    
+    @staticmethod
+    def collect(shared_dict):
+        """
+        Gathers the snapshots published by every process from "shared_dict."
+        
+        Arguments:
+         * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+        
+        Return Arguments:
+         * snapshots [dict] -> The last snapshot published by every process, by the name of the process.
+        """
+        
+        return {key[len(Metrics.KEY_PREFIX):]:value for key, value in shared_dict.items() if isinstance(key,str) and key.startswith(Metrics.KEY_PREFIX)}
+    
+    @staticmethod
+    def format_prometheus(snapshots, process_ids=None):
+        """
+        Turns snapshots into the Prometheus text exposition format, adding the CPU time and resident memory of every process, and how many seconds old each snapshot is.
+        
+        Arguments:
+         * snapshots [dict] -> The snapshots returned by "collect."
+         * process_ids [dict] -> The IDs of processes that publish no snapshots of their own (e.g. "manager_obj"), by name (optional).
+        
+        Return Arguments:
+         * text [str] -> The metrics, grouped by name, each followed by its "process" label.
+        """
+        
+        families = {}
+        #"families" maps the name of every metric to its type and its lines, so that each "# TYPE" line is written once.
+        def add(name, kind, process_name, value, suffix='', labels=''):
+            family = families.setdefault(Metrics.NAME_PREFIX + name,(kind,[]))
+            family[1].append(Metrics.NAME_PREFIX + name + suffix + '{process="' + process_name + '"' + labels + '} ' + repr(float(value)))
+        
+        now = time.time()
+        pids = dict(process_ids) if process_ids is not None else {}
+        for process_name, snapshot in sorted(snapshots.items()):
+            pids[process_name] = snapshot['pid']
+            add('metrics_age_seconds','gauge',process_name,now - snapshot['time'])
+            for name, value in snapshot['counters'].items():
+                add(name,'counter',process_name,value)
+            for name, value in snapshot['gauges'].items():
+                add(name,'gauge',process_name,value)
+            for name, (bounds, counts, total, count) in snapshot['histograms'].items():
+                cumulative = 0
+                for bound, bucket_count in zip(list(bounds) + ['+Inf'],counts):
+                    cumulative += bucket_count
+                    add(name,'histogram',process_name,cumulative,'_bucket',',le="' + str(bound) + '"')
+                add(name,'histogram',process_name,total,'_sum')
+                add(name,'histogram',process_name,count,'_count')
+        for process_name, pid in sorted(pids.items()):
+            cpu_seconds, rss_bytes = Metrics.read_process_stats(pid)
+            if cpu_seconds is not None:
+                add('process_cpu_seconds_total','counter',process_name,cpu_seconds)
+                add('process_resident_memory_bytes','gauge',process_name,rss_bytes)
+        
+        lines = []
+        for full_name, (kind, samples) in families.items():
+            lines.append('# TYPE ' + full_name + ' ' + kind)
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,112 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+
+"""
+"notifier" Module:
+
+Packages Imported:
+ * os.
+
+Classes:
+ * Notifier -> A pipe through which "Camera" and "OBD" wake up the user interface when something it displays has changed, so that it does not have to poll "shared_dict."
+"""
+
+class Notifier:
+    """
+    Every notification is a single byte written to the pipe, which the user interface's process registers with tkinter's event loop; both ends of the pipe are non-blocking, so a process that notifies never waits on the user interface.
+    
+    Instance Variables:
+     * STATE [bytes (constant)] -> The notification sent when "shared_dict's" "crossed_lane," "crossed_divider," "nothing_detected," or "below_48kph" has changed.
+     * FRAME [bytes (constant)] -> The notification sent when "Camera" has published a new frame to "shared_dict."
+     * read_fd [int] -> The file descriptor of the end of the pipe that the user interface reads from.
+     * write_fd [int] -> The file descriptor of the end of the pipe that "Camera" and "OBD" write to.
+    
+    Methods:
+     * __init__ -> Instantiates the class and creates the pipe; it must be created before the processes are started so that they all inherit it.
+     * fileno -> Returns "read_fd," so that the class can be registered with tkinter like a file.
+     * notify -> Writes a notification to the pipe without waiting.
+     * drain -> Reads every notification waiting in the pipe without waiting.
+     * close -> Closes both ends of the pipe.
+    """
+    
+    STATE = b's'
+    FRAME = b'f'
+    
+    def __init__(self):
+        """
+        Instantiates the class and creates the pipe; it must be created before the processes are started so that they all inherit it.
+        """
+        
+        self.read_fd, self.write_fd = os.pipe()
+        os.set_blocking(self.read_fd,False)
+        os.set_blocking(self.write_fd,False)
+    
+    def fileno(self):
+        """
+        Returns "read_fd," so that the class can be registered with tkinter like a file.
+        
+        Return Arguments:
+         * read_fd [int] -> The file descriptor of the end of the pipe that the user interface reads from.
+        """
+        
+        return self.read_fd
+    
+    def notify(self, notification):
+        """
+        Writes a notification to the pipe without waiting.
+        
+        Arguments:
+         * notification [bytes] -> "STATE" or "FRAME."
+        """
+        
+        try:
+            os.write(self.write_fd,notification)
+        except BlockingIOError:
+            #The pipe is only full if the user interface has thousands of notifications waiting, so it will catch up on this change anyway.
+            pass
+    
+    def drain(self):
+        """
+        Reads every notification waiting in the pipe without waiting.
+        
+        Return Arguments:
+         * notifications [bytes] -> The notifications that were waiting, in the order they were sent; empty if there were none.
+        """
+        
+        notifications = b''
+        try:
+            chunk = os.read(self.read_fd,4096)
+            while chunk:
+                notifications += chunk
+                chunk = os.read(self.read_fd,4096)
+        except BlockingIOError:
+            pass
+        return notifications
+    
+    def close(self):
+        """
+        Closes both ends of the pipe.
+        """
+        
+        os.close(self.read_fd)
+        os.close(self.write_fd)
@@ -0,0 +1,306 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import serial
+import time
+
+"""
+"obd_sampler" Module:
+
+Packages Imported:
+ * serial,
+ * time.
+
+Classes:
+ * OBD_Sampler -> Samples several mode-01 OBD PIDs through an ELM327 adapter, each at its own rate, packing the PIDs that are due into as few requests as the adapter allows.
+"""
+
+class OBD_Sampler:
+    """
+    A mode-01 request can name up to six PIDs at once (e.g. "010D0C11") on CAN vehicles, which the ECU answers in a single, possibly multi-frame, response; on older protocols only the first PID is answered (or none at all), in which case "OBD_Sampler" falls back to one PID per request, trying several again every "REPROBE_INTERVAL" seconds. Over a 9600-baud link most of the time of a request is spent on the round trip rather than on the bytes, so every extra PID in a request is almost free.
+    
+    Instance Variables:
+     * PIDS [dict (constant)] -> Maps the names of the supported PIDs (as in python-obd's "obd.commands") to their PID number, the number of data bytes in their response, and how to decode those bytes into a value.
+     * MAX_PIDS_PER_REQUEST [int (constant)] -> The most PIDs the ELM327 allows in one request.
+     * SINGLE_FRAME_BYTES [int (constant)] -> The most data bytes of a response that fit in one CAN frame; a longer response comes in several frames, which a response count of one would cut short.
+     * MAX_FAILED_BATCHES [int (constant)] -> How many requests for several PIDs in a row have to go (partly) unanswered before "max_pids_per_request" is lowered to 1, so that one "NO DATA" does not give up on packing PIDs.
+     * REPROBE_INTERVAL [float (constant)] -> How many seconds after "max_pids_per_request" is lowered to 1 requests for several PIDs are tried again.
+     * INIT_COMMANDS [list (constant)] -> The AT commands sent before sampling: a warm start, so that no setting left by python-obd's "test_OBD_connection" (or anything else) is relied on, then echo, linefeeds, spaces, and headers off, so that responses are as short and as easy to parse as possible, and the protocol searched for automatically.
+     * connection [serial.Serial] -> The serial connection to the ELM327 (or any object with "write," "read_until," and "reset_input_buffer").
+     * rates [dict] -> How many times per second each PID is sampled; "float('inf')" means in every request.
+     * next_due [dict] -> When each PID is next due to be sampled, as given by "time.monotonic."
+     * batched_pids_per_request [int] -> How many PIDs are packed into one request when the adapter answers them all.
+     * max_pids_per_request [int] -> How many PIDs are packed into one request; lowered to 1 if the adapter does not answer all of the PIDs of "MAX_FAILED_BATCHES" requests in a row, and raised back to "batched_pids_per_request" at "reprobe_time."
+     * failed_batches [int] -> How many requests for several PIDs in a row have gone (partly) unanswered.
+     * reprobe_time [float] -> When requests for several PIDs are tried again, as given by "time.monotonic;" None while they are not lowered to 1.
+     * single_response [bool] -> Whether the expected number of responses (one) is appended to the requests whose response fits in one frame, which lets the ELM327 return as soon as the ECU has answered instead of waiting out its timeout; only adapters of version 1.3 and later understand it, so it is turned off as soon as the adapter answers "?" to it.
+     * requests_sent [int] -> How many requests have been sent.
+     * values_received [int] -> How many PID values have been received.
+     * metrics [interfaces.metrics.Metrics] -> Counts the requests for several PIDs that went unanswered, by reason, and how many times "max_pids_per_request" was lowered and raised again; None when nothing is measured.
+    
+    Methods:
+     * __init__ -> Instantiates the class, sends "INIT_COMMANDS," and checks whether the adapter understands the number of responses.
+     * open_serial [static] -> Opens a serial connection to an ELM327.
+     * send -> Sends a command and returns the lines of the response, up to the ">" prompt.
+     * request -> Requests several PIDs at once and returns their decoded values.
+     * parse_response [static] -> Turns the lines of a response to a mode-01 request into the data bytes of the response, joining the frames of a multi-frame response.
+     * decode_pids [static] -> Splits the data bytes of a response to a mode-01 request into the values of the PIDs in it.
+     * sample -> Requests the PIDs that are due and returns a timestamped sample record of their values.
+     * check_batch -> Lowers "max_pids_per_request" to 1 after "MAX_FAILED_BATCHES" requests for several PIDs in a row go (partly) unanswered, and raises it again at "reprobe_time."
+     * close -> Closes "connection."
+    """
+    
+    PIDS = {'ENGINE_LOAD':(0x04,1,lambda d: d[0]*100.0/255),
+            'COOLANT_TEMP':(0x05,1,lambda d: d[0]-40.0),
+            'RPM':(0x0C,2,lambda d: ((d[0]*256)+d[1])/4.0),
+            'SPEED':(0x0D,1,lambda d: float(d[0])),
+            'INTAKE_TEMP':(0x0F,1,lambda d: d[0]-40.0),
+            'THROTTLE_POS':(0x11,1,lambda d: d[0]*100.0/255),
+            'RELATIVE_ACCEL_POS':(0x5A,1,lambda d: d[0]*100.0/255)}
+    MAX_PIDS_PER_REQUEST = 6
+    SINGLE_FRAME_BYTES = 7
+    MAX_FAILED_BATCHES = 3
+    REPROBE_INTERVAL = 60.0
+    INIT_COMMANDS = ['ATWS','ATE0','ATL0','ATS0','ATH0','ATSP0']
+    
+    def __init__(self, connection, rates, max_pids_per_request=6, single_response=True, metrics=None):
+        """
+        Instantiates the class, sends "INIT_COMMANDS," and checks whether the adapter understands the number of responses.
+        
+        Arguments:
+         * connection [serial.Serial] -> The serial connection to the ELM327.
+         * rates [dict] -> How many times per second each PID in "PIDS" is sampled; "float('inf')" means in every request.
+         * max_pids_per_request [int] -> How many PIDs are packed into one request, at most "MAX_PIDS_PER_REQUEST"; 1 reproduces the one-query loop of python-obd.
+         * single_response [bool] -> Whether the expected number of responses is appended to the requests whose response fits in one frame, if the adapter understands it.
+         * metrics [interfaces.metrics.Metrics] -> Where the requests for several PIDs that went unanswered are counted (optional).
+        """
+        
+        self.connection = connection
+        self.rates = rates
+        self.next_due = {name:0.0 for name in rates}
+        self.batched_pids_per_request = min(max_pids_per_request,self.MAX_PIDS_PER_REQUEST)
+        self.max_pids_per_request = self.batched_pids_per_request
+        self.failed_batches = 0
+        self.reprobe_time = None
+        self.single_response = single_response
+        self.requests_sent = 0
+        self.values_received = 0
+        self.metrics = metrics
+        
+        for command in self.INIT_COMMANDS:
+            self.send(command)
+        #"ATWS" rather than "ATZ," as the LED test of a full reset can outlast the timeout of "open_serial's" connection.
+        if self.single_response and '?' in self.send('01001'):
+            self.single_response = False
+            #An adapter older than version 1.3 answers "?" to a request with the number of responses.
+    
+    @staticmethod
+    def open_serial(port, baudrate):
+        """
+        Opens a serial connection to an ELM327.
+        
+        Arguments:
+         * port [str] -> The serial port, such as "/dev/ttyUSB0."
+         * baudrate [int] -> The baud rate of the serial port.
+        
+        Return Arguments:
+         * connection [serial.Serial] -> The serial connection.
+        """
+        
+        return serial.Serial(port,baudrate,timeout=1.0)
+    
+    def send(self, command):
+        """
+        Sends a command and returns the lines of the response, up to the ">" prompt.
+        
+        Arguments:
+         * command [str] -> The command, without the carriage return.
+        
+        Return Arguments:
+         * lines [list] -> The non-empty lines of the response.
+        """
+        
+        self.connection.reset_input_buffer()
+        self.connection.write(command.encode() + b'\r')
+        response = self.connection.read_until(b'>').decode(errors='replace')
+        return [line.strip() for line in response.replace('>','').replace('\n','\r').split('\r') if line.strip() != '']
+    
+    def request(self, names):
+        """
+        Requests several PIDs at once and returns their decoded values.
+        
+        Arguments:
+         * names [list] -> The names of the PIDs in "PIDS," at most "max_pids_per_request" of them.
+        
+        Return Arguments:
+         * values [dict] -> The decoded values, keyed by name; PIDs that were not answered are left out.
+        """
+        
+        command = '01' + ''.join('%02X' % self.PIDS[name][0] for name in names)
+        response_length = 1 + sum(1+self.PIDS[name][1] for name in names)
+        response_count = '1' if self.single_response and response_length <= self.SINGLE_FRAME_BYTES else ''
+        self.requests_sent += 1
+        lines = self.send(command + response_count)
+        if '?' in lines and response_count != '':
+            self.single_response = False
+            self.requests_sent += 1
+            lines = self.send(command)
+        values = self.decode_pids(self.parse_response(lines))
+        self.values_received += len(values)
+        return values
+    
+    @staticmethod
+    def parse_response(lines):
+        """
+        Turns the lines of a response to a mode-01 request into the data bytes of the response, joining the frames of a multi-frame response.
+        
+        A multi-frame response starts with a line holding its length in bytes (e.g. "00A"), followed by frames numbered "0:," "1:," and so on, the last of which is padded.
+        
+        Arguments:
+         * lines [list] -> The lines of the response, as returned by "send."
+        
+        Return Arguments:
+         * data [bytes] -> The data bytes of the response, starting with 0x41; empty if there was no answer (e.g. "NO DATA").
+        """
+        
+        length = None
+        hex_digits = ''
+        for line in lines:
+            line = line.replace(' ','')
+            if len(line) == 3 and length is None and hex_digits == '':
+                try:
+                    length = int(line,16)
+                except ValueError:
+                    pass
+                continue
+            if ':' in line:
+                line = line.split(':',1)[1]
+            if all(c in '0123456789ABCDEFabcdef' for c in line):
+                hex_digits += line
+        
+        try:
+            data = bytes.fromhex(hex_digits[:len(hex_digits)//2*2])
+        except ValueError:
+            return b''
+        return data[:length] if length is not None else data
+    
+    @staticmethod
+    def decode_pids(data):
+        """
+        Splits the data bytes of a response to a mode-01 request into the values of the PIDs in it.
+        
+        Arguments:
+         * data [bytes] -> The data bytes of the response, as returned by "parse_response."
+        
+        Return Arguments:
+         * values [dict] -> The decoded values, keyed by the names in "PIDS."
+        """
+        
+        names = {pid:(name,length,decode) for name, (pid, length, decode) in OBD_Sampler.PIDS.items()}
+        values = {}
+        i = 0
+        while i < len(data):
+            if data[i] == 0x41:
+                #The start of the response of another ECU, or of another single-PID response.
+                i += 1
+                continue
+            if data[i] not in names:
+                break
+            name, length, decode = names[data[i]]
+            if i+1+length > len(data):
+                break
+            values[name] = decode(data[i+1:i+1+length])
+            i += 1+length
+        return values
+    
+    def sample(self):
+        """
+        Requests the PIDs that are due and returns a timestamped sample record of their values.
+        
+        The PIDs are packed into requests of at most "max_pids_per_request," most overdue first, which "check_batch" lowers to 1 if the adapter or the vehicle's protocol turns out not to allow several PIDs in one request.
+        
+        Return Arguments:
+         * sample_record [dict] -> The values of the PIDs that were sampled, keyed by name, plus "time," which is halfway between sending the request and receiving its response as given by "time.monotonic" (the best estimate of when the ECU read the values).
+        """
+        
+        now = time.monotonic()
+        self.check_batch(None,None,now)
+        due = sorted([name for name in self.rates if self.next_due[name] <= now],key=lambda name: self.next_due[name])
+        if len(due) == 0:
+            time.sleep(max(0.0,min(self.next_due.values()) - now))
+            now = time.monotonic()
+            due = sorted([name for name in self.rates if self.next_due[name] <= now],key=lambda name: self.next_due[name])
+        names = due[:self.max_pids_per_request]
+        
+        values = self.request(names)
+        received_time = time.monotonic()
+        self.check_batch(names,values,received_time)
+        
+        for name in names:
+            #A PID that could not keep its rate is sampled again as soon as possible rather than trying to catch up.
+            self.next_due[name] = max(self.next_due[name] + (1.0/self.rates[name]),now)
+        values['time'] = (now + received_time)/2
+        return values
+    
+    def check_batch(self, names, values, now):
+        """
+        Lowers "max_pids_per_request" to 1 after "MAX_FAILED_BATCHES" requests for several PIDs in a row go (partly) unanswered, and raises it again at "reprobe_time."
+        
+        Only the first PID of a request being answered, or none of them (e.g. "?" or "NO DATA"), is how older protocols and adapters treat a request for several; a single such answer can as well be a vehicle busy for a moment, hence "MAX_FAILED_BATCHES." After "REPROBE_INTERVAL," the next request for several PIDs that goes unanswered lowers "max_pids_per_request" to 1 again straight away.
+        
+        Arguments:
+         * names [list] -> The names of the PIDs that were requested; None to only check "reprobe_time."
+         * values [dict] -> The decoded values of the request, as returned by "request."
+         * now [float] -> The current time, as given by "time.monotonic."
+        """
+        
+        if self.reprobe_time is not None and now >= self.reprobe_time:
+            self.max_pids_per_request = self.batched_pids_per_request
+            self.failed_batches = self.MAX_FAILED_BATCHES - 1
+            self.reprobe_time = None
+            if self.metrics is not None:
+                self.metrics.increment('obd_batch_reprobes_total')
+        if names is None or len(names) < 2:
+            return
+        
+        if list(values) == []:
+            reason = 'no_pids'
+        elif list(values) == [names[0]]:
+            reason = 'first_pid_only'
+        else:
+            self.failed_batches = 0
+            return
+        self.failed_batches += 1
+        if self.metrics is not None:
+            self.metrics.increment('obd_failed_batches_%s_total' % reason)
+        if self.failed_batches >= self.MAX_FAILED_BATCHES:
+            self.max_pids_per_request = 1
+            self.failed_batches = 0
+            self.reprobe_time = now + self.REPROBE_INTERVAL
+            if self.metrics is not None:
+                self.metrics.increment('obd_batch_downgrades_%s_total' % reason)
+    
+    def close(self):
+        """
+        Closes "connection."
+        """
+        
+        self.connection.close()
@@ -0,0 +1,789 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import cv2
+import concurrent.futures
+import time
+from interfaces import lane_tracker, roi_band
+
+"""
+"pipeline" Module:
+
+Packages Imported:
+ * numpy (as np),
+ * cv2,
+ * concurrent.futures,
+ * time,
+ * interfaces.lane_tracker,
+ * interfaces.roi_band.
+
+Classes:
+ * Detection -> What "Pipeline" detected in one frame and what it decided from it.
+ * Pipeline -> LaDD's lane detection, from a frame to the "state" of the vehicle, with no camera, processes, or "shared_dict" involved, so that it can be run on any frames from any program; "Camera" drives it with the Pi Camera Module V2.
+"""
+
+class Detection:
+    """
+    Instance Variables:
+     * frame_time [float] -> The time the frame was given to "Pipeline" at, in seconds.
+     * state [str] -> The "state" of the vehicle ("in_lane," "out_lane," "no_lane," "over_divider," or "undetermined").
+     * new_state [bool] -> Whether "state" is different from the previous frame's.
+     * warning_flags [tuple] -> The ("crossed_divider," "crossed_lane," "nothing_detected") flags the frame calls for; None if they are to stay as they were (such as while "state" has only just changed).
+     * lines_found [bool] -> Whether any lines were found in "ROI."
+     * decided [bool] -> Whether "state" was determined from the lines found, rather than set to "no_lane" for want of them or of a calibrated vehicle width.
+     * gate [str] -> What "gate_frame" decided for the frame ("detected," "empty," or "reused").
+     * x_coors_of_lines [list] -> The sorted x-coordinates of the lines found in "WarpedROI."
+     * lane_lines [list] -> Those of "x_coors_of_lines" that form a "lane" in this frame alone.
+     * lane [list] -> "avrg_lane_x1" and "avrg_lane_x2" (each may be None).
+     * divider [list] -> "avrg_divider_x1" through "avrg_divider_x4" (each may be None).
+     * vehicle [list] -> "avrg_vehicle_width_x_coors" (may be empty).
+     * lane_offsets_ahead [dict] -> The "offset" of every band in "lookahead_bands," by name.
+    
+    Methods:
+     * __init__ -> Instantiates the class.
+    """
+    
+    def __init__(self, frame_time, state, new_state, warning_flags, lines_found, decided, gate, x_coors_of_lines, lane_lines, lane, divider, vehicle, lane_offsets_ahead):
+        """
+        Instantiates the class.
+        
+        Arguments:
+         * frame_time {through} lane_offsets_ahead -> The instance variables of the same names.
+        """
+        
+        self.frame_time = frame_time
+        self.state = state
+        self.new_state = new_state
+        self.warning_flags = warning_flags
+        self.lines_found = lines_found
+        self.decided = decided
+        self.gate = gate
+        self.x_coors_of_lines = x_coors_of_lines
+        self.lane_lines = lane_lines
+        self.lane = lane
+        self.divider = divider
+        self.vehicle = vehicle
+        self.lane_offsets_ahead = lane_offsets_ahead
+
+class Pipeline:
+    """
+    A "Pipeline" holds everything that carries over from one frame to the next (the averages, the trackers, the vehicle-width calibration, etc.), so one instance is used per stream of frames. Its parameters are plain instance variables that the driver sets before each frame, as "Camera" does from "shared_dict."
+    
+    Instance Variables:
+     * AVERAGE_LANE_WIDTH [int (constant)] -> The average width of a lane in the US in meters.
+     * HISTOGRAM_MIN_ROWS [int (constant)] -> How many of the 60 pixels of a column of "WarpedROI" have to be white for "find_lines_by_histogram" to count the column as part of a line.
+     * TRACKING_BAND_HALF_WIDTH [int (constant)] -> How many pixels to either side of a line predicted from the previous frames "find_lines" searches when tracking.
+     * FULL_SEARCH_INTERVAL [int (constant)] -> Every how many frames "find_lines" searches all of "WarpedROI" even while tracking, so that lines that have newly come into view are picked up.
+     * GATE_MIN_FOREGROUND [int (constant)] -> The fewest white pixels "WarpedROI" can have for a line to be found in it; a line needs at least "HISTOGRAM_MIN_ROWS" of them (and "cv2.HoughLinesP" at least 30), so with fewer "gate_frame" skips the detection engine.
+     * GATE_THUMBNAIL_SIZE [tuple (constant)] -> The (width,height) that "WarpedROI" is shrunk to for "gate_frame" to compare it with the last frame the detection engine was run on.
+     * GATE_MAX_DIFFERENCE [float (constant)] -> The greatest mean difference, in grey levels, between the thumbnails of "WarpedROI" and of the last frame the detection engine was run on for "gate_frame" to reuse that frame's lines.
+     * GATE_MAX_REUSES [int (constant)] -> How many frames in a row may reuse the lines of the last frame the detection engine was run on before it is run again anyway.
+     * LOOKAHEAD_BANDS [list (constant)] -> The default (name, row offset, first row for warping) of every "ROI_Band" looked through besides "ROI"; the row offset is from the top of "ROI," so a negative one is further up the road.
+     * LOOKAHEAD_OFFSET_LIMIT [float (constant)] -> How far, in lane widths, the vehicle may be from the middle of the lane seen in a band for it to still be in that lane (half a lane width less some room for the vehicle itself).
+     * binary_threshold [int] -> The lower end of the binary threshold applied to "ROI" (what "shared_dict's" "binary_threshold_value_lower_end" is to "Camera").
+     * first_row_for_warping [int] -> The row of "ROI" that is warped to the whole height of "WarpedROI" (what "shared_dict's" "first_row_for_warping" is to "Camera").
+     * vehicle_width [float] -> The width of the vehicle in meters (what "shared_dict's" "vehicle_width" is to "Camera").
+     * morphology [bool] -> Whether "WarpedROI" is "opened," which "Camera" turns off when its frame-rate governor asks it to.
+     * decisions_enabled [bool] -> Whether "state" is determined at all; "Camera" turns it off while the vehicle is below its "SPEED_THRESHOLD."
+     * camera_res [list] -> The set resolution of the Pi Camera Module V2 in [width,height] (needs to be at least 320x80, as that is the size of "ROI").
+     * row_slice {and} col_slice [list] -> The "range" of rows and columns in the captured, unprocesseed frame that make up the Region of Interest frame.
+     * ROI [np.ndarray] -> The frame that is derived from the frame given to "process" using "row_slice" and "col_slice," or the frame given to "process_ROI"; it is never written to, so it may be a read-only view.
+     * BinaryROI [np.ndarray] -> The grey, binary-thresholded version of "ROI" that is warped into "WarpedROI."
+     * WarpedROI [np.ndarray] -> The frame that is derived from "BinaryROI" by using the "cv2.warpPerspective" method with "M" as an argument.
+     * CannyROI [np.ndarray] -> The frame that is derived from "WarpedROI" by using the "cv2,Canny" method.
+     * HoughROI [np.ndarray] -> The frame that is dervied from "CannyROI" by drawing the "Hough lines" found using the "cv2.HoughLinesP" method stored in "lines" onto "CannyROI."
+     * pts1 {and} pts2 [np.ndarray] -> Two sets of for coresponding points of "ROI" before (pts1) and after (pts2) sent into "cv2.getPerspectiveTransform," with its outcome saved in "M."
+     * M [np.ndarray] -> The result of running "cv2.getPerspectiveMapping" with "pts1" an "pts2" as arguments.
+     * kernel [np.ndarray] -> The "structuring argument" passed into "cv2.morphologyEx" that is used on "WarpedROI" to "open" the image.
+     * lines [np.ndarray] -> The lines found using "cv2.HoughLinesP" on "CannyROI," or, with the "histogram" "detection_engine," the x-coordinates of the edges of the stripes found in "WarpedROI"; None if nothing was found.
+     * detection_engine [str] -> How "lines" are found: "hough" (Canny Edge Detection then the Probabilistic Hough Transformation) or "histogram" (a column histogram of "WarpedROI"); "Camera" sets it from "shared_dict's" "detection_engine."
+     * tracking_enabled [bool] -> Whether "find_lines" restricts its search to column bands around the lines found in the previous frames.
+     * frames_since_full_search [int] -> The number of frames since "find_lines" last searched all of "WarpedROI."
+     * gating_enabled [bool] -> Whether "find_line_x_coors" lets "gate_frame" skip the detection engine on frames whose result is predictable.
+     * gate_thumbnail [np.ndarray] -> The thumbnail of the last frame the detection engine was run on; None if there is none to compare with.
+     * gate_lines {and} gate_x_coors {and} gate_hough_roi -> The "lines," "avrg_x_coor_of_lines," and "HoughROI" of the last frame the detection engine was run on, which are reused by the frames that "gate_frame" finds unchanged.
+     * gate_engine [str] -> The "detection_engine" of the last frame the detection engine was run on; lines found by another engine are not reused.
+     * gate_reuses [int] -> How many frames in a row have reused the lines of the last frame the detection engine was run on.
+     * gate [str] -> What "gate_frame" decided for the current frame ("detected," "empty," or "reused").
+     * gate_counts [dict] -> How many frames have been "detected" (run through the detection engine), "empty" (skipped for having too few white pixels), and "reused" (skipped for being unchanged).
+     * avrg_x_coor_of_lines [list] -> The averages of the x-coordinates of the endpoints of the lines in "lines," which are displayed as vertical lines on "HoughROI" in green.
+     * avrg_x_coor_of_lane_lines [list] -> Those average x-coordinates from "avrg_x_coor_of_lines" that form the "lane" on the road; if length equals 2, then both sides of a lane can be "seen"; if length equals 1, then one side of a lane can be "seen", and the vehicle is most likely crossing a lane; if length equals 0, then nothingis detected.
+     * avrg_x_coor_of_divider_lines [list] -> Those average x-ccordinates from "avrg_x_coor_of_lines" that form the "divider" on the road; if length equals 4, then the entire divider can be "seen," but if otherwise then not the entire divider, if any of it, can be "seen." 
+     * frames_taken [int] -> The number of frames taken since LaDD has been turned on; this is supposed to act as a buffer of sorts to prevent early, messy images from ruining averages and other calculated instance variables vital to LaDD's accuracy. When this variable equals 30, it is not incremented anymore and is "forgotten."
+     * buffer_of_lane_frames [list] -> The "queue-like" list of the "avrg_x_coor_of_lane_lines" of frames, with index 0 being the newest "avrg_x_coor_lane_lines" value and the last one being removed when another value is added to the "front" of the list. This list is used to produce an "average" frame using multiple frames to determine where the vehicle is on the road in terms of its position in relation of "lane lines."
+     * buffer_of_divider_frames [list] -> Like "buffer_of_lane_frames," except it stores the "avrg_x_coors_of_divider_lines" of frames. This list is used to produce an "average" frame using multiple frames to determine where the vehicle is on the road in terms of its position in relation of "divider lines."
+     * state [str] -> The "state" of the vehicle ("in_lane," "out_lane," "no_lane," "over_divider") of the vehicle, determined on a frame-by-frame basis.
+     * previous_state [str] -> The previous "state" of the vehicle determined from the last frame before the current one.
+     * lane_frames_to_avrg [list] -> Assigned to and used in the "calculate_lane_avrg" and "calculate_lane_line_avrg" methods, depending on what is "available" in "buffer_of_lane_frames," they are the values in the "buffer_of_lane_frames" to average that result in the average x-coordinates of "lane lines" that are used in determining the "state" and are displayed on the "HoughROI" in blue.
+     * divider_frames_to_avrg [list] -> Assigned to and used in "calculate_divider_avrg," they are the values in the "buffer_of_divider_frames" to average that result in the average x-coordinates of "divider lines" that are used in determining the "state" and are displayed on the "HoughROI" in orange.
+     * avrg_lane_x1 {and} avrg_lane_x2 [int] -> Represent the x-coordinates averaged from "lane_frames_to_avrg"; if both do not equal None, then LaDD has "seen" a complete lane, and "avrg_lane_x1" and "avrg_lane_x2" are the left and right lines of that lane, respectively; if only "avrg_lane_x2" equals None, then LaDD thinks it has seen one line of a lane and "avrg_lane_x1" is that value; if both equal None, then LaDD has detected nothing..
+     * avrg_divider_x1 {through} avrg_divider_x4 [int] -> Represent the x-coordinatesa avereage from "divider_frames_to_avrg"; if all do not equal None, then LaDD has seen a complete divider, and "avrg_lane_x1-4" are the first, second, third, and fourth lines of the divider from left to right; if all equal None, then LaDD has detected nothing.
+     * smoothing [str] -> How "avrg_lane_x1/2" and "avrg_divider_x1-4" are calculated: "kalman" (with "lane_tracker" and "divider_tracker") or "average" (the average of the last four frames in "buffer_of_lane_frames" and "buffer_of_divider_frames").
+     * lane_tracker {and} divider_tracker [interfaces.lane_tracker.Lane_Tracker] -> Constant-velocity Kalman filters tracking the two lines of a lane and the four lines of the divider, which predict through frames in which the lines are missed and react to a change within one frame.
+     * previous_frame_time [float] -> The time given to "process" for the previous frame; None before the first frame.
+     * meter_per_pixel [float] -> The meters-per-pixel calculated with "AVERAGE_LANE_WIDTH" and "avrg_lane_x1/2" (when the latter do not equal None) that used to find "vehicle_pixel_width."
+     * vehicle_pixel_width [float] -> The width in pixels of the vehicle in "HoughROI."
+     * vehicle_width_x_coors [list] -> The x-coordinates of the sides of the vehicle on a frame-by-frame basis.
+     * count_for_averaging [int] -> The count to conduct a running average on "avrg_vehicle_width_x_coors" using each average frames' "vehicle_width_x_coors." When it equals to 1000, it is set to 1 for two reasons: one, if LaDD is run for a long time, without setting it to a small number, it would eventually grow in size and take up a vast amount of precious memory; two, by "reseting" to a degree the running average, it can allow for a recalculation of the "avrg_vehicle_width_x_coors" that could make its values more accurate.
+     * avrg_vehicle_width_x_coors [list] -> The average x-coordinates of the sides of the vehicle.
+     * lookahead_bands [list] -> The "ROI_Bands" looked through besides "ROI" (none that do not fit in "camera_res"). They never warn the driver earlier than "ROI" would: all they decide is that a frame with no lines in "ROI" is still "in_lane" rather than "no_lane," which keeps "nothing_detected" from being set while the lane is only hidden close up (e.g. by worn paint or a car merging in front).
+     * band_executor [concurrent.futures.Executor] -> The thread pool that processes "lookahead_bands" while "ROI" is processed; None to process them one after another ("Camera's" "begin" hands it a thread pool, as one cannot be handed to another process).
+     * lane_offsets_ahead [dict] -> The "offset" of every band in "lookahead_bands," by name, from the last frame.
+    
+    Methods:
+     * __init__ -> Instantiates the class with nothing detected yet.
+     * process -> Processes a whole frame: cuts "ROI" out of it, looks through "lookahead_bands," and returns what was detected and decided.
+     * process_ROI -> Processes "ROI" alone (or together with "lookahead_bands" if the whole frame is given), returning what was detected and decided.
+     * process_many -> Processes the frames of an iterable one at a time, yielding a "Detection" for each.
+     * draw_avrgs -> Draws the averaged divider (orange), lane (blue), and vehicle (red) x-coordinates onto "HoughROI."
+     * calculate_avrg_vehicle_width_x_coors -> Calculates the vehicle's sides' average x-coordinates via a running average.
+     * calculate_lane_line_avrg -> Called by "calculate_lane_avrg" if the two sides of a lane had not be detected, it atempts to average all lists with a length of 1 in "buffer_of_lane_frames," which are considered to be one side of a lane, else both "avrg_lane_x1/2" are set to None.
+     * calculate_lane_avrg -> Attempts to average all of the lists with a length of 2 in "buffer_of_lane_frames," which are considered to be the two sides of a lane, else calls "calculate_lane_line_avrg."
+     * calculate_divider_avrg -> Attempts to average all of the lists with a length of 4 in "buffer_of_divider_frames," which are considered to be the four lines of an entire divider, else "avrg_divider_x1-4" are set to None.
+     * warp_ROI -> Turns "ROI" into the grey, binary-thresholded "BinaryROI," then warps it into the top-down "WarpedROI," which is "opened" while "morphology" is True.
+     * get_tracking_bands -> Returns the column bands of "WarpedROI" around the lane and divider lines averaged from the previous frames, merging those that overlap.
+     * find_lines -> Applies Canny Edge Detection then the Probabilistic Hough Transformation on "WarpedROI," restricted to the bands from "get_tracking_bands" while tracking, and falling back to all of "WarpedROI" when the track is lost.
+     * find_lines_by_histogram -> Finds the edges of the near-vertical stripes in "WarpedROI" from a histogram of how many of the pixels in each of its columns are white, storing them in "lines."
+     * gate_frame -> Decides from the number of white pixels in "WarpedROI" and a thumbnail of it whether the detection engine has to be run on the current frame, or whether it is "empty" or can reuse the lines of the last frame it was run on.
+     * find_line_x_coors -> Finds "lines" with "detection_engine" (unless "gate_frame" skips it), then fills "avrg_x_coor_of_lines" with their sorted x-coordinates (unless there are more than 8 of them) and draws them in green on "HoughROI."
+     * classify_lines -> Sorts the x-coordinates in "avrg_x_coor_of_lines" into those that form a "lane" ("avrg_x_coors_of_lane_lines") and those that form the "divider" ("avrg_x_coors_of_divider_lines"), going by the gaps between them.
+     * calculate_avrgs -> Calculates "avrg_lane_x1/2" and "avrg_divider_x1-4" either with "lane_tracker" and "divider_tracker" or with the average of the last four frames, depending on "smoothing."
+     * calculate_tracked_avrgs -> Predicts the lane and divider lines with "lane_tracker" and "divider_tracker," corrects them with the lines detected in the current frame, and sets "avrg_lane_x1/2" and "avrg_divider_x1-4" to where they are tracked to be.
+     * process_lookahead_bands -> Processes every band in "lookahead_bands," on "band_executor" if there is one, returning the futures of their "offsets."
+     * determine_state_ahead -> Determines the "state" of the vehicle from the lanes seen in "lookahead_bands," for frames in which no lines are found in "ROI."
+     * determine_state -> Determines the "state" of the vehicle ("in_lane," "out_lane," "over_divider," or "no_lane") from where the sides of the vehicle are in relation to the averaged lane and divider lines.
+    """
+    
+    def __init__(self, camera_res, binary_threshold=130, first_row_for_warping=47, vehicle_width=2.0066, detection_engine='hough', smoothing='kalman', lookahead_bands=None):
+        """
+        Instantiates the class with nothing detected yet.
+        
+        Arguments:
+         * camera_res [list] -> The resolution of the frames in [width,height] (needs to be at least 320x80, as that is the size of "ROI").
+         * binary_threshold [int] -> The lower end of the binary threshold applied to "ROI."
+         * first_row_for_warping [int] -> The row of "ROI" that is warped to the whole height of "WarpedROI."
+         * vehicle_width [float] -> The width of the vehicle in meters.
+         * detection_engine [str] -> How "lines" are found ("hough" or "histogram").
+         * smoothing [str] -> How the lane and divider lines are smoothed ("kalman" or "average").
+         * lookahead_bands [list] -> The (name, row offset, first row for warping) of every band to look through besides "ROI"; None for "LOOKAHEAD_BANDS," or an empty list for none.
+        """
+        
+        self.AVERAGE_LANE_WIDTH = 3
+        #3.048 is exactly 10 feet.
+        self.HISTOGRAM_MIN_ROWS = 20
+        self.TRACKING_BAND_HALF_WIDTH = 24
+        self.FULL_SEARCH_INTERVAL = 15
+        self.GATE_MIN_FOREGROUND = 20
+        self.GATE_THUMBNAIL_SIZE = (40,8)
+        self.GATE_MAX_DIFFERENCE = 1.5
+        self.GATE_MAX_REUSES = 5
+        self.LOOKAHEAD_BANDS = [('far',-60,30)]
+        self.LOOKAHEAD_OFFSET_LIMIT = 0.35
+        
+        self.binary_threshold = binary_threshold
+        self.first_row_for_warping = first_row_for_warping
+        self.vehicle_width = vehicle_width
+        self.morphology = True
+        self.decisions_enabled = True
+        
+        self.camera_res = camera_res
+        self.row_slice = [(self.camera_res[1]/2)-30,(self.camera_res[1]/2)+30]
+        self.col_slice = [(self.camera_res[0]/2)-160,(self.camera_res[0]/2)+160]
+        
+        self.ROI = []
+        #ROI = Region Of Interest.
+        self.BinaryROI = []
+        #BinaryROI = Grey, binary-thresholded "ROI."
+        self.WarpedROI = []
+        #WarpedROI = Perspective Transformation applied on "BinaryROI."
+        self.CannyROI = []
+        #CannyROI = Canny Edge Detection applied on "WarpedROI."
+        self.HoughROI = []
+        #HoughROI = Probabilistic Hough Lines Transformation applied to "CannyROI," and lines returned as a result are drawn on "HoughROI."
+        
+        self.pts1 = []
+        #pts1 = (column,row) coordinates of the unwarped "ROI"
+        self.pts2 = np.float32([[0,0],[320,0],[0,60],[320,60]])
+        #pts2 = (column,row) coordinates of where pts1 are to be in the newly warped "WarpedROI."
+        self.M = 0
+        #M = result of cv2.getPerspectiveTransform for warping "ROI."
+        self.kernel = np.ones((5,5),np.uint8)
+        #kernel used in "opening" "WarpedROI."
+        
+        self.lines = 0
+        #Lines return from Probabilistic Hough Transformation.
+        self.detection_engine = detection_engine
+        self.tracking_enabled = True
+        self.frames_since_full_search = 0
+        self.gating_enabled = True
+        self.gate_thumbnail = None
+        self.gate_lines = None
+        self.gate_x_coors = []
+        self.gate_hough_roi = []
+        self.gate_engine = None
+        self.gate_reuses = 0
+        self.gate = 'detected'
+        self.gate_counts = {'detected':0,'empty':0,'reused':0}
+        
+        self.avrg_x_coor_of_lines = []
+        self.avrg_x_coors_of_lane_lines = []
+        self.avrg_x_coors_of_divider_lines = []
+        
+        self.frames_taken = 0
+        self.buffer_of_lane_frames = [[],[],[],[]]
+        self.buffer_of_divider_frames = [[],[],[],[]]
+        
+        self.state = None
+        #state = the "state" ('in_lane','out_lane," "no_lane," over_divider," "undetermined") of the vehicle. "undetermined" is a temporary state which is shortly replaced by either "in_lane," "out_lane," or "no_lane."
+        self.previous_state = None
+        self.lane_frames_to_avrg = []
+        self.divider_frames_to_avrg = []
+        
+        self.avrg_lane_x1 = 0
+        self.avrg_lane_x2 = 0
+        self.avrg_divider_x1 = 0
+        self.avrg_divider_x2 = 0
+        self.avrg_divider_x3 = 0
+        self.avrg_divider_x4 = 0
+        
+        self.smoothing = smoothing
+        self.lane_tracker = lane_tracker.Lane_Tracker(2,320)
+        self.divider_tracker = lane_tracker.Lane_Tracker(4,320)
+        self.previous_frame_time = None
+        
+        self.meter_per_pixel = 0
+        self.vehicle_pixel_width = 0
+        
+        self.vehicle_width_x_coors = [0,0]
+        self.count_for_averaging = 0
+        self.avrg_vehicle_width_x_coors = []
+        
+        bands = [roi_band.ROI_Band(name,self.camera_res,row_offset,first_row) for name, row_offset, first_row in (self.LOOKAHEAD_BANDS if lookahead_bands is None else lookahead_bands)]
+        self.lookahead_bands = [band for band in bands if band.fits(self.camera_res)]
+        self.band_executor = None
+        self.lane_offsets_ahead = {}
+    
+    def process(self, frame, frame_time=None):
+        """
+        Processes a whole frame: cuts "ROI" out of it, looks through "lookahead_bands," and returns what was detected and decided.
+        
+        Arguments:
+         * frame [np.ndarray] -> The whole BGR frame, of "camera_res."
+         * frame_time [float] -> The time of the frame in seconds, from which the time between frames is taken; None for "time.perf_counter."
+        
+        Return Arguments:
+         * detection [Detection] -> What was detected in the frame and decided from it.
+        """
+        
+        roi = frame[int(self.row_slice[0]):int(self.row_slice[1]),int(self.col_slice[0]):int(self.col_slice[1])]
+        return self.process_ROI(roi,frame_time,frame)
+    
+    def process_ROI(self, roi, frame_time=None, frame=None):
+        """
+        Processes "ROI" alone (or together with "lookahead_bands" if the whole frame is given), returning what was detected and decided.
+        
+        Arguments:
+         * roi [np.ndarray] -> The BGR "ROI" of the frame, such as a frame of an interfaces.footage_cache.Footage_Cache.
+         * frame_time [float] -> The time of the frame in seconds; None for "time.perf_counter."
+         * frame [np.ndarray] -> The whole frame that "roi" was cut out of, which "lookahead_bands" are cut out of; None to leave them out.
+        
+        Return Arguments:
+         * detection [Detection] -> What was detected in the frame and decided from it.
+        """
+        
+        if frame_time is None:
+            frame_time = time.perf_counter()
+        dt = frame_time - self.previous_frame_time if self.previous_frame_time is not None else 1.0/30
+        band_futures = self.process_lookahead_bands(frame,dt) if frame is not None else []
+        #The bands are processed on "band_executor" while "ROI" is processed here.
+        
+        self.ROI = roi
+        self.warp_ROI()
+        self.avrg_x_coor_of_lines = []
+        self.find_line_x_coors()
+        
+        if len(band_futures) > 0:
+            self.lane_offsets_ahead = {band.name:future.result() for band, future in zip(self.lookahead_bands,band_futures)}
+        
+        warning_flags = None
+        decided = False
+        if self.lines is not None:
+            self.classify_lines()
+            self.calculate_avrgs(dt)
+            
+            if self.frames_taken < 30:
+                self.frames_taken+=1
+            
+            if self.frames_taken >= 30 and len(self.avrg_vehicle_width_x_coors)==2 and self.decisions_enabled:
+                self.determine_state()
+                decided = True
+                
+                if self.state == self.previous_state:
+                    if self.state == 'in_lane':
+                        warning_flags = (False,False,False)
+                    elif self.state == 'out_lane':
+                        warning_flags = (False,True,False)
+                    elif self.state == 'over_divider':
+                        warning_flags = (True,False,False)
+                    elif self.state == 'no_lane':
+                        warning_flags = (False,False,True)
+                
+                self.draw_avrgs()
+            else:
+                self.state = 'no_lane'
+                warning_flags = (False,False,False)
+        elif self.frames_taken >= 30 and self.decisions_enabled and self.determine_state_ahead() == 'in_lane':
+            #Nothing was found in "ROI," but the bands further up the road still see the vehicle in its lane.
+            self.state = 'in_lane'
+            warning_flags = (False,False,False)
+        else:
+            self.state = 'no_lane'
+            warning_flags = (False,False,True)
+        
+        new_state = self.previous_state is None or self.state != self.previous_state
+        self.previous_state = self.state
+        self.previous_frame_time = frame_time
+        
+        return Detection(frame_time,self.state,new_state,warning_flags,self.lines is not None,decided,self.gate,list(self.avrg_x_coor_of_lines),list(self.avrg_x_coors_of_lane_lines) if self.lines is not None else [],
+                         [self.avrg_lane_x1,self.avrg_lane_x2],[self.avrg_divider_x1,self.avrg_divider_x2,self.avrg_divider_x3,self.avrg_divider_x4],list(self.avrg_vehicle_width_x_coors),dict(self.lane_offsets_ahead))
+    
+    def process_many(self, frames, frame_interval=None, rois=False):
+        """
+        Processes the frames of an iterable one at a time, yielding a "Detection" for each; only one frame is held at a time, so any number of frames can be streamed through it.
+        
+        Arguments:
+         * frames [iterable] -> The frames, such as those yielded by reading a video, or the "ROIs" of an interfaces.footage_cache.Footage_Cache.
+         * frame_interval [float] -> The number of seconds between frames, for frames that are not being processed as they are captured (such as recorded footage); None for "time.perf_counter."
+         * rois [bool] -> Whether the frames are "ROIs" already, in which case they are given to "process_ROI" rather than "process."
+        """
+        
+        for i, frame in enumerate(frames):
+            frame_time = i*frame_interval if frame_interval is not None else None
+            if rois:
+                yield self.process_ROI(frame,frame_time)
+            else:
+                yield self.process(frame,frame_time)
+    
+    def draw_avrgs(self):
+        """
+        Draws the averaged divider (orange), lane (blue), and vehicle (red) x-coordinates onto "HoughROI."
+        """
+        
+        if self.avrg_divider_x1 is not None:
+            for l in [self.avrg_divider_x1, self.avrg_divider_x2, self.avrg_divider_x3, self.avrg_divider_x4]:
+                cv2.line(self.HoughROI,(int(l),0),(int(l),60),(0,165,255),2)
+                
+        if self.avrg_lane_x1 is not None:
+            cv2.line(self.HoughROI,(int(self.avrg_lane_x1),0),(int(self.avrg_lane_x1),60),(255,0,0),2)
+        if self.avrg_lane_x2 is not None:
+            cv2.line(self.HoughROI,(int(self.avrg_lane_x2),0),(int(self.avrg_lane_x2),60),(255,0,0),2)
+        
+        if len(self.avrg_vehicle_width_x_coors) == 2:
+            cv2.line(self.HoughROI,(int(self.avrg_vehicle_width_x_coors[0]),0),(int(self.avrg_vehicle_width_x_coors[0]),60),(0,0,255),2)
+            cv2.line(self.HoughROI,(int(self.avrg_vehicle_width_x_coors[1]),0),(int(self.avrg_vehicle_width_x_coors[1]),60),(0,0,255),2)
+    
+    def calculate_avrg_vehicle_width_x_coors(self):
+        """
+        Calculates the vehicle's sides' average x-coordinates via a running average.
+        
+        Internal Functions:
+         * calculate_running_avrg -> Calculates the running average.
+        """
+        
+        def calculate_running_avrg(newValue, oldValue):
+            """
+            Calculates the running average.
+            
+            Arguments:
+             * newValue [float] -> The new value to be added to the running average.
+             * oldValue [int] -> The previous value of the running average needed to continue the running average.
+            """
+            
+            return int(oldValue + ((newValue - oldValue)/self.count_for_averaging))
+        
+        self.vehicle_width_x_coors = [(((self.HoughROI.shape[1]/2)-1)-(self.vehicle_pixel_width/2)),(((self.HoughROI.shape[1]/2)-1)+(self.vehicle_pixel_width/2))]
+        if self.count_for_averaging == 0:
+            self.avrg_vehicle_width_x_coors = [int(self.vehicle_width_x_coors[0]),int(self.vehicle_width_x_coors[1])]
+        else:
+            self.avrg_vehicle_width_x_coors = [calculate_running_avrg(self.vehicle_width_x_coors[0] ,self.avrg_vehicle_width_x_coors[0]), calculate_running_avrg(self.vehicle_width_x_coors[1] ,self.avrg_vehicle_width_x_coors[1])]
+        
+        self.count_for_averaging+=1
+        
+        if self.count_for_averaging >= 1000:
+            self.count_for_averaging = 1
+    
+    def calculate_lane_line_avrg(self):
+        """
+        Called by "calculate_lane_avrg" if the two sides of a lane had not be detected, it atempts to average all lists with a length of 1 in "buffer_of_lane_frames," which are considered to be one side of a lane, else both "avrg_lane_x1/2" are set to None.
+        """
+        
+        self.lane_frames_to_avrg = [x[0] for x in self.buffer_of_lane_frames if len(x) == 1]
+        if len(self.lane_frames_to_avrg) >0:
+            for x in self.lane_frames_to_avrg:
+                self.avrg_lane_x1 += x
+            self.avrg_lane_x1 = int(self.avrg_lane_x1/len(self.lane_frames_to_avrg))
+        else:
+            self.avrg_lane_x1 = None
+        self.avrg_lane_x2 = None
+    
+    def calculate_lane_avrg(self):
+        """
+        Attempts to average all of the lists with a length of 2 in "buffer_of_lane_frames," which are considered to be the two sides of a lane, else calls "calculate_lane_line_avrg."
+        """
+        
+        self.avrg_lane_x1 = self.avrg_lane_x2 = 0
+        self.lane_frames_to_avrg = [x for x in self.buffer_of_lane_frames if len(x) == 2]
+        if len(self.lane_frames_to_avrg) > 0:
+            for x in self.lane_frames_to_avrg:
+                self.avrg_lane_x1 += x[0]
+                self.avrg_lane_x2 += x[1]
+            self.avrg_lane_x1 = int(self.avrg_lane_x1/len(self.lane_frames_to_avrg))
+            self.avrg_lane_x2 = int(self.avrg_lane_x2/len(self.lane_frames_to_avrg))
+            
+            self.meter_per_pixel = self.AVERAGE_LANE_WIDTH/(self.avrg_lane_x2 - self.avrg_lane_x1)
+            self.vehicle_pixel_width = (1.0/self.meter_per_pixel) * self.vehicle_width
+            self.calculate_avrg_vehicle_width_x_coors()
+        else:
+            self.calculate_lane_line_avrg()
+    
+    def calculate_divider_avrg(self):
+        """
+        Attempts to average all of the lists with a length of 4 in "buffer_of_divider_frames," which are considered to be the four lines of an entire divider, else "avrg_divider_x1-4" are set to None.
+        """
+        
+        self.avrg_divider_x1 = self.avrg_divider_x2 = self.avrg_divider_x3 = self.avrg_divider_x4 = 0
+        self.divider_frames_to_avrg = [x for x in self.buffer_of_divider_frames if len(x) == 4]
+        if len(self.divider_frames_to_avrg) > 0:
+            for x in self.divider_frames_to_avrg:
+                self.avrg_divider_x1 += x[0]
+                self.avrg_divider_x2 += x[1]
+                self.avrg_divider_x3 += x[2]
+                self.avrg_divider_x4 += x[3]
+            self.avrg_divider_x1 = int(self.avrg_divider_x1/len(self.divider_frames_to_avrg))
+            self.avrg_divider_x2 = int(self.avrg_divider_x2/len(self.divider_frames_to_avrg))
+            self.avrg_divider_x3 = int(self.avrg_divider_x3/len(self.divider_frames_to_avrg))
+            self.avrg_divider_x4 = int(self.avrg_divider_x4/len(self.divider_frames_to_avrg))
+        else:
+            self.avrg_divider_x1 = self.avrg_divider_x2 = self.avrg_divider_x3 = self.avrg_divider_x4 = None
+    
+    def warp_ROI(self):
+        """
+        Turns "ROI" into the grey, binary-thresholded "BinaryROI," then warps it into the top-down "WarpedROI," which is "opened" while "morphology" is True.
+        """
+        
+        self.BinaryROI = cv2.cvtColor(self.ROI,cv2.COLOR_BGR2GRAY)
+        #cv2.imshow('Grey ROI',self.BinaryROI)
+        
+        #Apply a binary threshold on the ROI.
+        ret,self.BinaryROI = cv2.threshold(self.BinaryROI,self.binary_threshold,255,cv2.THRESH_BINARY)
+        #cv2.imshow('Thresholded ROI',self.BinaryROI)
+        
+        #Then, warp the ROI to a top-down view.
+        self.pts1 = np.float32([[0,self.first_row_for_warping],[320,self.first_row_for_warping],[0,self.first_row_for_warping+1],[320,self.first_row_for_warping+1]])
+        self.M = cv2.getPerspectiveTransform(self.pts1,self.pts2)
+        self.WarpedROI = cv2.warpPerspective(self.BinaryROI,self.M,(320,60))
+        if self.morphology:
+            self.WarpedROI = cv2.morphologyEx(self.WarpedROI,cv2.MORPH_OPEN,self.kernel)
+    
+    def get_tracking_bands(self):
+        """
+        Returns the column bands of "WarpedROI" around the lane and divider lines averaged from the previous frames, merging those that overlap.
+        
+        Return Arguments:
+         * bands [list] -> A sorted list of [first column, last column + 1] pairs; empty if no lines were averaged.
+        """
+        
+        predicted_x_coors = sorted([x for x in [self.avrg_lane_x1,self.avrg_lane_x2,self.avrg_divider_x1,self.avrg_divider_x2,self.avrg_divider_x3,self.avrg_divider_x4] if x])
+        bands = []
+        for x in predicted_x_coors:
+            start = max(0,int(x) - self.TRACKING_BAND_HALF_WIDTH)
+            end = min(self.WarpedROI.shape[1],int(x) + self.TRACKING_BAND_HALF_WIDTH + 1)
+            if len(bands) > 0 and start <= bands[-1][1]:
+                bands[-1][1] = max(bands[-1][1],end)
+            else:
+                bands.append([start,end])
+        return bands
+    
+    def find_lines(self):
+        """
+        Applies Canny Edge Detection then the Probabilistic Hough Transformation on "WarpedROI," restricted to the bands from "get_tracking_bands" while tracking, and falling back to all of "WarpedROI" when the track is lost.
+        """
+        
+        bands = []
+        if self.tracking_enabled and self.frames_taken > 0 and self.frames_since_full_search < self.FULL_SEARCH_INTERVAL:
+            bands = self.get_tracking_bands()
+        
+        if len(bands) > 0:
+            #Only the bands get edges, so that "cv2.HoughLinesP" votes for far fewer pixels, and anything between the bands (glare, cracks, etc.) is ignored.
+            self.CannyROI = np.zeros_like(self.WarpedROI)
+            for start, end in bands:
+                self.CannyROI[:,start:end] = cv2.Canny(self.WarpedROI[:,start:end],200,225)
+            self.lines = cv2.HoughLinesP(self.CannyROI,1.0,np.pi/180,30,minLineLength=30,maxLineGap=20)
+            self.frames_since_full_search += 1
+            if self.lines is not None:
+                return
+        
+        #The track was lost (or there was none), so the whole of "WarpedROI" is searched.
+        self.CannyROI = cv2.Canny(self.WarpedROI,200,225)
+        self.lines = cv2.HoughLinesP(self.CannyROI,1.0,np.pi/180,30,minLineLength=30,maxLineGap=20)
+        self.frames_since_full_search = 0
+    
+    def find_lines_by_histogram(self):
+        """
+        Finds the edges of the near-vertical stripes in "WarpedROI" from a histogram of how many of the pixels in each of its columns are white, storing them in "lines."
+        """
+        
+        is_line_column = np.count_nonzero(self.WarpedROI,axis=0) >= self.HISTOGRAM_MIN_ROWS
+        #The columns where a run of "line" columns starts or ends; runs start at even indices and end at odd ones.
+        changes = np.flatnonzero(np.diff(np.concatenate(([False],is_line_column,[False])).astype(np.int8)))
+        if len(changes) > 0:
+            self.lines = np.sort(np.concatenate((changes[0::2],changes[1::2]-1)))
+        else:
+            self.lines = None
+    
+    def gate_frame(self):
+        """
+        Decides from the number of white pixels in "WarpedROI" and a thumbnail of it whether the detection engine has to be run on the current frame, or whether it is "empty" or can reuse the lines of the last frame it was run on; both checks cost a small fraction of "cv2.Canny" and "cv2.HoughLinesP."
+        
+        Return Arguments:
+         * gate [str] -> "detected" if the detection engine has to be run, "empty" if no line can be found in "WarpedROI," or "reused" if "WarpedROI" has hardly changed since the last frame the detection engine was run on.
+        """
+        
+        if cv2.countNonZero(self.WarpedROI) < self.GATE_MIN_FOREGROUND:
+            return 'empty'
+        
+        thumbnail = cv2.resize(self.WarpedROI,self.GATE_THUMBNAIL_SIZE,interpolation=cv2.INTER_AREA)
+        if self.gate_thumbnail is not None and self.gate_engine == self.detection_engine and self.gate_reuses < self.GATE_MAX_REUSES:
+            if cv2.norm(thumbnail,self.gate_thumbnail,cv2.NORM_L1)/thumbnail.size <= self.GATE_MAX_DIFFERENCE:
+                return 'reused'
+        self.gate_thumbnail = thumbnail
+        return 'detected'
+    
+    def find_line_x_coors(self):
+        """
+        Finds "lines" with "detection_engine," then fills "avrg_x_coor_of_lines" with their sorted x-coordinates (unless there are more than 8 of them) and draws them in green on "HoughROI."
+        
+        While "gating_enabled," "gate_frame" is asked first whether the detection engine has to be run at all: an "empty" frame gets no "lines," and an unchanged one gets those of the last frame the detection engine was run on.
+        """
+        
+        self.gate = self.gate_frame() if self.gating_enabled else 'detected'
+        self.gate_counts[self.gate] += 1
+        if self.gate == 'empty':
+            self.lines = None
+            self.HoughROI = cv2.cvtColor(self.WarpedROI,cv2.COLOR_GRAY2BGR)
+            return
+        if self.gate == 'reused':
+            self.lines = self.gate_lines
+            self.avrg_x_coor_of_lines = list(self.gate_x_coors)
+            self.HoughROI = self.gate_hough_roi.copy()
+            self.gate_reuses += 1
+            return
+        
+        if self.detection_engine == 'histogram':
+            self.find_lines_by_histogram()
+            self.HoughROI = cv2.cvtColor(self.WarpedROI,cv2.COLOR_GRAY2BGR)
+            if self.lines is not None and len(self.lines) <= 8:
+                for x in self.lines:
+                    self.avrg_x_coor_of_lines.append(float(x))
+                    cv2.line(self.HoughROI,(int(x),0),(int(x),60),(0,255,0),2)
+        else:
+            #Apply Canny Edge Detection then Probabilistic Hough Transformation to find the endpoints of "lines" in the ROI.
+            self.find_lines()
+            #cv2.imshow('Canny ROI',self.CannyROI)
+            self.HoughROI = cv2.cvtColor(self.CannyROI,cv2.COLOR_GRAY2BGR)
+            if self.lines is not None and len(self.lines) <= 8:
+                for coor in self.lines:
+                    for x1,y1,x2,y2 in coor:
+                        self.avrg_x_coor_of_lines.append(((x2+x1)/2.0))
+                        cv2.line(self.HoughROI,(x1,y1),(x2,y2),(0,255,0),2)
+        self.avrg_x_coor_of_lines.sort()
+        
+        if self.gating_enabled:
+            self.gate_lines = self.lines
+            self.gate_x_coors = list(self.avrg_x_coor_of_lines)
+            self.gate_hough_roi = self.HoughROI.copy()
+            self.gate_engine = self.detection_engine
+            self.gate_reuses = 0
+    
+    def classify_lines(self):
+        """
+        Sorts the x-coordinates in "avrg_x_coor_of_lines" into those that form a "lane" ("avrg_x_coors_of_lane_lines") and those that form the "divider" ("avrg_x_coors_of_divider_lines"), going by the gaps between them.
+        """
+        
+        if len(self.avrg_x_coor_of_lines) > 0:
+            if len(self.avrg_x_coor_of_lines) >= 2 and len(self.avrg_x_coor_of_lines) <= 10:
+                if len(self.avrg_x_coor_of_lines) >=4:
+                    for x in range(len(self.avrg_x_coor_of_lines)-3):
+                        difference_A = self.avrg_x_coor_of_lines[x+1] - self.avrg_x_coor_of_lines[x]
+                        difference_B = self.avrg_x_coor_of_lines[x+2] - self.avrg_x_coor_of_lines[x+1]
+                        difference_C = self.avrg_x_coor_of_lines[x+3] - self.avrg_x_coor_of_lines[x+2]
+                        if (difference_A <= 12) and (difference_C <= 12) and (difference_B <= 16):
+                            #Divider detected
+                            self.avrg_x_coors_of_divider_lines = [self.avrg_x_coor_of_lines[x],self.avrg_x_coor_of_lines[x+1],self.avrg_x_coor_of_lines[x+2],self.avrg_x_coor_of_lines[x+3]]
+                            break
+                    else:
+                        self.avrg_x_coors_of_divider_lines = []
+                else:
+                    self.avrg_x_coors_of_divider_lines = []
+                for x in range(len(self.avrg_x_coor_of_lines)-1):
+                    difference = self.avrg_x_coor_of_lines[x+1] - self.avrg_x_coor_of_lines[x]
+                    if (difference >= 210) and (difference <= 240):
+                        #Full-lane detected
+                        self.avrg_x_coors_of_lane_lines = [self.avrg_x_coor_of_lines[x], self.avrg_x_coor_of_lines[x+1]]
+                        break
+                else:
+                    #Right-side of divider detected
+                    self.avrg_x_coors_of_lane_lines = [self.avrg_x_coor_of_lines[-1]]
+            else:
+                #Shoulder-line detected
+                self.avrg_x_coors_of_lane_lines = [self.avrg_x_coor_of_lines[0]]
+                self.avrg_x_coors_of_divider_lines = []
+        else:
+            #Nothing detected
+            self.avrg_x_coors_of_lane_lines = []
+            self.avrg_x_coors_of_divider_lines = []
+    
+    def calculate_avrgs(self, dt):
+        """
+        Calculates "avrg_lane_x1/2" and "avrg_divider_x1-4" from "avrg_x_coors_of_lane_lines" and "avrg_x_coors_of_divider_lines," either with "lane_tracker" and "divider_tracker" or with the average of the last four frames in "buffer_of_lane_frames" and "buffer_of_divider_frames," depending on "smoothing."
+        
+        Arguments:
+         * dt [float] -> The number of seconds since the previous frame.
+        """
+        
+        if self.smoothing == 'kalman':
+            self.calculate_tracked_avrgs(dt)
+        else:
+            self.buffer_of_lane_frames.insert(0,[])
+            self.buffer_of_divider_frames.insert(0,[])
+            self.buffer_of_lane_frames[0] = self.avrg_x_coors_of_lane_lines
+            self.buffer_of_divider_frames[0] = self.avrg_x_coors_of_divider_lines
+            self.buffer_of_lane_frames.pop(-1)
+            self.buffer_of_divider_frames.pop(-1)
+            
+            #if len([x for x in self.buffer_of_lane_frames if len(x) == 2]) > 2:
+            self.calculate_lane_avrg()
+            #if len([x for x in self.buffer_of_divider_frames if len(x) == 4]) > 2:
+            self.calculate_divider_avrg()
+    
+    def calculate_tracked_avrgs(self, dt):
+        """
+        Predicts the lane and divider lines with "lane_tracker" and "divider_tracker," corrects them with the lines detected in the current frame, and sets "avrg_lane_x1/2" and "avrg_divider_x1-4" to where they are tracked to be.
+        
+        Arguments:
+         * dt [float] -> The number of seconds since the previous frame.
+        """
+        
+        self.lane_tracker.predict(dt)
+        self.lane_tracker.update(self.avrg_x_coors_of_lane_lines)
+        lane_x_coors = self.lane_tracker.get_positions()
+        if len(lane_x_coors) == 2:
+            self.avrg_lane_x1 = int(lane_x_coors[0])
+            self.avrg_lane_x2 = int(lane_x_coors[1])
+            #The vehicle's width is only recalculated from a lane that was actually seen in this frame, not just predicted.
+            if len(self.avrg_x_coors_of_lane_lines) == 2 and self.avrg_lane_x2 > self.avrg_lane_x1:
+                self.meter_per_pixel = self.AVERAGE_LANE_WIDTH/(self.avrg_lane_x2 - self.avrg_lane_x1)
+                self.vehicle_pixel_width = (1.0/self.meter_per_pixel) * self.vehicle_width
+                self.calculate_avrg_vehicle_width_x_coors()
+        elif len(lane_x_coors) == 1:
+            self.avrg_lane_x1 = int(lane_x_coors[0])
+            self.avrg_lane_x2 = None
+        else:
+            self.avrg_lane_x1 = self.avrg_lane_x2 = None
+        
+        self.divider_tracker.predict(dt)
+        self.divider_tracker.update(self.avrg_x_coors_of_divider_lines)
+        divider_x_coors = self.divider_tracker.get_positions()
+        if len(divider_x_coors) == 4:
+            self.avrg_divider_x1, self.avrg_divider_x2, self.avrg_divider_x3, self.avrg_divider_x4 = [int(x) for x in divider_x_coors]
+        else:
+            self.avrg_divider_x1 = self.avrg_divider_x2 = self.avrg_divider_x3 = self.avrg_divider_x4 = None
+    
+    def process_lookahead_bands(self, frame, dt):
+        """
+        Processes every band in "lookahead_bands," on "band_executor" if there is one, returning the futures of their "offsets" so that "ROI" can be processed in the meantime; without "band_executor," the bands are processed before returning, and the futures are already done.
+        
+        Arguments:
+         * frame [np.ndarray] -> The whole frame.
+         * dt [float] -> The number of seconds since the previous frame.
+        
+        Return Arguments:
+         * futures [list] -> The futures of the "offsets" of the bands, in the order of "lookahead_bands"; empty if there are no bands or the vehicle width has not been calibrated yet.
+        """
+        
+        if len(self.lookahead_bands) == 0 or len(self.avrg_vehicle_width_x_coors) != 2:
+            return []
+        vehicle_center = (self.avrg_vehicle_width_x_coors[0] + self.avrg_vehicle_width_x_coors[1])/2.0
+        if self.band_executor is not None:
+            return [self.band_executor.submit(band.process,frame,self.binary_threshold,vehicle_center,dt) for band in self.lookahead_bands]
+        futures = []
+        for band in self.lookahead_bands:
+            futures.append(concurrent.futures.Future())
+            futures[-1].set_result(band.process(frame,self.binary_threshold,vehicle_center,dt))
+        return futures
+    
+    def determine_state_ahead(self):
+        """
+        Determines the "state" of the vehicle from the lanes seen in "lookahead_bands," for frames in which no lines are found in "ROI": "in_lane" if the vehicle is within "LOOKAHEAD_OFFSET_LIMIT" of the middle of the lane in every band that sees one, else "no_lane." A band is never trusted to warn the driver on its own, as a lane further up the road also moves sideways with every bend.
+        
+        Return Arguments:
+         * state [str] -> "in_lane" or "no_lane."
+        """
+        
+        offsets = [offset for offset in self.lane_offsets_ahead.values() if offset is not None]
+        if len(offsets) > 0 and all(abs(offset) <= self.LOOKAHEAD_OFFSET_LIMIT for offset in offsets):
+            return 'in_lane'
+        return 'no_lane'
+    
+    def determine_state(self):
+        """
+        Determines the "state" of the vehicle ("in_lane," "out_lane," "over_divider," or "no_lane") from where the sides of the vehicle are in relation to the averaged lane and divider lines.
+        """
+        
+        if self.state != 'over_divider':
+            if self.avrg_divider_x4 is not None:
+                if self.avrg_vehicle_width_x_coors[0] >= self.avrg_divider_x4:
+                    self.state = 'undetermined'
+                else:
+                    self.state = 'over_divider'
+            else:
+                self.state = 'undetermined'
+        else:
+            if self.avrg_divider_x4 is not None:
+                if self.avrg_vehicle_width_x_coors[0] < self.avrg_divider_x4:
+                    self.state = 'over_divider'
+                else:
+                    self.state = 'undetermined'
+            else:
+                self.state = 'over_divider'
+        
+        if self.state == 'undetermined':
+            if self.avrg_lane_x1 is not None and self.avrg_lane_x2 is not None:
+                if ((self.avrg_vehicle_width_x_coors[0] > self.avrg_lane_x1) and (self.avrg_vehicle_width_x_coors[1] > self.avrg_lane_x2)) or ((self.avrg_vehicle_width_x_coors[0] < self.avrg_lane_x1) and (self.avrg_vehicle_width_x_coors[1] < self.avrg_lane_x2)):
+                    self.state = 'out_lane'
+                else:
+                    self.state = 'in_lane'
+            elif self.avrg_lane_x1 is not None and self.avrg_lane_x2 is None:
+                if ((self.avrg_vehicle_width_x_coors[0] < self.avrg_lane_x1) and (self.avrg_vehicle_width_x_coors[1] > self.avrg_lane_x1)):
+                    self.state = 'out_lane'
+            elif self.avrg_lane_x1 is None and self.avrg_lane_x2 is None:
+                self.state = 'no_lane'
@@ -0,0 +1,179 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import csv
+import os
+
+"""
+"placement" Module:
+
+Packages Imported:
+ * csv,
+ * os.
+
+Classes:
+ * Placement -> Pins each of LaDD's processes to the cores given for it in "placement.csv" and gives it a scheduling policy and priority, so that the user interface and "manager_obj" cannot preempt "Camera" in the middle of a frame, nor delay the beeps of "Audio."
+"""
+
+class Placement:
+    """
+    A placement is applied to every thread of a process, and every thread that the process starts afterwards inherits it, so "Camera's" recorder and band threads share its cores. Cores that the Raspberry Pi does not have are left out; a process with none left keeps the cores it had. Raising a priority (a negative "nice" value, or any real-time policy) needs root or CAP_SYS_NICE; when it is refused, the process keeps running as it was and the refusal is printed.
+    
+    Instance Variables:
+     * PLACEMENT_FILE [str (constant)] -> The .csv file, next to "configure.csv," that the placements are read from; it is created with "DEFAULT_PLACEMENTS" if it does not exist.
+     * FIELDS [list (constant)] -> The columns of "PLACEMENT_FILE": the name of the process, its cores (separated by spaces, or empty for every core), its policy (a key of "POLICIES"), and its priority (the "nice" value for "other," "batch," and "idle," or the real-time priority from 1 to 99 for "fifo" and "rr").
+     * POLICIES [dict (constant)] -> The scheduling policies, by the name used in "PLACEMENT_FILE."
+     * DEFAULT_PLACEMENTS [dict (constant)] -> The (cores,policy,priority) of every process, by the name of its multiprocessing.Process, for a Raspberry Pi 3: "Camera" alone on cores 2 and 3, "Audio" raised above the other processes on core 1 with "OBD" and "Fusion" (not real-time, as it polls "manager_obj" and would preempt them on every reply), and the user interface, the debug stream, and LaDD's main.py deprioritized on core 0, which "manager_obj" shares with core 1.
+     * placements [dict] -> The (cores,policy,priority) of every process in "PLACEMENT_FILE," by name; a camera named "Camera-<label>" without a placement of its own uses the one of "Camera," with the cores of "Camera" split among the cameras by "spread."
+    
+    Methods:
+     * __init__ -> Instantiates the class with the placements in "PLACEMENT_FILE."
+     * apply -> Applies the placement of a process to every one of its threads.
+     * spread -> Splits the cores of one placement among several processes that share it, such as every camera.
+     * load_placements [static] -> Reads the placements in a .csv file, creating it with "DEFAULT_PLACEMENTS" if it does not exist.
+     * get_thread_ids [static] -> Returns the IDs of every thread of a process.
+    """
+    
+    PLACEMENT_FILE = 'placement.csv'
+    FIELDS = ['process','cpus','policy','priority']
+    POLICIES = {'other':os.SCHED_OTHER,'batch':os.SCHED_BATCH,'idle':os.SCHED_IDLE,'fifo':os.SCHED_FIFO,'rr':os.SCHED_RR}
+    DEFAULT_PLACEMENTS = {'Camera':([2,3],'other',-5),'Audio':([1],'other',-10),'OBD':([1],'other',0),'User_Interface':([0],'other',10),
+                          'Debug_Stream':([0],'other',10),'Fusion':([1],'other',-5),'manager_obj':([0,1],'other',0),'main':([0],'other',0)}
+    
+    def __init__(self, path=None):
+        """
+        Instantiates the class with the placements in "PLACEMENT_FILE."
+        
+        Arguments:
+         * path [str] -> The .csv file to read the placements from instead of "PLACEMENT_FILE" (optional).
+        """
+        
+        self.placements = self.load_placements(path if path is not None else self.PLACEMENT_FILE)
+    
+    def apply(self, name, pid=0):
+        """
+        Applies the placement of a process to every one of its threads; a process without a placement is left as it is.
+        
+        Arguments:
+         * name [str] -> The name of the process in "placements"; "Camera-<label>" falls back on "Camera."
+         * pid [int] -> The ID of the process; 0 for the calling process.
+        
+        Return Arguments:
+         * applied [bool] -> Whether the whole placement was applied; False if the process has no placement, or part of it was refused.
+        """
+        
+        if name not in self.placements:
+            name = name.split('-')[0]
+        if name not in self.placements:
+            return False
+        cpus, policy, priority = self.placements[name]
+        cpus = [cpu for cpu in cpus if cpu < (os.cpu_count() or 1)]
+        applied = True
+        for tid in self.get_thread_ids(pid if pid != 0 else os.getpid()):
+            try:
+                if len(cpus) > 0:
+                    os.sched_setaffinity(tid,cpus)
+                if policy in ['fifo','rr']:
+                    os.sched_setscheduler(tid,self.POLICIES[policy],os.sched_param(priority))
+                else:
+                    os.sched_setscheduler(tid,self.POLICIES[policy],os.sched_param(0))
+                    os.setpriority(os.PRIO_PROCESS,tid,priority)
+            except PermissionError as error:
+                if applied:
+                    print('The placement of "' + name + '" (' + policy + ', priority ' + str(priority) + ') was refused: ' + str(error) + '.')
+                applied = False
+            except ProcessLookupError:
+                pass
+                #The thread ended after being listed.
+        return applied
+    
+    def spread(self, name, names):
+        """
+        Splits the cores of the placement of "name" among several processes that share it (such as every camera, which all fall back on the placement of "Camera"), so that each runs on cores of its own; with more processes than cores, the cores are handed out in turn. A process with a placement of its own in "PLACEMENT_FILE" keeps it, and a placement without cores is left as it is.
+        
+        Arguments:
+         * name [str] -> The name of the placement to split (e.g. "Camera").
+         * names [list] -> The names of the processes sharing it, including "name" itself.
+        """
+        
+        if name not in self.placements:
+            return
+        cpus, policy, priority = self.placements[name]
+        cpus = [cpu for cpu in cpus if cpu < (os.cpu_count() or 1)]
+        sharing = [process_name for process_name in names if process_name == name or process_name not in self.placements]
+        if len(sharing) < 2 or len(cpus) == 0:
+            return
+        for i, process_name in enumerate(sharing):
+            if len(sharing) <= len(cpus):
+                share = cpus[(i*len(cpus))//len(sharing):((i+1)*len(cpus))//len(sharing)]
+            else:
+                share = [cpus[i % len(cpus)]]
+            self.placements[process_name] = (share,policy,priority)
+    
+    @staticmethod
+    def load_placements(path):
+        """
+        Reads the placements in a .csv file, creating it with "DEFAULT_PLACEMENTS" if it does not exist; rows that cannot be read are skipped and printed.
+        
+        Arguments:
+         * path [str] -> The path of the .csv file.
+        
+        Return Arguments:
+         * placements [dict] -> The (cores,policy,priority) of every process in the file, by name.
+        """
+        
+        if not os.path.isfile(path):
+            with open(path,'w',newline='') as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(Placement.FIELDS)
+                for name, (cpus, policy, priority) in Placement.DEFAULT_PLACEMENTS.items():
+                    writer.writerow([name,' '.join(str(cpu) for cpu in cpus),policy,priority])
+        
+        placements = {}
+        with open(path,'r',newline='') as csv_file:
+            for row in csv.DictReader(csv_file):
+                try:
+                    cpus = [int(cpu) for cpu in (row['cpus'] or '').split()]
+                    policy = row['policy'].strip()
+                    priority = int(row['priority'])
+                    if policy not in Placement.POLICIES:
+                        raise ValueError('unknown policy "' + policy + '"')
+                    placements[row['process'].strip()] = (cpus,policy,priority)
+                except (ValueError, TypeError, AttributeError) as error:
+                    print('Skipped a row of "' + path + '": ' + str(error) + '.')
+        return placements
+    
+    @staticmethod
+    def get_thread_ids(pid):
+        """
+        Returns the IDs of every thread of a process, which is what affinities and priorities are set on in Linux.
+        
+        Arguments:
+         * pid [int] -> The ID of the process.
+        
+        Return Arguments:
+         * tids [list] -> The IDs of its threads; just "pid" if they cannot be listed.
+        """
+        
+        try:
+            return [int(tid) for tid in os.listdir('/proc/' + str(pid) + '/task')]
+        except OSError:
+            return [pid]
@@ -0,0 +1,207 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing as mp
+import os
+import signal
+import sys
+import threading
+import time
+
+"""
+"profiler" Module:
+
+Packages Imported:
+ * multiprocessing (as mp),
+ * os,
+ * signal,
+ * sys,
+ * threading,
+ * time.
+
+Classes:
+ * Profiler -> A sampling profiler that any of LaDD's processes can be told to run, by "SIGNAL" or by the user interface's "Profile" button, for a fixed window, writing what it sampled as collapsed stacks for flame graphs.
+"""
+
+class Profiler:
+    """
+    The profiler is created in LaDD's main.py before the processes are started, so that every process inherits its signal handlers; it does nothing until "SIGNAL" is received. While it runs, SIGPROF interrupts the process every "interval" seconds of CPU time it uses, and the stack of every thread of the process is added to "stacks," so a process that is waiting is not sampled, which at the default "interval" costs well under 1% of the CPU time of the process (a few microseconds per thread per sample). The stack of a thread is as seen from its own frames; time spent inside NumPy or OpenCV is counted against the Python line that called it.
+    
+    Instance Variables:
+     * SIGNAL [int (constant)] -> The signal that starts the profiler in the process it is sent to (e.g. "kill -USR1 <pid>," with the process IDs found under "supervisor" in the debug stream's "/state").
+     * interval [float] -> How many seconds of CPU time are between two samples.
+     * window [float] -> How many seconds the profiler runs for once it is started.
+     * directory [str] -> The directory the collapsed stacks are written to.
+     * stacks [dict] -> How many times each stack has been sampled, by its collapsed form ("process;thread;outermost function;...;innermost function").
+     * samples [int] -> How many times SIGPROF has been handled since the profiler was started.
+     * thread_names [dict] -> The names of the threads of the process, by ID, as they were when the profiler was started; they are not looked up while sampling, as "threading.enumerate" takes a lock that the interrupted thread may be holding.
+     * pid [int] -> The ID of the process the profiler is running in; None when it is not running (a process started while its parent was being profiled is not).
+     * stop_timer [threading.Timer] -> Calls "stop" once "window" is over.
+    
+    Methods:
+     * __init__ -> Instantiates the class.
+     * install_signal_handlers -> Makes "handle_signal" the handler of "SIGNAL" and "take_sample" the handler of SIGPROF, in this process and in every process started after it.
+     * handle_signal -> The handler of "SIGNAL," which starts the profiler.
+     * is_running -> Returns whether the profiler is running in this process.
+     * start -> Starts sampling, and "stop_timer."
+     * take_sample -> The handler of SIGPROF, which adds the stack of every thread to "stacks."
+     * stop -> Stops sampling and writes "stacks" to "directory."
+     * format_frame [static] -> Returns the label of a function in a collapsed stack.
+    """
+    
+    SIGNAL = signal.SIGUSR1
+    
+    def __init__(self, interval=0.01, window=10.0, directory='profiles'):
+        """
+        Instantiates the class.
+        
+        Arguments:
+         * interval [float] -> How many seconds of CPU time are between two samples.
+         * window [float] -> How many seconds the profiler runs for once it is started.
+         * directory [str] -> The directory the collapsed stacks are written to.
+        """
+        
+        self.interval = interval
+        self.window = window
+        self.directory = directory
+        self.stacks = {}
+        self.samples = 0
+        self.thread_names = {}
+        self.pid = None
+        self.stop_timer = None
+    
+    def install_signal_handlers(self):
+        """
+        Makes "handle_signal" the handler of "SIGNAL" and "take_sample" the handler of SIGPROF, in this process and in every process started after it.
+        """
+        
+        signal.signal(self.SIGNAL,self.handle_signal)
+        signal.signal(signal.SIGPROF,self.take_sample)
+    
+    def handle_signal(self, signum, frame):
+        """
+        The handler of "SIGNAL," which starts the profiler unless it is already running.
+        
+        Arguments:
+         * signum [int] -> The number of the signal.
+         * frame [frame] -> The frame that was interrupted.
+        """
+        
+        self.start()
+    
+    def is_running(self):
+        """
+        Returns whether the profiler is running in this process.
+        
+        Return Arguments:
+         * running [bool] -> Whether it is running.
+        """
+        
+        return self.pid == os.getpid()
+    
+    def start(self, window=None):
+        """
+        Starts sampling, and "stop_timer."
+        
+        Arguments:
+         * window [float] -> How many seconds to run for instead of "window" (optional).
+        
+        Return Arguments:
+         * started [bool] -> Whether the profiler was started; False if it was already running.
+        """
+        
+        if self.is_running():
+            return False
+        self.stacks = {}
+        self.samples = 0
+        self.thread_names = {thread.ident:thread.name for thread in threading.enumerate()}
+        self.pid = os.getpid()
+        self.stop_timer = threading.Timer(window if window is not None else self.window,self.stop)
+        self.stop_timer.daemon = True
+        self.stop_timer.start()
+        signal.setitimer(signal.ITIMER_PROF,self.interval,self.interval)
+        return True
+    
+    def take_sample(self, signum, frame):
+        """
+        The handler of SIGPROF, which adds the stack of every thread to "stacks"; it always runs in the main thread, whose stack is the interrupted "frame." "stop_timer's" own thread is left out.
+        
+        Arguments:
+         * signum [int] -> The number of the signal.
+         * frame [frame] -> The frame that was interrupted.
+        """
+        
+        if not self.is_running():
+            return
+        self.samples += 1
+        process_name = mp.current_process().name
+        main_ident = threading.get_ident()
+        for ident, thread_frame in sys._current_frames().items():
+            if ident == main_ident:
+                thread_frame = frame
+            elif ident == self.stop_timer.ident:
+                continue
+            labels = []
+            while thread_frame is not None:
+                labels.append(self.format_frame(thread_frame))
+                thread_frame = thread_frame.f_back
+            labels.append(self.thread_names.get(ident,'Thread-' + str(ident)))
+            labels.append(process_name)
+            stack = ';'.join(reversed(labels))
+            self.stacks[stack] = self.stacks.get(stack,0) + 1
+    
+    def stop(self):
+        """
+        Stops sampling and writes "stacks" to "directory" as "profile-<process>-<time>.folded," one "stack count" line per stack, which flamegraph.pl and speedscope read as they are.
+        
+        Return Arguments:
+         * path [str] -> The path of the file written; None if the profiler was not running.
+        """
+        
+        if not self.is_running():
+            return None
+        signal.setitimer(signal.ITIMER_PROF,0,0)
+        self.pid = None
+        stacks = dict(self.stacks)
+        #A copy, in case a last SIGPROF was already pending.
+        
+        os.makedirs(self.directory,exist_ok=True)
+        path = os.path.join(self.directory,time.strftime('profile-' + mp.current_process().name + '-%Y%m%d-%H%M%S.folded'))
+        with open(path,'w') as profile_file:
+            for stack, count in sorted(stacks.items()):
+                profile_file.write(stack + ' ' + str(count) + '\n')
+        print('Wrote ' + str(self.samples) + ' samples of "' + mp.current_process().name + '" to "' + path + '".')
+        return path
+    
+    @staticmethod
+    def format_frame(frame):
+        """
+        Returns the label of a function in a collapsed stack, which is the same for every line of it so that its samples add up.
+        
+        Arguments:
+         * frame [frame] -> A frame of the function.
+        
+        Return Arguments:
+         * label [str] -> "function(file:first line)," with any semicolons or spaces, which separate the parts of a collapsed stack, replaced.
+        """
+        
+        code = frame.f_code
+        return (code.co_name + '(' + os.path.basename(code.co_filename) + ':' + str(code.co_firstlineno) + ')').replace(';',':').replace(' ','_')
@@ -0,0 +1,152 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import cv2
+from interfaces import lane_tracker
+
+"""
+"roi_band" Module:
+
+Packages Imported:
+ * numpy (as np),
+ * cv2,
+ * interfaces.lane_tracker.
+
+Classes:
+ * ROI_Band -> A strip of the frame other than "Pipeline's" "ROI" (such as one further up the road), with its own warp and its own lane tracking, so that "Pipeline" can look further ahead than its one "ROI."
+"""
+
+class ROI_Band:
+    """
+    A band is processed from the whole frame by "process," which only calls OpenCV functions on buffers that are allocated once; OpenCV releases the GIL while it works, so "Pipeline" can process its bands on a thread pool at the same time as its own "ROI." Lines are found from a column histogram of the warped band, as "Pipeline's" "histogram" detection engine does, since a band only has to tell where the lane is.
+    
+    Instance Variables:
+     * HEIGHT {and} WIDTH [int (constant)] -> The size of a band and of its warped version, the same as "Pipeline's" "ROI."
+     * MIN_ROWS [int (constant)] -> How many of the pixels of a column of "WarpedROI" have to be white for the column to count as part of a line.
+     * name [str] -> The name of the band (e.g. "far").
+     * row_slice {and} col_slice [list] -> The rows and columns of the frame that make up the band.
+     * first_row_for_warping [int] -> The row of the band that is warped to the whole height of "WarpedROI," like "Pipeline's" "first_row_for_warping" is for its "ROI."
+     * M [np.ndarray] -> The perspective transformation of the band, calculated once, as "first_row_for_warping" does not change.
+     * GreyROI {and} BinaryROI {and} WarpedROI [np.ndarray] -> The buffers the band is converted to grey, thresholded, and warped into.
+     * column_counts [np.ndarray] -> The buffer holding how many pixels of each column of "WarpedROI" are white.
+     * tracker [interfaces.lane_tracker.Lane_Tracker] -> Tracks the two lines of the lane the vehicle is in.
+     * lane [list] -> The tracked x-coordinates of the lines of the lane, from left to right; empty if the lane is not being tracked.
+     * offset [float] -> How far the vehicle is from the middle of "lane," in lane widths (negative to the left); None if the lane is not being tracked.
+    
+    Methods:
+     * __init__ -> Instantiates the class and allocates its buffers.
+     * fits -> Returns whether the band lies inside frames of a given resolution.
+     * process -> Warps the band of a frame, finds the lines in it, and updates "lane" and "offset."
+     * find_stripes -> Returns the middles of the white stripes in "WarpedROI."
+    """
+    
+    HEIGHT = 60
+    WIDTH = 320
+    MIN_ROWS = 20
+    
+    def __init__(self, name, camera_res, row_offset, first_row_for_warping):
+        """
+        Instantiates the class and allocates its buffers.
+        
+        Arguments:
+         * name [str] -> The name of the band.
+         * camera_res [list] -> The resolution of the frames in [width,height].
+         * row_offset [int] -> How many rows below the top of "Pipeline's" "ROI" the band starts; a negative number puts the band above "ROI," further up the road.
+         * first_row_for_warping [int] -> The row of the band that is warped to the whole height of "WarpedROI."
+        """
+        
+        self.name = name
+        first_row = int(camera_res[1]/2) - 30 + row_offset
+        self.row_slice = [first_row,first_row + self.HEIGHT]
+        self.col_slice = [int(camera_res[0]/2) - 160,int(camera_res[0]/2) + 160]
+        self.first_row_for_warping = first_row_for_warping
+        
+        pts1 = np.float32([[0,first_row_for_warping],[self.WIDTH,first_row_for_warping],[0,first_row_for_warping+1],[self.WIDTH,first_row_for_warping+1]])
+        pts2 = np.float32([[0,0],[self.WIDTH,0],[0,self.HEIGHT],[self.WIDTH,self.HEIGHT]])
+        self.M = cv2.getPerspectiveTransform(pts1,pts2)
+        self.GreyROI = np.empty((self.HEIGHT,self.WIDTH),np.uint8)
+        self.BinaryROI = np.empty((self.HEIGHT,self.WIDTH),np.uint8)
+        self.WarpedROI = np.empty((self.HEIGHT,self.WIDTH),np.uint8)
+        self.column_counts = np.empty((1,self.WIDTH),np.int32)
+        
+        self.tracker = lane_tracker.Lane_Tracker(2,self.WIDTH)
+        self.lane = []
+        self.offset = None
+    
+    def fits(self, camera_res):
+        """
+        Returns whether the band lies inside frames of a given resolution.
+        
+        Arguments:
+         * camera_res [list] -> The resolution of the frames in [width,height].
+        
+        Return Arguments:
+         * result [bool] -> Whether every row and column of the band is in the frames.
+        """
+        
+        return self.row_slice[0] >= 0 and self.row_slice[1] <= camera_res[1] and self.col_slice[0] >= 0 and self.col_slice[1] <= camera_res[0]
+    
+    def process(self, frame, threshold, vehicle_center, dt):
+        """
+        Warps the band of a frame, finds the lines in it, and updates "lane" and "offset."
+        
+        Arguments:
+         * frame [np.ndarray] -> The whole BGR frame.
+         * threshold [int] -> The lower end of the binary threshold ("shared_dict's" "binary_threshold_value_lower_end").
+         * vehicle_center [float] -> The x-coordinate of the middle of the vehicle in "WarpedROI"; the columns of a band are warped like those of "Pipeline's" "ROI," so this is the middle of "Pipeline's" "avrg_vehicle_width_x_coors."
+         * dt [float] -> The number of seconds since the previous frame.
+        
+        Return Arguments:
+         * offset [float] -> "offset."
+        """
+        
+        cv2.cvtColor(frame[self.row_slice[0]:self.row_slice[1],self.col_slice[0]:self.col_slice[1]],cv2.COLOR_BGR2GRAY,dst=self.GreyROI)
+        cv2.threshold(self.GreyROI,threshold,1,cv2.THRESH_BINARY,dst=self.BinaryROI)
+        #White is 1 rather than 255, so that the sum of a column of "WarpedROI" is the number of its white pixels.
+        cv2.warpPerspective(self.BinaryROI,self.M,(self.WIDTH,self.HEIGHT),dst=self.WarpedROI,flags=cv2.INTER_NEAREST)
+        
+        stripes = self.find_stripes()
+        left = [x for x in stripes if x < vehicle_center]
+        right = [x for x in stripes if x > vehicle_center]
+        self.tracker.predict(dt)
+        self.tracker.update([left[-1],right[0]] if len(left) > 0 and len(right) > 0 else [])
+        self.lane = self.tracker.get_positions()
+        
+        if len(self.lane) == 2 and self.lane[1] > self.lane[0]:
+            self.offset = (vehicle_center - (self.lane[0] + self.lane[1])/2.0)/(self.lane[1] - self.lane[0])
+        else:
+            self.offset = None
+        return self.offset
+    
+    def find_stripes(self):
+        """
+        Returns the middles of the white stripes in "WarpedROI," found from how many pixels of each of its columns are white.
+        
+        Return Arguments:
+         * stripes [list] -> The x-coordinates of the middles of the stripes, from left to right; empty if there are none or more than 4 (which is not a lane).
+        """
+        
+        cv2.reduce(self.WarpedROI,0,cv2.REDUCE_SUM,dst=self.column_counts,dtype=cv2.CV_32S)
+        is_line_column = self.column_counts[0] >= self.MIN_ROWS
+        changes = np.flatnonzero(np.diff(np.concatenate(([False],is_line_column,[False])).astype(np.int8)))
+        stripes = ((changes[0::2] + changes[1::2] - 1)/2.0).tolist()
+        return stripes if len(stripes) <= 4 else []
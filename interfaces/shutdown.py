@@ -0,0 +1,213 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+
+"""
+"shutdown" Module:
+
+Packages Imported:
+ * multiprocessing (as mp),
+ * os,
+ * signal,
+ * threading,
+ * time.
+
+Classes:
+ * Shutdown_Coordinator -> Signals every process of LaDD to end through an event they can sleep on, gives each of them a deadline to do so, terminates and then kills the ones that miss it, and reports how long each stage took, so that LaDD powers down within "SHUTDOWN_BUDGET" when the ignition drops.
+"""
+
+class Shutdown_Coordinator:
+    """
+    The coordinator is created in LaDD's main.py before the processes are started, so that every process inherits "event." "shared_dict's" "turn_off_LaDD" is still set as well, for the loops that check it.
+    
+    Instance Variables:
+     * DEADLINES [dict (constant)] -> How many seconds after shutdown is requested each process, by the name of its multiprocessing.Process, has to end before it is terminated; "Camera" has the most to flush, and "OBD" may be waiting on a serial read of up to one second; every "Camera-<label>" has the deadline of "Camera."
+     * DEFAULT_DEADLINE [float (constant)] -> The deadline of a process not in "DEADLINES."
+     * TERMINATE_GRACE [float (constant)] -> How many seconds a terminated process has to run its cleanup before it is killed.
+     * KILL_GRACE [float (constant)] -> How many seconds a killed process is waited on before it is given up on.
+     * SHUTDOWN_BUDGET [float (constant)] -> The number of seconds LaDD is supposed to take to power down; the longest deadline plus both graces fits within it.
+     * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+     * event [mp.Event] -> Set once shutdown has been requested; the processes sleep on it rather than with "time.sleep," so that they wake up at once.
+     * owner_pid [int] -> The process ID of LaDD's main.py, which enforces the deadlines and so is never made to exit by a second signal.
+     * request_time [float] -> When shutdown was requested, as given by "time.monotonic"; None before then (and in the processes other than the one that requested it).
+     * stages [list] -> The (name,outcome,seconds) of every stage of the shutdown so far, "seconds" being counted from "request_time."
+    
+    Methods:
+     * __init__ -> Instantiates the class.
+     * request -> Requests shutdown, waking up every process sleeping on "event."
+     * is_requested -> Returns whether shutdown has been requested, without going through "shared_dict."
+     * wait -> Sleeps for a number of seconds, or until shutdown is requested.
+     * handle_signal -> The handler of SIGINT and SIGTERM: in LaDD's main.py, either requests shutdown; in any other process, SIGTERM makes it exit at once, running its cleanup, and SIGINT (which Ctrl+C sends to every process) requests shutdown the first time and makes it exit after that.
+     * install_signal_handlers -> Makes "handle_signal" the handler of SIGINT and SIGTERM, in this process and in every process started after it.
+     * stop_processes -> Requests shutdown, and waits for every process until its deadline, terminating and then killing it if it misses it.
+     * time_stage -> Runs one more stage of the shutdown (e.g. shutting down "manager_obj") and adds how long it took to "stages."
+     * report -> Prints "stages" and how long the whole shutdown took compared to "SHUTDOWN_BUDGET."
+     * ignore_signals [static] -> Makes the calling process ignore SIGINT and SIGTERM; used to start "manager_obj," which has to outlive the other processes until "time_stage" shuts it down.
+    """
+    
+    DEADLINES = {'User_Interface':1.0,'Debug_Stream':1.0,'Camera':2.0,'Audio':0.5,'OBD':1.5}
+    DEFAULT_DEADLINE = 1.0
+    TERMINATE_GRACE = 0.5
+    KILL_GRACE = 0.5
+    SHUTDOWN_BUDGET = 4.0
+    
+    def __init__(self, shared_dict):
+        """
+        Instantiates the class.
+        
+        Arguments:
+         * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+        """
+        
+        self.shared_dict = shared_dict
+        self.event = mp.Event()
+        self.owner_pid = os.getpid()
+        self.request_time = None
+        self.stages = []
+    
+    def request(self):
+        """
+        Requests shutdown, waking up every process sleeping on "event," and sets "shared_dict's" "turn_off_LaDD" for the loops that check it.
+        """
+        
+        if self.request_time is None:
+            self.request_time = time.monotonic()
+        self.event.set()
+        try:
+            self.shared_dict['turn_off_LaDD'] = True
+        except (OSError,EOFError):
+            pass
+            #"manager_obj" may already be gone; "event" is enough to end every process.
+    
+    def is_requested(self):
+        """
+        Returns whether shutdown has been requested, without going through "shared_dict."
+        
+        Return Arguments:
+         * requested [bool] -> Whether "event" is set.
+        """
+        
+        return self.event.is_set()
+    
+    def wait(self, seconds):
+        """
+        Sleeps for a number of seconds, or until shutdown is requested.
+        
+        Arguments:
+         * seconds [float] -> The longest number of seconds to sleep.
+        
+        Return Arguments:
+         * requested [bool] -> Whether shutdown was requested, in which case the caller should stop what it is doing and end.
+        """
+        
+        return self.event.wait(seconds)
+    
+    def handle_signal(self, signum, frame):
+        """
+        The handler of SIGINT and SIGTERM: in LaDD's main.py, either requests shutdown; in any other process, SIGTERM makes it exit at once, running its cleanup (which is how "stop_processes" and "Supervisor" terminate a process without shutting down the others), and SIGINT (which Ctrl+C sends to every process) requests shutdown the first time and makes it exit after that.
+        
+        Arguments:
+         * signum [int] -> The number of the signal.
+         * frame [frame] -> The stack frame that was interrupted.
+        """
+        
+        if os.getpid() != self.owner_pid and (signum == signal.SIGTERM or self.event.is_set()):
+            raise SystemExit(128 + signum)
+        if self.request_time is None:
+            self.request_time = time.monotonic()
+        threading.Thread(target=self.event.set,daemon=True).start()
+        #"event" is set from another thread, as setting it waits for its sleepers to wake up, and the interrupted code may be one of them; "shared_dict" is left to "stop_processes," as the interrupted code may also be in the middle of using it.
+    
+    def install_signal_handlers(self):
+        """
+        Makes "handle_signal" the handler of SIGINT and SIGTERM, in this process and in every process started after it.
+        """
+        
+        signal.signal(signal.SIGINT,self.handle_signal)
+        signal.signal(signal.SIGTERM,self.handle_signal)
+    
+    def stop_processes(self, processes):
+        """
+        Requests shutdown, and waits for every process until its deadline, terminating and then killing it if it misses it; the deadlines all count from "request_time," so the processes end side by side rather than one after the other.
+        
+        Arguments:
+         * processes [list] -> The started multiprocessing.Process objects, each named after the class it runs (e.g. "Camera").
+        """
+        
+        self.request()
+        for process in processes:
+            deadline = self.request_time + self.DEADLINES.get(process.name,self.DEADLINES.get(process.name.split('-')[0],self.DEFAULT_DEADLINE))
+            process.join(max(0.0,deadline - time.monotonic()))
+            outcome = 'ended'
+            if process.is_alive():
+                process.terminate()
+                process.join(self.TERMINATE_GRACE)
+                outcome = 'terminated'
+            if process.is_alive():
+                process.kill()
+                process.join(self.KILL_GRACE)
+                outcome = 'killed'
+            if process.is_alive():
+                outcome = 'abandoned'
+            self.stages.append((process.name,outcome + ' (exit code ' + str(process.exitcode) + ')',time.monotonic() - self.request_time))
+    
+    def time_stage(self, name, function):
+        """
+        Runs one more stage of the shutdown (e.g. shutting down "manager_obj") and adds how long it took to "stages."
+        
+        Arguments:
+         * name [str] -> The name of the stage in the report.
+         * function [function] -> What the stage does; it is given no arguments.
+        """
+        
+        if self.request_time is None:
+            self.request_time = time.monotonic()
+        start_time = time.monotonic()
+        function()
+        self.stages.append((name,'done in ' + str(round(time.monotonic() - start_time,2)) + ' s',time.monotonic() - self.request_time))
+    
+    def report(self):
+        """
+        Prints "stages" and how long the whole shutdown took compared to "SHUTDOWN_BUDGET."
+        
+        Return Arguments:
+         * total [float] -> The number of seconds from "request_time" to the end of the last stage.
+        """
+        
+        total = self.stages[-1][2] if len(self.stages) > 0 else 0.0
+        print('LaDD shut down in ' + str(round(total,2)) + ' s (budget: ' + str(self.SHUTDOWN_BUDGET) + ' s).')
+        for name, outcome, seconds in self.stages:
+            print(' * ' + name + ': ' + outcome + ', ' + str(round(seconds,2)) + ' s after the request.')
+        return total
+    
+    @staticmethod
+    def ignore_signals():
+        """
+        Makes the calling process ignore SIGINT and SIGTERM; used to start "manager_obj," which has to outlive the other processes until "time_stage" shuts it down.
+        """
+        
+        signal.signal(signal.SIGINT,signal.SIG_IGN)
+        signal.signal(signal.SIGTERM,signal.SIG_IGN)
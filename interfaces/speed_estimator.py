@@ -0,0 +1,163 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import collections
+
+"""
+"speed_estimator" Module:
+
+Packages Imported:
+ * collections.
+
+Classes:
+ * Speed_Estimator -> Fits a straight line through the last second or so of OBD speed samples, so that the speed of the vehicle can be predicted at any moment between samples.
+"""
+
+class Speed_Estimator:
+    """
+    The fit is published as an "estimate," a (time,speed,acceleration) tuple that is small enough to be read from "shared_dict" in a single round trip; any process can then predict the current speed from it with "predict" (every process's "time.monotonic" is the same clock).
+    
+    Instance Variables:
+     * window [float] -> How many seconds of samples the line is fitted through.
+     * samples [collections.deque] -> The (time,speed) samples in "window."
+     * estimate [tuple] -> The latest fit: the time of the last sample (as given by "time.monotonic"), the fitted speed at that time (kph), and the fitted acceleration (kph per second).
+    
+    Methods:
+     * __init__ -> Instantiates the class with no samples.
+     * add_sample -> Adds a speed sample, drops the samples that have left "window," and refits "estimate."
+     * fit -> Fits a straight line through "samples" by least squares.
+     * predict [static] -> Predicts the speed at a given time from an "estimate."
+     * time_to_reach [static] -> Predicts how many seconds from a given time it will take for the speed to reach a threshold.
+     * is_below [static] -> Decides whether a speed is below a threshold, with a band under it so that a speed hovering at the threshold does not flip back and forth.
+    """
+    
+    def __init__(self, window=1.5):
+        """
+        Instantiates the class with no samples.
+        
+        Arguments:
+         * window [float] -> How many seconds of samples the line is fitted through.
+        """
+        
+        self.window = window
+        self.samples = collections.deque()
+        self.estimate = (0.0,0.0,0.0)
+    
+    def add_sample(self, sample_time, speed):
+        """
+        Adds a speed sample, drops the samples that have left "window," and refits "estimate."
+        
+        Arguments:
+         * sample_time [float] -> When the speed was sampled, as given by "time.monotonic."
+         * speed [float] -> The speed in kph.
+        
+        Return Arguments:
+         * estimate [tuple] -> The new "estimate."
+        """
+        
+        self.samples.append((sample_time,speed))
+        while self.samples[0][0] < sample_time - self.window:
+            self.samples.popleft()
+        self.estimate = self.fit()
+        return self.estimate
+    
+    def fit(self):
+        """
+        Fits a straight line through "samples" by least squares.
+        
+        Return Arguments:
+         * estimate [tuple] -> The time of the last sample, the fitted speed at that time, and the fitted acceleration; with a single sample, the acceleration is 0.
+        """
+        
+        last_time = self.samples[-1][0]
+        n = len(self.samples)
+        #Times are taken relative to the last sample, so that the intercept is the fitted speed at that sample.
+        sum_t = sum(t - last_time for t, v in self.samples)
+        sum_v = sum(v for t, v in self.samples)
+        sum_tt = sum((t - last_time)**2 for t, v in self.samples)
+        sum_tv = sum((t - last_time)*v for t, v in self.samples)
+        denominator = (n*sum_tt) - (sum_t**2)
+        if n < 2 or denominator <= 1e-9:
+            return (last_time,self.samples[-1][1],0.0)
+        acceleration = ((n*sum_tv) - (sum_t*sum_v))/denominator
+        speed = (sum_v - (acceleration*sum_t))/n
+        return (last_time,speed,acceleration)
+    
+    @staticmethod
+    def predict(estimate, now, max_horizon=1.0):
+        """
+        Predicts the speed at a given time from an "estimate."
+        
+        Arguments:
+         * estimate [tuple] -> An "estimate" of a "Speed_Estimator."
+         * now [float] -> The time to predict the speed at, as given by "time.monotonic."
+         * max_horizon [float] -> How many seconds past the last sample the speed is extrapolated at most.
+        
+        Return Arguments:
+         * speed [float] -> The predicted speed in kph (never negative).
+         * acceleration [float] -> The fitted acceleration in kph per second.
+        """
+        
+        sample_time, speed, acceleration = estimate
+        return max(0.0,speed + (acceleration * min(max(now - sample_time,0.0),max_horizon))), acceleration
+    
+    @staticmethod
+    def time_to_reach(estimate, now, threshold, max_horizon=1.0):
+        """
+        Predicts how many seconds from a given time it will take for the speed to reach a threshold.
+        
+        Arguments:
+         * estimate [tuple] -> An "estimate" of a "Speed_Estimator."
+         * now [float] -> The time to predict from, as given by "time.monotonic."
+         * threshold [float] -> The speed in kph.
+         * max_horizon [float] -> How many seconds past the last sample the speed is extrapolated at most.
+        
+        Return Arguments:
+         * seconds [float] -> 0 if the speed is already at or above "threshold," None if it is not heading towards it.
+        """
+        
+        speed, acceleration = Speed_Estimator.predict(estimate,now,max_horizon)
+        if speed >= threshold:
+            return 0.0
+        if acceleration <= 0:
+            return None
+        return (threshold - speed)/acceleration
+    
+    @staticmethod
+    def is_below(speed, threshold, previously_below, hysteresis=2.0):
+        """
+        Decides whether a speed is below a threshold, with a band under it: a speed that was below is above as soon as it reaches "threshold," but one that was above has to drop under "threshold" minus "hysteresis" to be below again, so that a noisy prediction hovering at the threshold does not flip back and forth, while LaDD still starts warning the driver at "threshold" itself.
+        
+        Arguments:
+         * speed [float] -> The speed in kph.
+         * threshold [float] -> The speed in kph.
+         * previously_below [bool] -> What was last decided; None if nothing has been, in which case there is no band.
+         * hysteresis [float] -> The width of the band in kph.
+        
+        Return Arguments:
+         * below [bool] -> Whether the speed is below the threshold.
+        """
+        
+        if previously_below is None:
+            return speed < threshold
+        if previously_below:
+            return speed < threshold
+        return speed < threshold - hysteresis
@@ -0,0 +1,311 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing as mp
+import time
+from interfaces import metrics
+
+"""
+"supervisor" Module:
+
+Packages Imported:
+ * multiprocessing (as mp),
+ * time,
+ * interfaces.metrics.
+
+Classes:
+ * Heartbeat -> Lets the loop of one of LaDD's processes tell "Supervisor" that it is still running, by writing the time into shared memory.
+ * Supervisor -> Watches the heartbeats and exit codes of LaDD's processes from LaDD's main.py, and restarts a process that has crashed, ended on its own, or hung, keeping "shared_dict" (which lives in "manager_obj") intact.
+"""
+
+class Heartbeat:
+    """
+    Instance Variables:
+     * beats [mp.RawArray] -> The shared memory holding the last heartbeat of the process, as given by "time.monotonic" (which is the same clock in every process).
+     * index [int] -> The element of "beats" belonging to the process.
+    
+    Methods:
+     * __init__ -> Instantiates the class.
+     * beat -> Writes the current time into "beats"; a single write to shared memory, with no lock and no inter-process communication.
+    """
+    
+    def __init__(self, beats, index):
+        """
+        Instantiates the class.
+        
+        Arguments:
+         * beats [mp.RawArray] -> The shared memory holding the last heartbeat of the process.
+         * index [int] -> The element of "beats" belonging to the process.
+        """
+        
+        self.beats = beats
+        self.index = index
+    
+    def beat(self):
+        """
+        Writes the current time into "beats."
+        """
+        
+        self.beats[self.index] = time.monotonic()
+
+class Supervisor:
+    """
+    A process is restarted from the object it was first started with, which LaDD's main.py never runs itself and so is still as it was before "begin" was called; everything the processes share is in "shared_dict," "notifier's" pipe, and "shutdown_coordinator's" event, which all outlive any one process. A process that keeps failing is restarted after longer and longer delays ("RESTART_DELAYS"), so that a missing camera does not make LaDD spin.
+    
+    Instance Variables:
+     * CHECK_INTERVAL [float (constant)] -> Every how many seconds the processes are checked on, which bounds how long a crash goes unnoticed.
+     * STARTUP_GRACE [float (constant)] -> How many seconds a process has after being started before it is considered hung for not beating (e.g. while "Camera" opens the camera).
+     * HANG_TIMEOUTS [dict (constant)] -> How many seconds each process, by the name of its multiprocessing.Process, may go without beating before it is considered hung; "OBD" may wait on several serial reads of up to a second each, and every "Camera-<label>" has the timeout of "Camera."
+     * DEFAULT_HANG_TIMEOUT [float (constant)] -> The hang timeout of a process not in "HANG_TIMEOUTS."
+     * STOP_GRACE [float (constant)] -> How many seconds a hung process has to end after being terminated, and then after being killed.
+     * RESTART_DELAYS [list (constant)] -> How many seconds to wait before restarting a process, by how many times in a row it has failed; the last delay is used for every failure after.
+     * STABLE_TIME [float (constant)] -> How many seconds a restarted process has to run for its failures in a row to be forgotten.
+     * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+     * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Whose event "run" sleeps on between checks; no process is restarted once shutdown has been requested.
+     * target [function] -> What every process runs, given the object of the process (LaDD's main.py's "begin_process").
+     * placement [interfaces.placement.Placement] -> The cores and scheduling policy every process is given when it starts, before it starts any threads of its own; None to leave the processes as they are.
+     * memory_budget [interfaces.memory.Memory_Budget] -> Given the IDs of the running processes at every check, to sample their memory; None to not sample it.
+     * beats [list] -> The last heartbeat of every process that has one, each in an mp.RawArray of its own created by "create_heartbeat" before any process is started, so that they all inherit it and there is room for as many processes as are added.
+     * entries [dict] -> What is known of every process, by name: "obj" (what it runs), "index" (its element of "beats"), "process" (its current multiprocessing.Process, or None while it waits to be restarted), "start_time," "failures" (in a row), "failure_time," "restart_time," "recovering" (whether it has yet to beat since being restarted), "restarts," and "recovery_seconds" (of the last restart).
+     * metrics [interfaces.metrics.Metrics] -> How many times each process has been restarted, and how long each took to recover.
+    
+    Methods:
+     * __init__ -> Instantiates the class.
+     * create_heartbeat -> Gives a process an element of "beats" and returns the "Heartbeat" it beats with, to be handed to the object of the process before "add."
+     * add -> Adds the object of a process, which "start" runs in a multiprocessing.Process named after it.
+     * start -> Starts every process that has been added.
+     * start_process -> Starts one process in a new multiprocessing.Process.
+     * run_process -> The body of every multiprocessing.Process, which applies the placement of the process to itself and then runs "target."
+     * run -> Checks on the processes, and has "memory_budget" sample them, every "CHECK_INTERVAL" until shutdown is requested, or until every process has ended while LaDD was being turned off (such as when it could not start without the user interface to say why).
+     * check -> Restarts the processes that crashed, ended, or hung, once their "RESTART_DELAYS" have passed, and records when the restarted ones have recovered.
+     * fail -> Stops a failed process if it is still running and schedules its restart.
+     * get_processes -> Returns the current multiprocessing.Process of every process that has one, for "shutdown_coordinator" to stop.
+     * publish_status -> Publishes the restarts, last recovery time, and current process ID of every process as "shared_dict's" "supervisor," and flushes "metrics."
+    """
+    
+    CHECK_INTERVAL = 0.5
+    STARTUP_GRACE = 10.0
+    HANG_TIMEOUTS = {'User_Interface':5.0,'Debug_Stream':5.0,'Camera':5.0,'Audio':5.0,'OBD':10.0}
+    DEFAULT_HANG_TIMEOUT = 5.0
+    STOP_GRACE = 0.5
+    RESTART_DELAYS = [0.0,1.0,2.0,5.0,10.0,30.0]
+    STABLE_TIME = 60.0
+    
+    def __init__(self, shared_dict, shutdown_coordinator, target, placement=None, memory_budget=None):
+        """
+        Instantiates the class.
+        
+        Arguments:
+         * shared_dict [multiprocessing.Manager.dict()] -> A special dictionary returned by the Manager object "manager_obj" located in LaDD's main.py, this is a dictionary shared across the different processes that constitute LaDD.
+         * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Whose event "run" sleeps on between checks.
+         * target [function] -> What every process runs, given the object of the process.
+         * placement [interfaces.placement.Placement] -> The cores and scheduling policy every process is given when it starts (optional).
+         * memory_budget [interfaces.memory.Memory_Budget] -> Samples the memory of the running processes at every check (optional).
+        """
+        
+        self.shared_dict = shared_dict
+        self.shutdown_coordinator = shutdown_coordinator
+        self.target = target
+        self.placement = placement
+        self.memory_budget = memory_budget
+        self.beats = []
+        self.entries = {}
+        self.metrics = metrics.Metrics(self.shared_dict,'main')
+    
+    def create_heartbeat(self, name):
+        """
+        Gives a process an element of "beats" and returns the "Heartbeat" it beats with, to be handed to the object of the process before "add."
+        
+        Arguments:
+         * name [str] -> The name of the process (e.g. "Camera").
+        
+        Return Arguments:
+         * heartbeat [Heartbeat] -> What the loop of the process calls "beat" on.
+        """
+        
+        self.beats.append(mp.RawArray('d',1))
+        self.entries[name] = {'obj':None,'index':len(self.beats)-1,'process':None,'start_time':0.0,'failures':0,'failure_time':0.0,'restart_time':0.0,
+                              'recovering':False,'restarts':0,'recovery_seconds':None}
+        return Heartbeat(self.beats[-1],0)
+    
+    def add(self, name, obj):
+        """
+        Adds the object of a process, which "start" runs in a multiprocessing.Process named after it; a process not given a heartbeat by "create_heartbeat" is only restarted when it crashes or ends, never for hanging.
+        
+        Arguments:
+         * name [str] -> The name of the process, which is also how "shutdown_coordinator" looks up its deadline.
+         * obj [multiple types] -> The object of the process, whose "begin" method is its loop.
+        """
+        
+        if name not in self.entries:
+            self.create_heartbeat(name)
+            self.entries[name]['index'] = None
+        self.entries[name]['obj'] = obj
+    
+    def start(self):
+        """
+        Starts every process that has been added.
+        """
+        
+        for name in self.entries:
+            self.start_process(name)
+        self.publish_status()
+    
+    def start_process(self, name):
+        """
+        Starts one process in a new multiprocessing.Process.
+        
+        Arguments:
+         * name [str] -> The name of the process.
+        """
+        
+        entry = self.entries[name]
+        entry['start_time'] = time.monotonic()
+        if entry['index'] is not None:
+            self.beats[entry['index']][0] = entry['start_time']
+        entry['process'] = mp.Process(target=self.run_process,args=(name,entry['obj']),name=name)
+        entry['process'].start()
+    
+    def run_process(self, name, obj):
+        """
+        The body of every multiprocessing.Process, which applies the placement of the process to itself and then runs "target"; a restarted process is placed again, as it is a new process.
+        
+        Arguments:
+         * name [str] -> The name of the process, by which its placement is looked up.
+         * obj [multiple types] -> The object of the process.
+        """
+        
+        if self.placement is not None:
+            self.placement.apply(name)
+        self.target(obj)
+    
+    def run(self):
+        """
+        Checks on the processes, and has "memory_budget" sample them, every "CHECK_INTERVAL" until shutdown is requested, or until every process has ended while LaDD was being turned off (such as when it could not start without the user interface to say why).
+        """
+        
+        while not self.shutdown_coordinator.wait(self.CHECK_INTERVAL):
+            if not self.check():
+                break
+            if self.memory_budget is not None:
+                self.memory_budget.check({name:entry['process'].pid for name, entry in self.entries.items() if entry['process'] is not None})
+    
+    def check(self):
+        """
+        Restarts the processes that crashed, ended, or hung, once their "RESTART_DELAYS" have passed, and records when the restarted ones have recovered, that is, when they first beat.
+        
+        Return Arguments:
+         * running [bool] -> Whether any process is still running or waiting to be restarted.
+        """
+        
+        turning_off = self.shared_dict['turn_off_LaDD'] or self.shutdown_coordinator.is_requested()
+        now = time.monotonic()
+        running = False
+        status_changed = False
+        for name, entry in self.entries.items():
+            process = entry['process']
+            if process is None:
+                if not turning_off:
+                    running = True
+                    if now >= entry['restart_time']:
+                        entry['restarts'] += 1
+                        self.metrics.increment(name.lower() + '_restarts_total')
+                        self.start_process(name)
+                        print('"' + name + '" restarted (restart ' + str(entry['restarts']) + ').')
+                        status_changed = True
+                continue
+            
+            if not process.is_alive():
+                if not turning_off:
+                    self.fail(name,now,'crashed' if process.exitcode != 0 else 'ended',now)
+                    running = True
+                    status_changed = True
+                continue
+            running = True
+            if turning_off or entry['index'] is None:
+                continue
+            
+            last_beat = self.beats[entry['index']][0]
+            if entry['recovering'] and last_beat > entry['start_time']:
+                entry['recovering'] = False
+                entry['recovery_seconds'] = last_beat - entry['failure_time']
+                self.metrics.observe('recovery_seconds',entry['recovery_seconds'],(0.5,1.0,2.0,5.0,10.0,30.0,60.0))
+                status_changed = True
+            if now - last_beat > self.HANG_TIMEOUTS.get(name,self.HANG_TIMEOUTS.get(name.split('-')[0],self.DEFAULT_HANG_TIMEOUT)) and now - entry['start_time'] > self.STARTUP_GRACE:
+                self.fail(name,now,'hung',last_beat)
+                status_changed = True
+            elif entry['failures'] > 0 and now - entry['start_time'] > self.STABLE_TIME:
+                entry['failures'] = 0
+        
+        if status_changed:
+            self.publish_status()
+        return running
+    
+    def fail(self, name, now, reason, failure_time):
+        """
+        Stops a failed process if it is still running (terminating it, then killing it) and schedules its restart after the delay in "RESTART_DELAYS" for its number of failures in a row. A failed "Camera" leaves nothing detected in "shared_dict" until it is back, rather than the warning flags it last set, which "Audio" would keep sounding (or keep silent) on; with more than one camera, "Fusion" does this for any camera that stops publishing.
+        
+        Arguments:
+         * name [str] -> The name of the process.
+         * now [float] -> The current time as given by "time.monotonic."
+         * reason [str] -> How the process failed ("crashed," "ended," or "hung").
+         * failure_time [float] -> When the process failed, from which its recovery time is counted: the time it was found to have ended, or its last heartbeat if it hung.
+        """
+        
+        entry = self.entries[name]
+        process = entry['process']
+        if process.is_alive():
+            process.terminate()
+            process.join(self.STOP_GRACE)
+            if process.is_alive():
+                process.kill()
+                process.join(self.STOP_GRACE)
+        print('"' + name + '" ' + reason + ' (exit code ' + str(process.exitcode) + ').')
+        if name == 'Camera' and 'Fusion' not in self.entries:
+            self.shared_dict['crossed_divider'] = False
+            self.shared_dict['crossed_lane'] = False
+            self.shared_dict['nothing_detected'] = True
+        
+        entry['process'] = None
+        entry['failure_time'] = failure_time
+        entry['recovering'] = entry['index'] is not None
+        entry['restart_time'] = now + self.RESTART_DELAYS[min(entry['failures'],len(self.RESTART_DELAYS)-1)]
+        entry['failures'] += 1
+        self.metrics.increment(name.lower() + '_' + reason + '_total')
+    
+    def get_processes(self):
+        """
+        Returns the current multiprocessing.Process of every process that has one, for "shutdown_coordinator" to stop.
+        
+        Return Arguments:
+         * processes [list] -> The multiprocessing.Process objects.
+        """
+        
+        return [entry['process'] for entry in self.entries.values() if entry['process'] is not None]
+    
+    def publish_status(self):
+        """
+        Publishes the restarts, last recovery time, and current process ID of every process as "shared_dict's" "supervisor," and flushes "metrics."
+        """
+        
+        self.shared_dict['supervisor'] = {name:{'restarts':entry['restarts'],'recovery_seconds':entry['recovery_seconds'],'running':entry['process'] is not None,
+                                                'pid':entry['process'].pid if entry['process'] is not None else None} for name, entry in self.entries.items()}
+        self.metrics.flush()
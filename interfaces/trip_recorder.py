@@ -0,0 +1,196 @@
+"""
+Copyright 2017-2018 Kyle Nied (nied.kyle@gmail.com)
+
+<------------------------------------------------------------------>
+
+This file is part of LaDD.
+
+LaDD is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LaDD is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import os
+import queue
+import threading
+import time
+
+"""
+"trip_recorder" Module:
+
+Packages Imported:
+ * numpy (as np),
+ * os,
+ * queue,
+ * threading,
+ * time.
+
+Classes:
+ * Trip_Recorder -> Appends one fixed-width binary record per processed frame (line midpoints, averaged lane/divider/vehicle x-coordinates, "state," and speed) to a trip file, using a background writer thread so that "Camera" never waits on the SD card.
+"""
+
+class Trip_Recorder:
+    """
+    Instance Variables:
+     * MAGIC [bytes (constant)] -> The first bytes of every trip file, followed by the size of one record, which together make up a header of "HEADER_SIZE" bytes.
+     * HEADER_SIZE [int (constant)] -> The size of the header of a trip file in bytes.
+     * MAX_LINES [int (constant)] -> The number of line midpoints a record has room for; "Camera" discards frames with more than 8 lines, so 10 is plenty.
+     * STATES [list (constant)] -> The "states" of "Camera," whose indices are what is stored in the "state" field of a record (index 0 meaning no "state" yet).
+     * RECORD_DTYPE [np.dtype (constant)] -> The layout of one record; x-coordinates that were not detected are stored as NaN.
+     * path [str] -> The path of the trip file being written, named after when it was created down to the millisecond, with a number added if that name is taken (e.g. by a "Camera" restarted within the same millisecond), so that no trip is ever overwritten.
+     * chunk_size [int] -> How many records are gathered before they are handed to the writer thread.
+     * chunk [np.ndarray] -> The chunk of records currently being filled by "record."
+     * chunk_fill [int] -> How many records of "chunk" have been filled.
+     * pending_chunks [queue.Queue] -> The bounded queue of filled chunks waiting to be written by "writer_thread"; if it is full, the chunk is dropped instead of making "Camera" wait.
+     * dropped_records [int] -> How many records have been dropped because "pending_chunks" was full.
+     * writer_thread [threading.Thread] -> The daemon thread running "write_chunks."
+    
+    Methods:
+     * __init__ -> Instantiates the class, creates the trip file with its header, and starts "writer_thread."
+     * record -> Fills the next record of "chunk" with the results of one frame, handing "chunk" to "writer_thread" once it is full.
+     * flush_chunk -> Hands the filled part of "chunk" to "writer_thread" without waiting, and starts a new "chunk."
+     * write_chunks -> The body of "writer_thread," which appends the chunks in "pending_chunks" to the trip file until it is given None.
+     * close -> Flushes what is left in "chunk," then waits for "writer_thread" to write everything and end.
+     * load_trip [static] -> Loads a whole trip file as a dictionary of NumPy arrays, one per field of "RECORD_DTYPE," plus the decoded "states."
+    """
+    
+    MAGIC = b'LaDDTRIP'
+    HEADER_SIZE = 16
+    MAX_LINES = 10
+    STATES = ['','in_lane','out_lane','no_lane','over_divider','undetermined']
+    RECORD_DTYPE = np.dtype([('time','<f8'),('frame_number','<u4'),('speed','<f4'),('lines','<f4',(MAX_LINES,)),('lane','<f4',(2,)),
+                             ('divider','<f4',(4,)),('vehicle','<f4',(2,)),('line_count','u1'),('state','u1')])
+    
+    def __init__(self, directory='trips', chunk_size=256, max_pending_chunks=8):
+        """
+        Instantiates the class, creates the trip file with its header, and starts "writer_thread."
+        
+        Arguments:
+         * directory [str] -> The directory the trip file is created in, named after the time it was created.
+         * chunk_size [int] -> How many records are gathered before they are handed to the writer thread.
+         * max_pending_chunks [int] -> How many filled chunks may wait to be written before new ones are dropped.
+        """
+        
+        os.makedirs(directory,exist_ok=True)
+        now = time.time()
+        name = time.strftime('trip-%Y%m%d-%H%M%S',time.localtime(now)) + '-%03d' % (int(now*1000) % 1000)
+        suffix = 0
+        while True:
+            self.path = os.path.join(directory,name + ('-' + str(suffix) if suffix > 0 else '') + '.ladd')
+            try:
+                with open(self.path,'xb') as trip_file:
+                    trip_file.write(self.MAGIC + np.array([self.RECORD_DTYPE.itemsize,0],'<u4').tobytes())
+                break
+            except FileExistsError:
+                suffix += 1
+        
+        self.chunk_size = chunk_size
+        self.chunk = np.empty(self.chunk_size,self.RECORD_DTYPE)
+        self.chunk_fill = 0
+        self.pending_chunks = queue.Queue(max_pending_chunks)
+        self.dropped_records = 0
+        
+        self.writer_thread = threading.Thread(target=self.write_chunks,daemon=True)
+        self.writer_thread.start()
+    
+    def record(self, frame_number, speed, lines, lane, divider, vehicle, state):
+        """
+        Fills the next record of "chunk" with the results of one frame, handing "chunk" to "writer_thread" once it is full.
+        
+        Arguments:
+         * frame_number [int] -> The number of the frame.
+         * speed [float] -> The speed of the vehicle in kph.
+         * lines [list] -> The sorted midpoints of the lines found in the frame ("Camera's" "avrg_x_coor_of_lines").
+         * lane [list] -> "Camera's" "avrg_lane_x1" and "avrg_lane_x2" (each may be None).
+         * divider [list] -> "Camera's" "avrg_divider_x1" through "avrg_divider_x4" (each may be None).
+         * vehicle [list] -> "Camera's" "avrg_vehicle_width_x_coors" (may be empty).
+         * state [str] -> "Camera's" "state" (may be None).
+        """
+        
+        row = self.chunk[self.chunk_fill]
+        row['time'] = time.time()
+        row['frame_number'] = frame_number
+        row['speed'] = speed
+        row['line_count'] = min(len(lines),self.MAX_LINES)
+        row['lines'] = np.nan
+        row['lines'][:row['line_count']] = lines[:self.MAX_LINES]
+        row['lane'] = [np.nan if x is None else x for x in lane]
+        row['divider'] = [np.nan if x is None else x for x in divider]
+        row['vehicle'] = vehicle if len(vehicle) == 2 else np.nan
+        row['state'] = self.STATES.index(state) if state in self.STATES else 0
+        
+        self.chunk_fill += 1
+        if self.chunk_fill == self.chunk_size:
+            self.flush_chunk()
+    
+    def flush_chunk(self):
+        """
+        Hands the filled part of "chunk" to "writer_thread" without waiting, and starts a new "chunk."
+        """
+        
+        if self.chunk_fill > 0:
+            try:
+                self.pending_chunks.put_nowait(self.chunk[:self.chunk_fill])
+            except queue.Full:
+                self.dropped_records += self.chunk_fill
+            self.chunk = np.empty(self.chunk_size,self.RECORD_DTYPE)
+            self.chunk_fill = 0
+    
+    def write_chunks(self):
+        """
+        The body of "writer_thread," which appends the chunks in "pending_chunks" to the trip file until it is given None.
+        """
+        
+        with open(self.path,'ab') as trip_file:
+            chunk = self.pending_chunks.get()
+            while chunk is not None:
+                chunk.tofile(trip_file)
+                trip_file.flush()
+                chunk = self.pending_chunks.get()
+    
+    def close(self):
+        """
+        Flushes what is left in "chunk," then waits for "writer_thread" to write everything and end.
+        """
+        
+        self.flush_chunk()
+        self.pending_chunks.put(None)
+        self.writer_thread.join()
+    
+    @staticmethod
+    def load_trip(path):
+        """
+        Loads a whole trip file as a dictionary of NumPy arrays, one per field of "RECORD_DTYPE," plus the decoded "states."
+        
+        Arguments:
+         * path [str] -> The path of the trip file.
+        
+        Return Arguments:
+         * trip [dict] -> The arrays of the trip, keyed by the names of the fields of "RECORD_DTYPE," with "states" holding the "state" of every record as a string.
+        """
+        
+        with open(path,'rb') as trip_file:
+            header = trip_file.read(Trip_Recorder.HEADER_SIZE)
+        if header[:len(Trip_Recorder.MAGIC)] != Trip_Recorder.MAGIC or int(np.frombuffer(header[8:12],'<u4')[0]) != Trip_Recorder.RECORD_DTYPE.itemsize:
+            raise ValueError('"' + path + '" is not a trip file of this version of LaDD.')
+        
+        #A record cut short by a power loss is left out.
+        record_count = (os.path.getsize(path) - Trip_Recorder.HEADER_SIZE)//Trip_Recorder.RECORD_DTYPE.itemsize
+        if record_count > 0:
+            records = np.memmap(path,Trip_Recorder.RECORD_DTYPE,'r',Trip_Recorder.HEADER_SIZE,(record_count,))
+        else:
+            records = np.empty(0,Trip_Recorder.RECORD_DTYPE)
+        
+        trip = {name:np.array(records[name]) for name in Trip_Recorder.RECORD_DTYPE.names}
+        trip['states'] = np.array(Trip_Recorder.STATES)[trip['state']]
+        return trip
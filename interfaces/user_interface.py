@@ -21,16 +21,26 @@ along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
 
 import csv, PIL
 import PIL.Image, PIL.ImageTk
+import numpy as np
+import os
+import time
 from tkinter import *
 from tkinter import ttk
 from tkinter import messagebox
+from interfaces import metrics, profiler, memory
 
 """
 "user_interface" Module:
 Packages Imported:
  * csv,
- * PIL.
- * tkinter.
+ * PIL,
+ * numpy (as np),
+ * os,
+ * time,
+ * tkinter,
+ * interfaces.metrics,
+ * interfaces.profiler,
+ * interfaces.memory.
 
 Classes:
  * Shutdown_Dialog_Window -> A class that creates a custom shutdown dialog window used by the "User_Interface" class, with a built in timer to automatically close the dialog window without shutting down LaDD.
@@ -150,13 +160,24 @@ class User_Interface:
      * mp_help_label_frame [tkinter.ttk.Labelframe] -> A "Labelframe" containing buttons that provide "Help" statements on the "camera_page" and the "set_config_vars_page". It is slave to "main_page."
      * mp_cp_help_button [tkinter.ttk.Button] -> A button that when pressed displays an "Help" statement regarding the function and use of the "camera_page" in a generic tkinter information dialog window. It is slave to "mp_help_label_frame."
      * mp_scvp_help_button [tkinter.ttk.Button] -> A button that when pressed displays an "Help" statement regarding the function and use of the "set_config_vars_page" in a generic tkinter information dialog window. It is slave to "mp_help_label_frame."
+     * profile_process_name [tkinter.StringVar] -> The process selected in "mp_profile_combobox."
+     * mp_profile_label_frame [tkinter.ttk.Labelframe] -> A "Labelframe" containing "mp_profile_combobox" and "mp_profile_button." It is slave to "main_page."
+     * mp_profile_combobox [tkinter.ttk.Combobox] -> The "Combobox" where the user can select which of the processes in "shared_dict's" "supervisor" to profile. It is slave to "mp_profile_label_frame."
+     * mp_profile_button [tkinter.ttk.Button] -> A button that when pressed calls "profile_process." It is slave to "mp_profile_label_frame."
      
      * feed_name [tkinter.StringVar] -> The video feed stage that was selected in "cp_frame_combobox" by the user; it is based on this value that what stage of the video feed in being processed is displayed in "cp_feed_label" to the user.
      * cp_threshold_spinbox_value [tkinter.StringVar] -> The current value of the lower value of the binary threshold stored in "shared_dict's" "binary_threshold_value_lower_end" that is applied on "Camera's" "ROI," set in "cp_threshold_spinbox."
      * cp_warping_spinbox_value [tkinter.StringVar] -> The current value of the "lower" row of "Camera's" "ROI" stored in "shared_dict's" "first_row_for_warping" that is used, along with the row after it, to warp "ROI" into "Camera's" "WarpedROI."
      * cp_warping_checkbutton_value [tkinter.StringVar] -> Used to determine whether to show or hide red lines that denote "shared_dict's" "first_row_for_warping," as well as the row after it, in "shared_dict's" "ROI_frame."
      * Image_obj [PIL.Image] -> The converted image of either "shared_dict's" "full frame", "ROI_frame", "warped_ROI_frame", or "processed_ROI_frame" into a form that can then be converted into an PIL.ImageTk.PhotoImage image object that can then be displayed in "cp_feed_label."
-     * ImageTk_obj [PIL.ImageTk.PhotoImage] -> The converted "Image_obj" image object that can be displayed in "cp_feed_label."
+     * ImageTk_obj [PIL.ImageTk.PhotoImage] -> The converted "Image_obj" image object that can be displayed in "cp_feed_label." It is created once per feed size and afterwards updated in place with its "paste" method.
+     * feed_keys [dict] -> Maps the values of "cp_frame_combobox" to the keys of "shared_dict" holding those frames.
+     * feed_scales [dict] -> Maps the keys of "shared_dict" holding frames to how many times smaller they are displayed in "cp_feed_label."
+     * last_frame_number [int] -> The value of "shared_dict's" "frame_number" the last time "update_feed_frame" rendered a frame; if it has not changed, there is nothing new to render.
+     * last_feed_key [str] -> The key of "shared_dict" that "update_feed_frame" rendered from last time.
+     * resize_plan [tuple] -> The shape and scale of the frame that "resize_rows," "resize_cols," "row_buffer," and "resize_buffer" were last computed for.
+     * resize_rows {and} resize_cols [np.ndarray] -> The precomputed integer indices of the rows and columns of a frame that make up its resized version, recomputed only when the shape of the frame or its scale changes.
+     * row_buffer {and} resize_buffer [np.ndarray] -> Reused buffers holding a frame after its rows, and then its columns, have been picked out with "resize_rows" and "resize_cols."
      * cp_frame_combobox_label [tkinter.ttk.Label] -> The "Label" displaying the string "Frame type from camera feed:" above "cp_frame_combobox", indicating to the user that a specific stage of the video feed in the process of being processed can be selected in the "cp_frame_combobox." It is a slave of "camera_page."
      * cp_frame_combobox [tkinter.ttk.Combobox] -> The "Combobox" where the user can select a specific stage of the video feed in the process of being processed that will be displayed in "cp_feed_label." It is a slave to "camera_page."
      * cp_feed_label [tkinter.ttk.Label] -> Where "ImageTk_obj" that is derived from either "shared_dict's" "full_frame", "ROI_frame", 'warped_ROI_frame', or "processed_ROI_frame", according to what the user chooses in "cp_frame_combobox", is displayed. It is a slave to "camera_page."
@@ -166,6 +187,20 @@ class User_Interface:
      * cp_warping_spinbox_label [tkinter.Label] -> The "Label" displaYING the string "First Row for Warping" above "cp_warping_spinbox." It is a slave to "camera_page."
      * cp_warping_spinbox [tkinter.Spinbox] -> The "Spinbox" where the user can change the value of the "lower" row of "Camera's" "ROI" stored in "shared_dict's" "first_row_for_warping" that is used, along with the row after it, to warp "ROI" into "Camera's" "WarpedROI." It is a slave to "camera_page."
      * cp_warping_checkbutton [tkinter.ttk.Checkbutton] -> Can show or hide red lines that denote "shared_dict's" "first_row_for_warping," as well as the row after it, in "shared_dict's" "ROI_frame." It is a slave to "camera_page."
+     * detection_engine_name [tkinter.StringVar] -> The detection engine selected in "cp_engine_combobox."
+     * cp_engine_combobox_label [tkinter.ttk.Label] -> The "Label" displaying the string "Detection Engine:" above "cp_engine_combobox." It is a slave to "camera_page."
+     * cp_engine_combobox [tkinter.ttk.Combobox] -> The "Combobox" where the user can select how "Camera" finds the lines on the road, which is stored in "shared_dict's" "detection_engine." It is a slave to "camera_page."
+     * refresh_interval [int] -> The least number of milliseconds between two calls of "update_feed_frame," taken from "shared_dict's" "ui_refresh_interval," which is set by "Camera's" frame-rate governor ("update_warning" is never held back by it, so that warnings are never delayed).
+     * notifier [interfaces.notifier.Notifier] -> The pipe through which "Camera" and "OBD" tell the user interface that the warning flags have changed or that a new frame has been published; registered with "root's" event loop by "begin." If None, "update_feed_frame" and "update_warning" poll "shared_dict" every 16 milliseconds instead.
+     * metrics [interfaces.metrics.Metrics] -> How many frames of the feed have been rendered and how long rendering them takes, published by "update_performance_mode."
+     * full_frame_scale [int] -> How many times smaller than captured "Camera" publishes "shared_dict's" "full_frame" in the current memory mode, read every second by "update_performance_mode," so that "full_frame" is still displayed at the same size.
+     * allocation_tracker [interfaces.memory.Allocation_Tracker] -> Writes the lines of code holding the most memory every 30 seconds, when LaDD is run with "--tracemalloc"; called by "update_performance_mode."
+     * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten every second by "update_performance_mode", so that "Supervisor" can tell if this process has hung; None when nothing is supervising it.
+     * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Tells the other processes to end when "shutdown" is called, and tells the user interface to close when shutdown is requested elsewhere (such as by SIGTERM when the ignition drops); None to only use "shared_dict's" "turn_off_LaDD."
+     * feed_update_pending [bool] -> Whether a call of "update_feed_frame" has already been scheduled in response to a "FRAME" notification.
+     * last_feed_update_time [float] -> When "update_feed_frame" was last called, as given by "time.monotonic."
+     * cp_performance_label_value [tkinter.StringVar] -> The current performance mode of "Camera's" frame-rate governor and the frame rate of its detection loop.
+     * cp_performance_label [tkinter.ttk.Label] -> The "Label" displaying "cp_performance_label_value." It is a slave to "camera_page."
      
      * accepted_characters [list] -> A list of the characters that are "available" and acceptable for the user to enter a new value for a configuration variable in the "set_cofig_vars_page."
      * outcome [tkinter.StringVar] -> The result of pressing the "scvp_enter_button" with whatever characters are or the lack thereof in "scvp_entry"; the value of this variable will either provide the current value of a configuration variable, tell the user that they have succesfully changed the value of a configuration variable, or display an error regarding what value "new_config_var_value" holds.
@@ -187,19 +222,28 @@ class User_Interface:
     
     Methods:
      * __init__ -> Instantiates the class, and provides a user interface for LaDD.
-     * begin -> Checks to make sure that all of the configuration variables are in check, and the OBD and camera are connected, warning the user if not, then launches the user interface.
+     * begin -> Launches the user interface, warning the user through "show_startup_warnings" once it is running.
+     * show_startup_warnings -> Checks to make sure that all of the configuration variables are in check, and the OBD and camera are connected, warning the user if not.
      * do_nothing -> Acts as a dummy method for "root's" "protocol" "WM_DELETE_WINDOW," which disables the "X" button on the user interface's windows.
      * about_window -> Displays the "About" statement in a generic information window.
      * disclaimer_window -> Displays the disclaimer statement in a generic tkinter information dialog window.
      * cp_help_window -> Displays the "'Camera' Help" statement in a generic information window.
      * scvp_help_window -> Displays the "'Set Config. Vars." statement in a generic information window.
      * shutdown_window -> Creates an "Shutdown_Dialog_Window" instance that produces a special "yes/no" dialog window with a built-in 5-second timer that automatically closes the window without shutting down LaDD.
-     * shutdown -> Closes LaDD's user interface and signals via "shared_dict's" "turn_off_LaDD" key to all of the other processes to end, effectively shutting down LaDD.
+     * shutdown -> Closes LaDD's user interface and signals via "shutdown_coordinator" (or "shared_dict's" "turn_off_LaDD" key) to all of the other processes to end, effectively shutting down LaDD.
+     * check_shutdown_request -> Calls "shutdown" once shutdown has been requested by another process, so that the user interface does not wait for its deadline to be terminated.
+     * update_profile_processes -> Fills "mp_profile_combobox" with the processes in "shared_dict's" "supervisor" when it is opened.
+     * profile_process -> Sends "interfaces.profiler.Profiler.SIGNAL" to the process selected in "mp_profile_combobox," which then profiles itself for a few seconds without LaDD being restarted.
      * show_both_rows_for_warping -> Determines whether to show or hide red lines that denote "shared_dict's" "first_row_for_warping," as well as the row after it, in "shared_dict's" "ROI_frame."
      * update_binary_threshold_value_lower_end -> Updates the value of "shared_dict's" "binary_threshold_value_lower_end" by setting it to "cp_threhold_spinbox_value" when it is editted.
      * update_first_row_for_warping -> Updates the value of "shared_dict's" "first_row_for_warping" by setting it to "cp_warping_spinbox_value" when it is editted.
+     * update_detection_engine -> Updates the value of "shared_dict's" "detection_engine" by setting it to the engine selected in "cp_engine_combobox."
      * update_feed_frame -> Updates what is being displayed in the "cp_feed_label" with the latest images from "shared_dict's" "full_frame", "ROI_frame", or "processed_ROI_frame," depending on what was selected in the "cp_frame_combobox," after they were converted into usable tkinter images and stored in "ImageTk_obj."
+     * render_frame -> Resizes a frame into "resize_buffer" with the precomputed "resize_rows" and "resize_cols," then pastes it into "ImageTk_obj."
+     * handle_notifications -> Called by "root's" event loop when there are notifications waiting in "notifier," it updates the warning at once and schedules "update_feed_frame" no sooner than "refresh_interval" after the last one.
+     * request_feed_frame -> Schedules "update_feed_frame" no sooner than "refresh_interval" after the last one, unless it has already been scheduled.
      * update_warning -> Checks to see if there is something for LaDD to warn the user about, and if there is it changes "warning_label" and "warning_frame" accordingly.
+     * update_performance_mode -> Updates "refresh_interval" and "cp_performance_label_value" with the performance mode and frame rate published by "Camera's" frame-rate governor, and "full_frame_scale" with the memory mode, then publishes "metrics," beats "heartbeat," and lets "allocation_tracker" take its snapshot.
      * get_X_vars_helper [static] -> "Reads" the .csv files of LaDD ("configure.csv" or "data.csv"), searches for their respective "variables", makes up for incomplete or missing variables, updates the .csv files (possibly fixing and shortening them), then returns its findings; used by "get_config_vars" and "get_data_vars".
      * get_config_vars [static] -> Passes "configure.csv" and the configuration variables' names to "get_X_vars_helper" to get the variables and their values, checks to see if all of the configuration variables are acceptable and accounted for, and then returns its findings.
      * get_data_vars [static] -> Passes "data.csv" and the data variables' names to "get_X_vars_helper" to get the variables and their values, checks to see if all of the data variables are acceptable and accounted for, and then returns its findings.
@@ -207,7 +251,7 @@ class User_Interface:
      * set_data_vars -> Sets the data variables' values equal to that of "cp_threshold_spinbox_value" and "cp_warping_spinbox_value."
     """
     
-    def __init__(self, shared_dict, data_vars_defaulted, need_to_set_config_vars, OBD_connected, camera_connected):
+    def __init__(self, shared_dict, data_vars_defaulted, need_to_set_config_vars, OBD_connected, camera_connected, notifier=None, shutdown_coordinator=None, heartbeat=None):
         """
         Instantiates the class, and provides a user interface for LaDD.
         
@@ -216,6 +260,9 @@ class User_Interface:
          * need_to_set_config_vars [bool] -> Determined in main.py, if False, then all of the configuration variables have been successfully pulled from the "configure.csv file", but if True, then that was not the case.
          * OBD_connected [bool] -> The result of running "interfaces.OBD.OBD.test_OBD_connection" in LaDD's main.py.
          * camera_connected [bool] -> The result of running "interfaces.camera.Camera.test_camerea_connection: in LaDD's main.py.
+         * notifier [interfaces.notifier.Notifier] -> The pipe through which "Camera" and "OBD" wake up the user interface (optional).
+         * shutdown_coordinator [interfaces.shutdown.Shutdown_Coordinator] -> Tells the other processes to end, and the user interface when to close (optional).
+         * heartbeat [interfaces.supervisor.Heartbeat] -> Beaten every second by "update_performance_mode" (optional).
         """
         
         self.shared_dict = shared_dict
@@ -255,6 +302,11 @@ class User_Interface:
         self.mp_help_label_frame = ttk.Labelframe(self.main_page, text='Help with...')
         self.mp_cp_help_button = ttk.Button(self.mp_help_label_frame,text='"Camera" Tab',command=self.cp_help_window)
         self.mp_scvp_help_button = ttk.Button(self.mp_help_label_frame,text='"Set Config. Vars." Tab',command=self.scvp_help_window)
+        self.profile_process_name = StringVar()
+        self.profile_process_name.set('Camera')
+        self.mp_profile_label_frame = ttk.Labelframe(self.main_page, text='Profile...')
+        self.mp_profile_combobox = ttk.Combobox(self.mp_profile_label_frame,textvariable=self.profile_process_name,state='readonly',postcommand=self.update_profile_processes)
+        self.mp_profile_button = ttk.Button(self.mp_profile_label_frame,text='Profile',command=self.profile_process)
         
         #cp = camera_page
         self.feed_name = StringVar()
@@ -263,6 +315,15 @@ class User_Interface:
         self.cp_warping_checkbutton_value = StringVar()
         self.Image_obj = None
         self.ImageTk_obj = None
+        self.feed_keys = {'Full Frame':'full_frame','Region of Interest Frame':'ROI_frame','Warped ROI Frame':'warped_ROI_frame','Processed ROI Frame':'processed_ROI_frame'}
+        self.feed_scales = {'full_frame':3.75,'ROI_frame':1.5,'warped_ROI_frame':1.5,'processed_ROI_frame':1.5}
+        self.last_frame_number = -1
+        self.last_feed_key = None
+        self.resize_plan = None
+        self.resize_rows = None
+        self.resize_cols = None
+        self.row_buffer = None
+        self.resize_buffer = None
         
         self.cp_frame_combobox_label = ttk.Label(self.camera_page,text='Frame Type from Camera Feed:')
         self.cp_frame_combobox = ttk.Combobox(self.camera_page, textvariable=self.feed_name)
@@ -278,6 +339,24 @@ class User_Interface:
         self.cp_warping_spinbox_value.set(self.shared_dict['first_row_for_warping'])
         self.cp_warping_checkbutton = ttk.Checkbutton(self.camera_page,text='Show Both Rows for Warping.',variable=self.cp_warping_checkbutton_value,command=self.show_both_rows_for_warping)
         self.cp_feed_label = ttk.Label(self.camera_page)
+        self.detection_engine_name = StringVar()
+        self.cp_engine_combobox_label = ttk.Label(self.camera_page,text='Detection Engine:')
+        self.cp_engine_combobox = ttk.Combobox(self.camera_page, textvariable=self.detection_engine_name)
+        self.cp_engine_combobox['values'] = ('Hough','Histogram')
+        self.cp_engine_combobox.state(['readonly'])
+        self.cp_engine_combobox.set(self.shared_dict['detection_engine'].capitalize())
+        self.cp_engine_combobox.bind('<<ComboboxSelected>>',self.update_detection_engine)
+        self.refresh_interval = 16
+        self.notifier = notifier
+        self.metrics = metrics.Metrics(self.shared_dict,'User_Interface')
+        self.full_frame_scale = 1
+        self.allocation_tracker = memory.Allocation_Tracker('User_Interface')
+        self.shutdown_coordinator = shutdown_coordinator
+        self.heartbeat = heartbeat
+        self.feed_update_pending = False
+        self.last_feed_update_time = 0.0
+        self.cp_performance_label_value = StringVar()
+        self.cp_performance_label = ttk.Label(self.camera_page,textvariable=self.cp_performance_label_value)
         
         #scvp = set_config_vars_page
         self.accepted_characters = ['0','1','2','3','4','5','6','7','8','9','.']
@@ -334,9 +413,12 @@ class User_Interface:
         self.mp_horiz_separator.grid(column=0,row=2,sticky='we')
         self.mp_shutdown_button.grid(column=0,row=3,sticky='n')
         self.mp_verti_separator.grid(column=1,row=0,rowspan=4,sticky='ns')
-        self.mp_help_label_frame.grid(column=2,row=0,rowspan=4,sticky='new')
+        self.mp_help_label_frame.grid(column=2,row=0,rowspan=2,sticky='new')
         self.mp_cp_help_button.grid(column=0,row=0,sticky='nswe')
         self.mp_scvp_help_button.grid(column=0,row=1,sticky='nswe')
+        self.mp_profile_label_frame.grid(column=2,row=2,rowspan=2,sticky='new')
+        self.mp_profile_combobox.grid(column=0,row=0,sticky='nswe')
+        self.mp_profile_button.grid(column=0,row=1,sticky='nswe')
         
         self.cp_frame_combobox_label.grid(column=0,row=0,columnspan=2)
         self.cp_frame_combobox.grid(column=0,row=1,columnspan=2)
@@ -347,6 +429,9 @@ class User_Interface:
         self.cp_warping_spinbox.grid(column=0,row=6,columnspan=2)
         self.cp_warping_checkbutton.grid(column=0,row=7,columnspan=2)
         self.cp_feed_label.grid(column=2,row=0,rowspan=7)
+        self.cp_engine_combobox_label.grid(column=0,row=8,columnspan=2)
+        self.cp_engine_combobox.grid(column=0,row=9,columnspan=2)
+        self.cp_performance_label.grid(column=0,row=10,columnspan=3)
         
         
         self.scvp_entry_result.grid(column=0,row=0,columnspan=6,sticky='we')
@@ -371,7 +456,7 @@ class User_Interface:
         self.warning_label.grid(column=0,row=2,sticky='nsw')
         self.warning_frame.grid(column=1,row=2,sticky='nes')
         
-        for child in list(self.main_page.winfo_children() + self.camera_page.winfo_children() + self.set_config_vars_page.winfo_children() + self.mp_help_label_frame.winfo_children()):
+        for child in list(self.main_page.winfo_children() + self.camera_page.winfo_children() + self.set_config_vars_page.winfo_children() + self.mp_help_label_frame.winfo_children() + self.mp_profile_label_frame.winfo_children()):
             child.grid_configure(padx=2, pady=2)
 
         self.cp_frame_combobox['width'] = len(self.cp_frame_combobox_label['text']) - 5
@@ -387,7 +472,33 @@ class User_Interface:
             
     def begin(self):
         """
-        Checks to make sure that all of the configuration variables are in check, and the OBD and camera are connected, warning the user if not, then launches the user interface.
+        Launches the user interface, warning the user through "show_startup_warnings" once it is running.
+        
+        The warnings are only shown once "root's" event loop is running and "update_performance_mode" is scheduled: a dialog blocks whoever opened it until it is closed, but keeps running "root's" scheduled callbacks meanwhile, so "heartbeat" keeps being beaten however long a dialog is left open, and "Supervisor" does not mistake it for a hang (and restart the user interface, only for the same dialog to come back).
+        """
+        
+        if self.heartbeat is not None:
+            self.heartbeat.beat()
+        if not self.shared_dict['turn_off_LaDD']:
+            if self.notifier is not None:
+                #Nothing is polled: "root's" event loop sleeps until "Camera" or "OBD" write to "notifier."
+                self.root.tk.createfilehandler(self.notifier,READABLE,self.handle_notifications)
+                self.cp_frame_combobox.bind('<<ComboboxSelected>>',self.request_feed_frame)
+                self.update_warning()
+                self.request_feed_frame()
+            else:
+                #16 milliseconds represents 62.5 frames per second, about 60 frames per second
+                self.root.after(16,self.update_feed_frame)
+                self.root.after(16,self.update_warning)
+            self.root.after(16,self.update_performance_mode)
+        if self.shutdown_coordinator is not None:
+            self.root.after(250,self.check_shutdown_request)
+        self.root.after(0,self.show_startup_warnings)
+        self.root.mainloop()
+    
+    def show_startup_warnings(self):
+        """
+        Checks to make sure that all of the configuration variables are in check, and the OBD and camera are connected, warning the user if not.
         """
         
         if self.need_to_set_config_vars:
@@ -398,12 +509,6 @@ class User_Interface:
             messagebox.showinfo(message='Sorry, a camera connection could not be establish.', detail='Check the cabel between LaDD and the Raspberry Pi V2 Camera Module and make sure it is snuggly connected to both.')
         if not self.OBD_connnected:
             messagebox.showinfo(message='Sorry, an OBD connection could not be establish.', detail='Check both your physical connection between your vehicle\'s OBD port and that of LaDD\'s serial port, as well as the current value of the "Baud Rate" configuration variable, which may not be suited to your vehicle.')
-        
-        if not self.shared_dict['turn_off_LaDD']:
-            #16 milliseconds represents 62.5 frames per second, about 60 frames per second
-            self.root.after(16,self.update_feed_frame)
-            self.root.after(16,self.update_warning)
-        self.root.mainloop()
             
     def do_nothing(self):
         """
@@ -449,13 +554,52 @@ class User_Interface:
     
     def shutdown(self):
         """
-        Closes LaDD's user interface and signals via "shared_dict's" "turn_off_LaDD" key to all of the other processes to end, effectively shutting down LaDD.
+        Closes LaDD's user interface and signals via "shutdown_coordinator" (or "shared_dict's" "turn_off_LaDD" key) to all of the other processes to end, effectively shutting down LaDD.
         """
         
         self.set_data_vars()
-        self.shared_dict['turn_off_LaDD'] = True
+        if self.shutdown_coordinator is not None:
+            self.shutdown_coordinator.request()
+        else:
+            self.shared_dict['turn_off_LaDD'] = True
+        if self.notifier is not None:
+            self.root.tk.deletefilehandler(self.notifier)
         self.root.quit()
         self.root.destroy()
+    
+    def check_shutdown_request(self):
+        """
+        Calls "shutdown" once shutdown has been requested by another process, so that the user interface does not wait for its deadline to be terminated; "shutdown_coordinator's" event is checked directly, without going through "shared_dict."
+        """
+        
+        if self.shutdown_coordinator.is_requested():
+            self.shutdown()
+        else:
+            self.root.after(250,self.check_shutdown_request)
+    
+    def update_profile_processes(self):
+        """
+        Fills "mp_profile_combobox" with the processes in "shared_dict's" "supervisor" when it is opened, as they are only known once "Supervisor" has started them.
+        """
+        
+        self.mp_profile_combobox['values'] = sorted(self.shared_dict['supervisor'])
+    
+    def profile_process(self):
+        """
+        Sends "interfaces.profiler.Profiler.SIGNAL" to the process selected in "mp_profile_combobox," which then profiles itself for a few seconds without LaDD being restarted, and tells the user where to find the result.
+        """
+        
+        name = self.profile_process_name.get()
+        pid = self.shared_dict['supervisor'].get(name,{}).get('pid')
+        if pid is None:
+            messagebox.showinfo(message='Sorry, "' + name + '" is not running.', detail='It may be waiting to be restarted; try again in a few seconds.')
+            return
+        try:
+            os.kill(pid,profiler.Profiler.SIGNAL)
+        except ProcessLookupError:
+            messagebox.showinfo(message='Sorry, "' + name + '" is not running.', detail='It may be waiting to be restarted; try again in a few seconds.')
+            return
+        messagebox.showinfo(message='Profiling "' + name + '."', detail='The collapsed stacks will be written to the "profiles" directory, named after "' + name + '," once it has been profiled for a few seconds; a process that is already being profiled carries on as it was.')
         
     def show_both_rows_for_warping(self):
         """
@@ -481,34 +625,100 @@ class User_Interface:
         
         self.shared_dict['first_row_for_warping'] = int(self.cp_warping_spinbox_value.get())
         
+    def update_detection_engine(self, event):
+        """
+        Updates the value of "shared_dict's" "detection_engine" by setting it to the engine selected in "cp_engine_combobox."
+        
+        Arguments:
+         * event [tkinter.Event] -> The "<<ComboboxSelected>>" event of "cp_engine_combobox."
+        """
+        
+        self.shared_dict['detection_engine'] = self.detection_engine_name.get().lower()
+    
     def update_feed_frame(self):
         """
         Updates what is being displayed in the "cp_feed_label" with the latest images from "shared_dict's" "full_frame", "ROI_frame", or "processed_ROI_frame," depending on what was selected in the "cp_frame_combobox," after they were converted into usable tkinter images and stored in "ImageTk_obj."
         """
         
-        if self.feed_name.get() == 'Full Frame' and self.shared_dict['full_frame'] != []:
-            self.Image_obj = PIL.Image.fromarray(self.shared_dict['full_frame'],'RGB')
-            self.Image_obj = self.Image_obj.resize((int(self.shared_dict['full_frame'].shape[1]/3.75),int(self.shared_dict['full_frame'].shape[0]/3.75)),PIL.Image.LANCZOS)
-        elif self.feed_name.get() == 'Region of Interest Frame' and self.shared_dict['ROI_frame'] != []:
-            self.Image_obj = PIL.Image.fromarray(self.shared_dict['ROI_frame'],'RGB')
-            self.Image_obj = self.Image_obj.resize((int(self.shared_dict['ROI_frame'].shape[1]/1.5),int(self.shared_dict['ROI_frame'].shape[0]/1.5)),PIL.Image.LANCZOS)
-        elif self.feed_name.get() == 'Warped ROI Frame' and self.shared_dict['warped_ROI_frame'] != []:
-            self.Image_obj = PIL.Image.fromarray(self.shared_dict['warped_ROI_frame'],'RGB')
-            self.Image_obj = self.Image_obj.resize((int(self.shared_dict['warped_ROI_frame'].shape[1]/1.5),int(self.shared_dict['warped_ROI_frame'].shape[0]/1.5)),PIL.Image.LANCZOS)
-        elif self.feed_name.get() == 'Processed ROI Frame' and self.shared_dict['processed_ROI_frame'] != []:
-            self.Image_obj = PIL.Image.fromarray(self.shared_dict['processed_ROI_frame'],'RGB')
-            self.Image_obj = self.Image_obj.resize((int(self.shared_dict['processed_ROI_frame'].shape[1]/1.5),int(self.shared_dict['processed_ROI_frame'].shape[0]/1.5)),PIL.Image.LANCZOS)
-        else:
-            self.Image_obj = None
-            
-        if self.Image_obj != None:
+        self.feed_update_pending = False
+        self.last_feed_update_time = time.monotonic()
+        feed_key = self.feed_keys[self.feed_name.get()]
+        frame_number = self.shared_dict['frame_number']
+        #Nothing is rendered unless "Camera" has produced a new frame or the user has picked another feed.
+        if frame_number != self.last_frame_number or feed_key != self.last_feed_key:
+            self.last_frame_number = frame_number
+            self.last_feed_key = feed_key
+            frame = self.shared_dict[feed_key]
+            if len(frame) > 0:
+                render_start_time = time.perf_counter()
+                self.render_frame(frame,self.feed_scales[feed_key]/self.full_frame_scale if feed_key == 'full_frame' else self.feed_scales[feed_key])
+                self.metrics.observe('feed_render_seconds',time.perf_counter() - render_start_time)
+                self.metrics.increment('feed_frames_total')
+            else:
+                self.Image_obj = None
+                self.ImageTk_obj = None
+                self.cp_feed_label['image'] = ""
+        
+        if self.notifier is None and not self.shared_dict['turn_off_LaDD']:
+            self.root.after(self.refresh_interval,self.update_feed_frame)
+    
+    def render_frame(self, frame, scale):
+        """
+        Resizes a frame into "resize_buffer" with the precomputed "resize_rows" and "resize_cols," then pastes it into "ImageTk_obj."
+        
+        Arguments:
+         * frame [np.ndarray] -> An RGB frame taken from "shared_dict."
+         * scale [float] -> How many times smaller "frame" is to be displayed.
+        """
+        
+        height = int(frame.shape[0]/scale)
+        width = int(frame.shape[1]/scale)
+        if self.resize_plan != (frame.shape,scale):
+            self.resize_plan = (frame.shape,scale)
+            #Nearest-neighbour sampling, taking the pixel at the center of every block of "frame" that makes up one pixel of the resized frame.
+            self.resize_rows = ((np.arange(height) + 0.5) * (frame.shape[0]/height)).astype(np.intp)
+            self.resize_cols = ((np.arange(width) + 0.5) * (frame.shape[1]/width)).astype(np.intp)
+            self.row_buffer = np.empty((height,frame.shape[1],3),np.uint8)
+            self.resize_buffer = np.empty((height,width,3),np.uint8)
+            self.ImageTk_obj = None
+        
+        np.take(frame,self.resize_rows,axis=0,out=self.row_buffer)
+        np.take(self.row_buffer,self.resize_cols,axis=1,out=self.resize_buffer)
+        self.Image_obj = PIL.Image.fromarray(self.resize_buffer,'RGB')
+        
+        if self.ImageTk_obj is None:
             self.ImageTk_obj = PIL.ImageTk.PhotoImage(image=self.Image_obj)
             self.cp_feed_label['image'] = self.ImageTk_obj
         else:
-            self.cp_feed_label['image'] = ""
+            self.ImageTk_obj.paste(self.Image_obj)
+    
+    def handle_notifications(self, file, mask):
+        """
+        Called by "root's" event loop when there are notifications waiting in "notifier," it updates the warning at once and schedules "update_feed_frame" no sooner than "refresh_interval" after the last one.
         
-        if not self.shared_dict['turn_off_LaDD']:
-            self.root.after(16,self.update_feed_frame)
+        Arguments:
+         * file [interfaces.notifier.Notifier] -> "notifier," as it was registered with "root's" event loop.
+         * mask [int] -> Always tkinter's "READABLE."
+        """
+        
+        notifications = self.notifier.drain()
+        if self.notifier.STATE in notifications:
+            self.update_warning()
+        if self.notifier.FRAME in notifications:
+            self.request_feed_frame()
+    
+    def request_feed_frame(self, event=None):
+        """
+        Schedules "update_feed_frame" no sooner than "refresh_interval" after the last one, unless it has already been scheduled.
+        
+        Arguments:
+         * event [tkinter.Event] -> The "<<ComboboxSelected>>" event of "cp_frame_combobox," when called because the user picked another feed.
+        """
+        
+        if not self.feed_update_pending:
+            self.feed_update_pending = True
+            elapsed = int(1000*(time.monotonic() - self.last_feed_update_time))
+            self.root.after(max(0,self.refresh_interval - elapsed),self.update_feed_frame)
     
     def update_warning(self):
         """
@@ -532,8 +742,24 @@ class User_Interface:
             self.warning_frame['style'] = 'Yellow.TFrame'
             self.warning_label_value.set('Below 30 mph.')
         
-        if not self.shared_dict['turn_off_LaDD']:
+        if self.notifier is None and not self.shared_dict['turn_off_LaDD']:
             self.root.after(16,self.update_warning)
+    
+    def update_performance_mode(self):
+        """
+        Updates "refresh_interval" and "cp_performance_label_value" with the performance mode and frame rate published by "Camera's" frame-rate governor, and "full_frame_scale" with the memory mode, then publishes "metrics," beats "heartbeat," and lets "allocation_tracker" take its snapshot, as this is called about once per second.
+        """
+        
+        self.metrics.flush()
+        if self.heartbeat is not None:
+            self.heartbeat.beat()
+        self.refresh_interval = self.shared_dict['ui_refresh_interval']
+        self.full_frame_scale = memory.Memory_Budget.MODE_SETTINGS[self.shared_dict.get('memory_mode','full')]['full_frame_scale']
+        self.allocation_tracker.maybe_snapshot()
+        self.cp_performance_label_value.set('Performance Mode: ' + self.shared_dict['performance_mode'] + ' (' + str(self.shared_dict['detection_fps']) + ' FPS)')
+        
+        if not self.shared_dict['turn_off_LaDD']:
+            self.root.after(1000,self.update_performance_mode)
             
     @staticmethod
     def get_X_vars_helper(name_of_csv_file, X_var1, X_var2):
@@ -19,25 +19,38 @@ You should have received a copy of the GNU General Public License
 along with LaDD.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+import argparse
 import multiprocessing as mp
-import os.path
+import multiprocessing.managers
+import os
+import tracemalloc
 from interfaces import *
 
 """
 "main" Module:
 
 Packages Imported:
+ * argparse,
  * multiprocessing (as mp),
+ * multiprocessing.managers,
+ * os,
+ * tracemalloc,
  * interfaces.
 
 Functions:
  * begin_process -> Initiates a separate process using what was passed as arguments to a mp.Process when the "start" method of that mp.Process is called.
+
+Usage:
+ * python main.py -> Runs LaDD with its user interface on the touchscreen.
+ * python main.py --headless -> Runs LaDD without a user interface, for units without a screen; it is shut down with Ctrl+C or SIGTERM (a second one makes the processes exit at once).
+ * python main.py --headless --stream-port 8080 -> Like the above, but also serves the debug views and state at http://127.0.0.1:8080/, and the metrics of every process for Prometheus at http://127.0.0.1:8080/metrics (use "--stream-host 0.0.0.0" to reach it from a laptop on the same network).
+ * python main.py --memory-budget 600 -> Runs LaDD so that it publishes smaller frames and keeps a shorter clip buffer while its processes use more than 600 MB together, printing the peak memory of every process once it is shut down; add "--tracemalloc" to also write the lines of code of "Camera" and the user interface that hold the most memory to the "profiles" directory every 30 seconds (which slows LaDD down).
+ * python main.py, with a row such as "Camera-left,1,640,480,," added to "cameras.csv" -> Runs a "Camera" process for every camera listed (here device 1 as well as device 0), warning the driver when any of them sees the vehicle cross a lane or divider; a camera's own "first_row_for_warping" and lookahead bands (e.g. "far:-60:30 mid:-30:30," or "none"; they keep a lane hidden close up from counting as nothing detected, but do not warn any earlier) may be given in the last two columns, and its calibration is kept in "calibration-<name>.csv."
+ * kill -USR1 <pid> -> Profiles the process of LaDD with that ID for 10 seconds, writing its collapsed stacks to the "profiles" directory for flame graphs; the IDs of the processes are under "supervisor" in the debug stream's "/state."
 """
 
 Piezo_pin = 18
 #The GPIO pin number of a pulse width modulation GPIO pin on the Raspberry Pi 3 that LaDD uses to control the Piezo buzzer
-camera_resolution = [640,480]
-#The resolution of the Raspberry Pi Camera Module V2 [width,height].
 
 def begin_process(obj):
     """
@@ -53,6 +66,14 @@ def begin_process(obj):
     obj.begin()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='LaDD, the Lane Detection Device.')
+    parser.add_argument('--headless',action='store_true',help='Run without the user interface.')
+    parser.add_argument('--stream-port',type=int,default=None,help='Serve the debug views and state over HTTP on this port.')
+    parser.add_argument('--stream-host',default='127.0.0.1',help='The address the debug stream listens on.')
+    parser.add_argument('--memory-budget',type=float,default=None,help='Shrink the debug frames and the clip buffer while LaDD uses more than this many MB.')
+    parser.add_argument('--tracemalloc',action='store_true',help='Trace allocations in every process and periodically write the largest to the "profiles" directory.')
+    args = parser.parse_args()
+    
     if not os.path.isfile('configure.csv'):
         with open('configure.csv','x',newline='') as csvfile:
             pass
@@ -60,10 +81,26 @@ if __name__ == '__main__':
     if not os.path.isfile('data.csv'):
         with open('data.csv','x',newline='') as csvfile:
             pass
-
-    manager_obj = mp.Manager()
+    
+    manager_obj = mp.managers.SyncManager()
+    manager_obj.start(shutdown.Shutdown_Coordinator.ignore_signals)
+    #"manager_obj" ignores Ctrl+C and SIGTERM, so that "shared_dict" outlives the processes using it until "shutdown_obj" shuts it down last.
     shared_dict = manager_obj.dict({'vehicle_width':0,'baud_rate':0,'first_row_for_warping':0,'binary_threshold_value_lower_end':0,'turn_off_LaDD':False, 'below_48kph':False, 'crossed_48kph_threshold':False,'result':'',
-    'crossed_lane':False,'crossed_divider':False,'nothing_detected':False,'full_frame':[],'ROI_frame':[],'warped_ROI_frame':[],'show_both_rows_for_warping':False,'processed_ROI_frame':[],'result':''})
+    'crossed_lane':False,'crossed_divider':False,'nothing_detected':False,'full_frame':[],'ROI_frame':[],'warped_ROI_frame':[],'show_both_rows_for_warping':False,'processed_ROI_frame':[],'result':'','frame_number':0,
+    'performance_mode':'full','detection_fps':0.0,'gated_frame_fraction':0.0,'ui_refresh_interval':16,'speed':0.0,'speed_estimate':(0.0,0.0,0.0),'detection_engine':'hough',
+    'debug_views_enabled':True,'obd_sample':{},'lane_offsets_ahead':{},'process_ids':{},'supervisor':{},'memory':{},'memory_mode':'full','cameras':{}})
+    shared_dict['process_ids'] = {'main':os.getpid(),'manager_obj':mp.active_children()[0].pid}
+    #"manager_obj's" process is the only child process so far; the other processes publish their own IDs with their metrics.
+    
+    if args.tracemalloc:
+        tracemalloc.start()
+        #Every process started after this is traced as well.
+    memory_budget_obj = memory.Memory_Budget(shared_dict,int(args.memory_budget*1e6) if args.memory_budget is not None else None)
+    
+    placement_obj = placement.Placement()
+    placement_obj.apply('main')
+    placement_obj.apply('manager_obj',shared_dict['process_ids']['manager_obj'])
+    #Every other process is placed by "supervisor_obj" as it starts, using "placement.csv."
     
     config_vars = user_interface.User_Interface.get_config_vars()
     shared_dict['vehicle_width'] = config_vars[1]['vehicle_width']
@@ -76,8 +113,24 @@ if __name__ == '__main__':
     if not config_vars[0]:
         shared_dict['turn_off_LaDD'] = True
     
+    #With neither the user interface nor the debug stream to show them, "Camera" does not publish its debug views at all.
+    shared_dict['debug_views_enabled'] = not args.headless or args.stream_port is not None
+    
+    cameras = camera.Camera.load_cameras()
+    #The name, device, resolution [width,height], "first_row_for_warping" (None for the user interface's), and lookahead bands (None for the default ones) of every camera in "cameras.csv," "Camera" first.
+    
     OBD_connected = OBD.OBD.test_OBD_connection(shared_dict['baud_rate'])
-    camera_connected = camera.Camera.test_camera_connection()
+    camera_connected = camera.Camera.test_camera_connection(cameras[0][1])
+    connected_cameras = cameras[:1]
+    for name, device, camera_res, first_row_for_warping, lookahead_bands in cameras[1:]:
+        if camera.Camera.test_camera_connection(device):
+            connected_cameras.append((name,device,camera_res,first_row_for_warping,lookahead_bands))
+        else:
+            print('The camera "' + name + '" (device ' + str(device) + ') could not be opened, so LaDD runs without it.')
+    cameras = connected_cameras
+    #Only "Camera," which looks forward, is needed for LaDD to run; a missing mirror camera is left out rather than turning LaDD off.
+    placement_obj.spread('Camera',[name for name, device, camera_res, first_row_for_warping, lookahead_bands in cameras])
+    #With more than one camera, each is given its own share of the cores of "Camera" in "placement.csv."
     #The two lines below are for testing purposes.
     #OBD_connected = True
     #camera_connected = True
@@ -86,23 +139,57 @@ if __name__ == '__main__':
             
     #For the purpose of testing individual "interfaces," you can comment out each line of code pertaining to the creation of one of the "X_obj" objects, their passing through their respective "X_process" mp.Process, etc.
     
-    user_interface_obj = user_interface.User_Interface(shared_dict,not data_vars[0],not config_vars[0],OBD_connected,camera_connected)
-    camera_obj = camera.Camera(shared_dict,camera_resolution)
-    audio_obj = audio.Audio(shared_dict)
-    OBD_obj = OBD.OBD(shared_dict,OBD_connected)
+    notifier_obj = notifier.Notifier()
+    #"notifier_obj" is created before the processes are started so that they all inherit its pipe.
+    shutdown_obj = shutdown.Shutdown_Coordinator(shared_dict)
+    #So is "shutdown_obj," so that they all inherit its event and signal handlers.
+    shutdown_obj.install_signal_handlers()
+    profiler_obj = profiler.Profiler()
+    profiler_obj.install_signal_handlers()
+    #So is "profiler_obj," so that any of them can be profiled with SIGUSR1 or the user interface's "Profile" button.
     
-    user_interface_process = mp.Process(target=begin_process, args=(user_interface_obj,))
-    camera_process = mp.Process(target=begin_process, args=(camera_obj,))
-    audio_process = mp.Process(target=begin_process, args=(audio_obj,))
-    OBD_process = mp.Process(target=begin_process, args=(OBD_obj,))
+    supervisor_obj = supervisor.Supervisor(shared_dict,shutdown_obj,begin_process,placement_obj,memory_budget_obj)
+    #So is "supervisor_obj," so that they all inherit the shared memory they beat their heartbeats into.
     
-    user_interface_process.start()
-    camera_process.start()
-    audio_process.start()
-    OBD_process.start()
+    fusion_obj = None
+    if len(cameras) > 1:
+        fusion_obj = fusion.Fusion(shared_dict,[name for name, device, camera_res, first_row_for_warping, lookahead_bands in cameras],notifier_obj,shutdown_obj,supervisor_obj.create_heartbeat('Fusion'))
+        #With more than one camera, "fusion_obj" combines their warning flags, and so is created before the processes are started too, so that they all inherit its shared memory.
+    camera_objs = [camera.Camera(shared_dict,camera_res,notifier_obj,lookahead_bands,shutdown_coordinator=shutdown_obj,heartbeat=supervisor_obj.create_heartbeat(name),name=name,device=device,
+                                 first_row_for_warping=first_row_for_warping,detection_slot=fusion_obj.create_slot(name) if fusion_obj is not None else None)
+                   for name, device, camera_res, first_row_for_warping, lookahead_bands in cameras]
+    audio_obj = audio.Audio(shared_dict,shutdown_obj,supervisor_obj.create_heartbeat('Audio'))
+    OBD_obj = OBD.OBD(shared_dict,OBD_connected,notifier_obj,supervisor_obj.create_heartbeat('OBD'))
     
-    user_interface_process.join()
-    camera_process.join()
-    audio_process.join()
-    OBD_process.join()
+    if not args.headless:
+        user_interface_obj = user_interface.User_Interface(shared_dict,not data_vars[0],not config_vars[0],OBD_connected,camera_connected,notifier_obj,shutdown_obj,supervisor_obj.create_heartbeat('User_Interface'))
+        supervisor_obj.add('User_Interface',user_interface_obj)
+    else:
+        #The warnings that the user interface would have shown in dialog windows.
+        if not config_vars[0]:
+            print('At least one of the configuration variables in "configure.csv" is non-existant or not acceptable.')
+        if not data_vars[0]:
+            print('At least one of the data variables in "data.csv" was non-existant or not acceptable and has been set to its default value.')
+        if not camera_connected:
+            print('A camera connection could not be established.')
+        if not OBD_connected:
+            print('An OBD connection could not be established.')
+        #Without the user interface's "Shutdown" button, LaDD is shut down with Ctrl+C or SIGTERM, which "shutdown_obj" handles in every process.
+    if args.stream_port is not None:
+        debug_stream_obj = debug_stream.Debug_Stream(shared_dict,args.stream_host,args.stream_port,shutdown_coordinator=shutdown_obj,heartbeat=supervisor_obj.create_heartbeat('Debug_Stream'))
+        supervisor_obj.add('Debug_Stream',debug_stream_obj)
+    for camera_obj in camera_objs:
+        supervisor_obj.add(camera_obj.name,camera_obj)
+    if fusion_obj is not None:
+        supervisor_obj.add('Fusion',fusion_obj)
+    supervisor_obj.add('Audio',audio_obj)
+    supervisor_obj.add('OBD',OBD_obj)
+    #Each process is named after its class (the cameras after "Camera"), which is how "supervisor_obj" looks up its hang timeout and "shutdown_obj" its deadline.
     
+    supervisor_obj.start()
+    supervisor_obj.run()
+    #"run" returns once shutdown is requested, having restarted any process that crashed or hung until then.
+    shutdown_obj.stop_processes(supervisor_obj.get_processes())
+    shutdown_obj.time_stage('manager_obj',manager_obj.shutdown)
+    shutdown_obj.report()
+    memory_budget_obj.report()